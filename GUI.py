@@ -1,10 +1,12 @@
 """
 This script is responsible for creating the GUI for the experimental setup.
 It allows the user to choose the experimental setup, subject ID, root folder and game mode.
-The user can choose between the following experimental setups: Motor noise, Feedback, Interference, Baseline and Test.
+The user can choose between the following experimental setups: Motor noise, Feedback, Interference, Baseline and Test,
+or choose a schedule file (.json or .toml) with a custom experimental setup.
 The user can choose between two game modes: Test and Full screen.
 The user can choose the root folder for the experiment.
 The user can enter the subject ID.
+The user can choose to resume the last interrupted session of the subject.
 The user can start the experiment by clicking the GO button.
 The user can choose the csv file with the experiment results.
 The user can start the data analysis by clicking the GO button.
@@ -13,6 +15,10 @@ The user can start the data analysis by clicking the GO button.
 from tkinter import *
 from tkinter import ttk
 
+# built-in experimental setups {button text: script name}
+SETUPS = {'Motor noise': 'motor_noise_script', 'Feedback': 'feedback_script', 'Interference': 'interference_script',
+          'Baseline': 'baseline_script', 'Test': 'test_script'}
+
 
 def main_menu(root):
     """
@@ -20,16 +26,16 @@ def main_menu(root):
     Args:
         root: Tk() object
     Returns:
-        exp_setup: str, the chosen experimental setup
+        exp_setup: str, the chosen experimental setup (script name or path to the schedule file)
         id: str, the subject ID
         path: str, the root folder for the experiment
         mode: str, the chosen game mode
+        resume: bool, True if the last interrupted session of the subject shall be resumed
     """
     root.title("Experimental Setup")
-    setups_dict = {'Motor noise': 'motor_noise_script', 'Feedback': 'feedback_script',
-                   'Interference': 'interference_script', 'Baseline': 'baseline_script', 'Test': 'test_script'}
+    setups_dict = SETUPS
     resolution = root.winfo_screenwidth(), root.winfo_screenheight()
-    box_width, box_height = 400, 850
+    box_width, box_height = 400, 1000
     x_pos = resolution[0] // 2 - box_width // 2
     y_pos = resolution[1] // 2 - box_height // 2
 
@@ -39,6 +45,7 @@ def main_menu(root):
     mode = StringVar()
     exp_setup = StringVar()
     subject_id = StringVar()
+    resume = BooleanVar()
 
     root.geometry(f"{box_width}x{box_height}+{x_pos}+{y_pos}")
     root.columnconfigure(0, weight=1)
@@ -57,38 +64,60 @@ def main_menu(root):
 
         from tkinter import filedialog
         filepath = filedialog.askdirectory()
-        Label(root, text=filepath, font=('calibri', 12, 'bold')).grid(column=0, row=len(setups_dict) + 4, pady=10)
+        Label(root, text=filepath, font=('calibri', 12, 'bold')).grid(column=0, row=len(setups_dict) + 6, pady=10)
         print(filepath)
         path.set(filepath)
 
+    def choose_schedule_file(exp_setup):
+        """
+        This function allows the user to choose a schedule file as the experimental setup.
+        Args:
+            exp_setup: StringVar object
+        Returns:
+            None
+        """
+
+        from tkinter import filedialog
+        filepath = filedialog.askopenfilename(filetypes=[('Schedule files', '*.json *.toml')])
+        Label(root, text=filepath.split('/')[-1], font=('calibri', 12, 'bold')).grid(column=0,
+                                                                                   row=len(setups_dict) + 4, pady=10)
+        exp_setup.set(filepath)
+
     for i, setup in enumerate(setups_dict.keys()):
         ttk.Radiobutton(root, text=setup, value=setups_dict[setup], variable=exp_setup).grid(column=0, row=i + 3,
                                                                                              padx=10, pady=2,
                                                                                              sticky='ew')
 
+    schedule_file = Button(root, text="Choose schedule file", command=lambda: choose_schedule_file(exp_setup),
+                           width=20, height=1, font=('calibri', 18, 'bold'), borderwidth='4', relief='raised')
+    schedule_file.grid(column=0, row=len(setups_dict) + 3, columnspan=1, padx=10, pady=10)
+
     file_saving_path = Button(root, text="Choose root folder \nfor your experiment",
                               command=lambda: choose_file_path(path), width=20, height=2, font=('calibri', 18, 'bold'),
                               borderwidth='4', relief='raised')
-    file_saving_path.grid(column=0, row=len(setups_dict) + 3, columnspan=1, padx=10, pady=10)
+    file_saving_path.grid(column=0, row=len(setups_dict) + 5, columnspan=1, padx=10, pady=10)
 
     select_button = Button(root, text="GO", command=lambda: root.destroy(), width=10, height=2,
                            font=('calibri', 18, 'bold'), borderwidth='4', relief='raised')
-    select_button.grid(column=0, row=len(setups_dict) + 8, columnspan=1, padx=10, pady=10)
+    select_button.grid(column=0, row=len(setups_dict) + 11, columnspan=1, padx=10, pady=10)
 
-    Label(root, text='Choose Game mode:', font=('calibri', 24, 'bold')).grid(column=0, row=len(setups_dict) + 5,
+    Label(root, text='Choose Game mode:', font=('calibri', 24, 'bold')).grid(column=0, row=len(setups_dict) + 7,
                                                                              pady=10)
-    ttk.Radiobutton(root, text='Test', value='Test', variable=mode).grid(column=0, row=len(setups_dict) + 6, padx=10,
+    ttk.Radiobutton(root, text='Test', value='Test', variable=mode).grid(column=0, row=len(setups_dict) + 8, padx=10,
                                                                          pady=2, sticky='ew')
     ttk.Radiobutton(root, text='Full screen', value='full_screen', variable=mode).grid(column=0,
-                                                                                       row=len(setups_dict) + 7,
+                                                                                       row=len(setups_dict) + 9,
                                                                                        padx=10, pady=2, sticky='ew')
+    Checkbutton(root, text='Resume interrupted session', variable=resume, font=('calibri', 18, 'bold')).grid(
+        column=0, row=len(setups_dict) + 10, padx=10, pady=10)
 
     root.mainloop()
     path = path.get()
     exp_setup = exp_setup.get()
     id = subject_id.get()
     mode = mode.get()
-    return exp_setup, id, path, mode
+    resume = resume.get()
+    return exp_setup, id, path, mode, resume
 
 
 def reader_menu(dialog_window):
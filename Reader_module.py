@@ -3,35 +3,39 @@
 This code is used to plot the experimental data from the csv file.
 The data is read from the csv file and the error angles are plotted.
 The perturbation, motor noise, and target angle sequences are detected and plotted.
-The plot is saved in the same directory as the csv file.
+The plot is saved in the same directory as the csv file (PNG by default, SVG and PDF on request).
+Run as a script, it asks for the csv file in a dialog window. The functions can be imported without opening
+any dialog or importing Tk, e.g. by batch_analysis.py to process a whole experiment root folder or by reaching_cli.py.
 
 """
 
-from tkinter import *
-
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.patches import Patch
 import pandas as pd
 
-import GUI
-
-# Create a dialog window asking for the path to the csv file
+from defaults import CRITICAL_ANGLE, FIGURE_DPI, FIGURE_FORMATS
+from session_output import OFF_VALUES, read_experimental_data, typed_data
 
-dialog_window = Tk()
-filepath = GUI.reader_menu(dialog_window)
-print(filepath)
+# columns which define the experimental conditions of a block of attempts in the summary table
+CONDITION_COLUMNS = ['perturbation_mode', 'motor_noise', 'feedback', 'sequence_target']
 
+FIGURE_SIZE = (20, 7.5)  # inches
 
-# Update this to your actual file path
-# filepath = '/Users/a1/Desktop/exp_data/motor_noise_test/motor_noise_test_2024_03_18_16_31_58/motor_noise/experimental_data.csv'
 
 def read_data(file_path):
     """Returns the data and the data folder.
+    The data is read from experimental_data.parquet if it exists in the folder of the file, otherwise from the csv file.
+    The columns have the dtypes of session_output.DATA_SCHEMA: perturbation_mode and feedback as categoricals,
+    move_faster as bool and the numerical columns as int64 or float64.
     Args:
         file_path: Path to the file containing the data
     """
     # Read data from the specified file
-    data = pd.read_csv(file_path)
+    data = read_experimental_data(file_path)
     directory_path = '/'.join(file_path.split('/')[:-1])  # Get the directory path
     return data, directory_path
 
@@ -73,207 +77,341 @@ def remove_outliers(data, critical_angle):
     return filtered_data, critical_idx
 
 
-def plot_error_angles():
+def plot_error_angles(ax1, timeline, error_angles):
     """
     Function to plot error angles.
+    Args:
+        ax1: matplotlib axes of the error angles
+        timeline: attempts values
+        error_angles: error angles values
     """
     ax1.plot(timeline, error_angles, 'bo-', alpha=0.75, label='error angles')
 
 
-def convert_perurbation_mode(data):
-    """Function to convert perturbation mode to numerical values.
-        Args: data: The data to convert
-        Returns: data: The data with the perturbation mode converted to numerical values
-    """
-    pd.set_option('future.no_silent_downcasting', True)
-    data['perturbation_mode'] = data['perturbation_mode'].replace('False', 0)
-    data['perturbation_mode'] = data['perturbation_mode'].replace('sudden', 1)
-    data['perturbation_mode'] = data['perturbation_mode'].replace('gradual', 2)
-    data['perturbation_mode'] = data['perturbation_mode'].replace('random', 3)
-    return data
-
-
-def convert_feedback_mode(data):
-    """Function to convert feedback mode to numerical values.
-        Args: data: The data to convert
-        Returns: data: The data with the feedback mode converted to numerical values
+def value_codes(values):
+    """ Function to encode the values of a column as integers, equal values get equal codes.
+    Args:
+        values: The column (pandas Series), categorical columns are encoded without hashing
+    Returns:
+        codes: np.ndarray of int
     """
-    pd.set_option('future.no_silent_downcasting', True)
-
-    data['feedback'] = data['feedback'].replace('False', 0)
-    data['feedback'] = data['feedback'].replace('trajectory', 1)
-    data['feedback'] = data['feedback'].replace('end_pos', 2)
-    data['feedback'] = data['feedback'].replace('reinforcement', 3)
-    return data
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy()
+    return pd.factorize(values, use_na_sentinel=False)[0]
 
 
-def mode_boundaries(mode):
-    """ Function to identify the boundaries of perturbation, motor noise, target sequences in the data.
+def block_starts(data, columns=CONDITION_COLUMNS, by=None):
+    """ Function to find where the blocks of consecutive attempts with the same value of each condition column start.
+    A block starts at the first row, where the value changes or where a new session starts: where the attempts
+    restart (concatenated sessions) or where the 'by' columns change.
+    Args:
+        data: The data, e.g. experimental_data.csv of one session or the concatenated data of a cohort
+        columns: The condition columns
+        by: optional list of columns identifying the sessions in concatenated data, e.g. ['participant', 'session']
+    Returns:
+        block_start: 2-dimensional bool array (columns x rows), True where a block of the column starts
+        new_session: bool array (rows), True where a session starts
+    """
+    rows = len(data)
+    # integer codes of the values, so all columns are compared at once
+    codes = np.column_stack([value_codes(data[column]) for column in columns])
+
+    new_session = np.ones(rows, dtype=bool)
+    new_session[1:] = np.diff(data['attempts'].to_numpy()) < 0
+    for column in by or []:
+        session_codes = value_codes(data[column])
+        new_session[1:] |= session_codes[1:] != session_codes[:-1]
+    block_start = np.ones((len(columns), rows), dtype=bool)
+    block_start[:, 1:] = (codes[1:] != codes[:-1]).T | new_session[1:]
+    return block_start, new_session
+
+
+def regime_boundaries(data, columns=CONDITION_COLUMNS, by=None):
+    """ Function to find the blocks of consecutive attempts with the same value (run-length encoding) of all condition
+    columns in one vectorized pass. Zero values are regular values, e.g. a change of the target angle to 0 starts
+    a new block. A block also ends where the attempts restart (concatenated sessions) or where the 'by' columns change.
     Args:
-        data['column_name']: The column to filter and analyze, e.g.:
-            data['perturbation_mode']: The perturbation sequence
-            data['motor_noise']: The motor noise sequence
-            data['sequence_target']: The target angle sequence
+        data: The data, e.g. experimental_data.csv of one session or the concatenated data of a cohort
+        columns: The condition columns, e.g. 'perturbation_mode', 'motor_noise', 'sequence_target', 'feedback'
+        by: optional list of columns identifying the sessions in concatenated data, e.g. ['participant', 'session']
+    Returns:
+        boundaries: DataFrame with one row per block, ordered by column and first row:
+            column: categorical, the condition column
+            first_row, last_row: int64, positions of the first and the last row of the block in the data
+            start: int64, attempts of the first row - 1, the block starts after this attempt
+            end: int64, attempts of the last row, the block ends with this attempt
+            value: the value of the condition column in the block
+    """
+    columns = list(columns)
+    rows = len(data)
+    if rows == 0:
+        return pd.DataFrame({'column': pd.Categorical([], categories=columns), 'first_row': np.zeros(0, np.int64),
+                             'last_row': np.zeros(0, np.int64), 'start': np.zeros(0, np.int64),
+                             'end': np.zeros(0, np.int64), 'value': np.zeros(0, object)})
+
+    block_start, _ = block_starts(data, columns, by)
+    column_index, first_row = np.nonzero(block_start)  # ordered by column, then by row
+    last_row = np.empty_like(first_row)
+    last_row[:-1] = first_row[1:] - 1
+    last_row[-1] = rows - 1
+    column_end = np.append(column_index[1:] != column_index[:-1], True)  # last block of each column
+    last_row[column_end] = rows - 1
+
+    attempts = data['attempts'].to_numpy()
+    values = np.empty(len(first_row), dtype=object)
+    for i, column in enumerate(columns):
+        in_column = column_index == i
+        values[in_column] = data[column].to_numpy()[first_row[in_column]]
+
+    return pd.DataFrame({'column': pd.Categorical.from_codes(column_index, categories=columns),
+                         'first_row': first_row.astype(np.int64),
+                         'last_row': last_row.astype(np.int64),
+                         'start': (attempts[first_row] - 1).astype(np.int64),
+                         'end': attempts[last_row].astype(np.int64),
+                         'value': values})
+
+
+def mode_boundaries(boundaries, mode, skip_zero=True):
+    """ Function to select the boundaries of perturbation, motor noise, target sequences or feedback.
+    Args:
+        boundaries: The boundaries of all condition columns (see regime_boundaries())
+        mode: The column to select, e.g.:
+            'perturbation_mode': The perturbation sequence
+            'motor_noise': The motor noise sequence
+            'sequence_target': The target angle sequence
+        skip_zero: True to skip the blocks where the mode is off (value 0 or 'False')
     Returns: boundaries: 3-dimensional array with the boundaries of sequences and sequence parameter:
         boundaries[:,0]: The start index of the sequence
         boundaries[:,1]: The end index of the sequence
         boundaries[:,2]: The sequence parameter: type of perturbation ('gradual', 'sudden', 'random'), motor noise level or
         target angle
     """
+    selected = boundaries[boundaries['column'] == mode]
+    if skip_zero:
+        selected = selected[~selected['value'].isin(OFF_VALUES)]
+    return selected[['start', 'end', 'value']].to_numpy(dtype=object)
 
-    column_name = mode  # Specify the mode (column) to filter and analyze
-
-    filtered_data = data[data[column_name] != 0]
-
-    filtered_attempts = filtered_data['attempts'].values  # attempts of corresponding mode
-    filtered_values = filtered_data[column_name].values  # values of corresponding mode
-
-    # Calculate differences in attempts and values to identify changes
-    difference_in_attempts = np.diff(filtered_attempts) - 1
-    difference_in_values = np.diff(filtered_values)
-
-    # Initialize boundaries array
-    boundaries = np.zeros((0, 3), dtype=object)
-
-    # If there are differences in attempts, identify sequences of consecutive attempts
 
-    if not np.all(difference_in_attempts == 0):
-
-        start_idx_attempts = np.where(difference_in_attempts != 0)[0] + 1
-        start_idx_attempts = np.insert(start_idx_attempts, 0, 0)  # Include the first sequence start
-
-        end_idx_attempts = np.where(difference_in_attempts != 0)[0]
-        end_idx_attempts = np.append(end_idx_attempts, len(filtered_attempts) - 1)  # Include the last sequence end
-
-        boundaries = np.zeros((len(start_idx_attempts), 3), dtype=object)
-        for i in range(len(start_idx_attempts)):
-            start_idx = filtered_attempts[start_idx_attempts[i]] - 1
+def band_collection(blocks, y_min, y_max, color, alpha, label=None):
+    """ Function to draw the blocks of a regime as rectangles in one artist, instead of one fill per block.
+    Args:
+        blocks: The boundaries of the blocks (see mode_boundaries())
+        y_min, y_max: The vertical extent of the rectangles
+        color: The color of the rectangles
+        alpha: The transparency of the rectangles, one value or one value per block
+        label: The legend label
+    Returns:
+        collection: matplotlib PolyCollection
+    """
+    starts = blocks[:, 0].astype(float)
+    ends = blocks[:, 1].astype(float)
+    vertices = np.empty((len(blocks), 4, 2))
+    vertices[:, :, 0] = np.column_stack([starts, starts, ends, ends])
+    vertices[:, :, 1] = [y_min, y_max, y_max, y_min]
+    colors = np.tile(to_rgba(color), (len(blocks), 1))
+    colors[:, 3] = alpha
+    return PolyCollection(vertices, facecolors=colors, linewidths=0, label=label)
+
+
+def save_figure(fig, path, formats=('png',), dpi=FIGURE_DPI, name='experiment'):
+    """ Function to save a figure in the session folder in one or several formats.
+    Args:
+        fig: The matplotlib figure
+        path: The directory path of the session
+        formats: The file formats, see FIGURE_FORMATS
+        dpi: The resolution of the raster formats in dots per inch
+        name: The file name without extension
+    Returns:
+        file_paths: list of the saved files
+    """
+    unknown = set(formats) - set(FIGURE_FORMATS)
+    if unknown:
+        raise ValueError(f'Unknown figure formats {sorted(unknown)}, supported formats: {FIGURE_FORMATS}')
+    file_paths = []
+    for figure_format in formats:
+        file_paths.append(f'{path}/{name}.{figure_format}')
+        fig.savefig(file_paths[-1], format=figure_format, dpi=dpi)
+    return file_paths
+
+
+def plot_regimes(ax1, boundaries, y_lim_min, y_lim_max):
+    """ Function to plot the experimental conditions: perturbation, motor noise and feedback blocks as bands and
+    target angle changes as lines, each condition as one collection.
+    Args:
+        ax1: matplotlib axes of the error angles
+        boundaries: The boundaries of all condition columns (see regime_boundaries())
+        y_lim_min, y_lim_max: The limits of the y-axis
+    Returns:
+        motor_noise_handles: list of legend handles, one per motor noise level
+    """
+    # plot perturbation regimes
+    perturbation_boundaries = mode_boundaries(boundaries, 'perturbation_mode')
+    if len(perturbation_boundaries):
+        ax1.add_collection(band_collection(perturbation_boundaries, y_lim_min, y_lim_max, 'orange', 0.15))
+        for perturbation in perturbation_boundaries:
+            perturbation_length = perturbation[1] - perturbation[0]
+            ax1.text(perturbation[0] + perturbation_length / 2, y_lim_max - 0.2, f'{perturbation[2]}\n perturbation',
+                     ha='center', va='center', alpha=0.75, color='orange', fontweight='bold')
+
+    # plot motor noise regimes, the opacity increases with the motor noise level
+    motor_noise_handles = []
+    motor_noise_boundaries = mode_boundaries(boundaries, 'motor_noise')
+    if len(motor_noise_boundaries):
+        levels = motor_noise_boundaries[:, 2].astype(float)
+        ax1.add_collection(band_collection(motor_noise_boundaries, y_lim_min, y_lim_min + 0.1, 'red',
+                                           0.1 + levels / 25))
+        for motor_noise in motor_noise_boundaries:
+            motor_length = motor_noise[1] - motor_noise[0]
+            ax1.text(motor_noise[0] + motor_length / 2, y_lim_min + 0.05, f'{motor_noise[2]:g}', va='center',
+                     ha='center', fontweight='bold')
+        motor_noise_handles = [Patch(color='red', alpha=0.1 + level / 25, linewidth=0, label=f'motor noise: {level:g}')
+                               for level in pd.unique(levels)]
+
+    # plot target angle changes
+    sequence_target_boundaries = mode_boundaries(boundaries, 'sequence_target', skip_zero=False)
+    if len(sequence_target_boundaries):
+        ax1.vlines(sequence_target_boundaries[:, 0].astype(float), ymin=y_lim_max - 0.1, ymax=y_lim_max,
+                   color='green', linestyle='-', linewidth=2, label='target angle\nchange')
+        for target in sequence_target_boundaries:
+            ax1.text(target[0], y_lim_max - 0.05, f'  {target[2]:g}°', va='center', ha='left',
+                     fontweight='bold', color='green')
+
+    # plot feedback regimes
+    feedback_boundaries = mode_boundaries(boundaries, 'feedback')
+    if len(feedback_boundaries):
+        ax1.add_collection(band_collection(feedback_boundaries, y_lim_min + 0.1, y_lim_min + 0.2, 'blue', 0.1,
+                                           label='feedback'))
+        for feedback in feedback_boundaries:
+            feedback_length = feedback[1] - feedback[0]
+            ax1.text(feedback[0] + feedback_length / 2, y_lim_min + 0.15, f'{feedback[2]}', va='center', ha='center',
+                     fontweight='bold')
+
+    return motor_noise_handles
+
+
+def plot_experiment(data, path, critical_angle=CRITICAL_ANGLE, formats=('png',), dpi=FIGURE_DPI, interactive=False):
+    """ Function to plot the error angles and the experimental conditions of a session and save the plot
+    as experiment.png (and/or .svg, .pdf) in the session folder.
+    The blocks of each experimental condition are drawn as one collection and, unless interactive, the figure is
+    created without pyplot, so it is rendered by Agg without any display and doesn't have to be closed.
+    Args:
+        data: The data read from experimental_data.csv
+        path: The directory path of the session
+        critical_angle: The critical angle in degrees of the outliers, which are not plotted
+        formats: The file formats of the saved plot, see FIGURE_FORMATS
+        dpi: The resolution of the raster formats in dots per inch
+        interactive: True to create the figure with pyplot, so it can be shown with plt.show()
+    Returns:
+        fig: The matplotlib figure
+    """
 
-            end_idx = filtered_attempts[end_idx_attempts[i]]
-            boundaries[i, 0] = start_idx
-            boundaries[i, 1] = end_idx  # Adjust end index to include the attempt in the sequence
-            boundaries[i, 2] = filtered_values[start_idx_attempts[i]]
+    data = typed_data(data)  # mode columns as categoricals
+    data, _ = remove_outliers(data, critical_angle)  # remove outliers
+    error_angles = data['error_angle']  # error angles values
+    timeline = data['attempts'].values  # attempts values
+
+    # blocks of all experimental conditions
+    boundaries = regime_boundaries(data)
+
+    # plot figure
+    fig = plt.figure(figsize=FIGURE_SIZE) if interactive else Figure(figsize=FIGURE_SIZE)
+    ax1 = fig.subplots()
+
+    # figure specs
+    y_lim_max = float("{:.1f}".format((max(np.max(error_angles), np.abs(np.min(error_angles))) + 0.1)))
+    y_lim_min = -y_lim_max
+    y_length = y_lim_max - y_lim_min
+    ax1.set_ylim(y_lim_min, y_lim_max)
+
+    # plot secondary y-axis for total perturbation
+    if not np.all(data['total_perturbation'].values == 0):
+        ax2 = ax1.twinx()
+        ax2.plot(timeline, data['total_perturbation'], 'r-', alpha=0.2, label='total perturbation')
+        y_ax2_min = np.min(data['total_perturbation'].values)
+        y_ax2_max = np.max(data['total_perturbation'].values)
+        ratio = y_length / (y_ax2_max - y_ax2_min) * 0.5
+        ax2.set_ylim(min(y_lim_min * ratio, -0.6), max(y_lim_max * ratio, 0.6))
+        ax2.set_yticks([-0.5, -0.25, 0, 0.25, 0.5])
+        ax2.set_ylabel('Total perturbation (rad)')
     else:
-        # If no differences in attempts, potentially handle changes of values in specified column
-
-        start_idx_values = np.where(difference_in_values != 0)[0] + 1
-        start_idx_values = np.insert(start_idx_values, 0, 0)  # Include the first sequence start
-        end_idx_values = np.where(difference_in_values != 0)[0]
-        end_idx_values = np.append(end_idx_values, len(filtered_values) - 1)  # Include the last sequence end
-        boundaries = np.zeros((len(start_idx_values), 3), dtype=object)
-
-        for i in range(len(start_idx_values)):
-            start_idx = filtered_attempts[start_idx_values[i]] - 1
-            end_idx = filtered_attempts[end_idx_values[i]]
-            boundaries[i, 0] = start_idx
-            boundaries[i, 1] = end_idx  # Adjust end index to include the attempt in the sequence
-            boundaries[i, 2] = filtered_values[start_idx_values[i]]
-    return boundaries
-
-
-data, path = read_data(filepath)  # read data
-data, _ = remove_outliers(data, 100)  # remove outliers
-data = convert_perurbation_mode(data)  # convert perturbation mode to numerical values
-data = convert_feedback_mode(data)  # convert feedback mode to numerical values
-error_angles = data['error_angle']  # error angles values
-timeline = data['attempts'].values  # attempts values
-
-# plot figure
-fig, ax1 = plt.subplots(figsize=(20, 7.5))
-
-# figure specs
-y_lim_max = float("{:.1f}".format((max(np.max(error_angles), np.abs(np.min(error_angles))) + 0.1)))
-y_lim_min = -y_lim_max
-x_length = len(timeline)
-y_length = y_lim_max - y_lim_min
-ax = plt.gca()
-ax1.set_ylim(y_lim_min, y_lim_max)
-
-# plot secondary y-axis for total perturbation
-if not np.all(data['total_perturbation'].values == 0):
-    ax2 = ax.twinx()
-    ax2.plot(timeline, data['total_perturbation'], 'r-', alpha=0.2, label='total perturbation')
-    y_ax2_min = np.min(data['total_perturbation'].values)
-    y_ax2_max = np.max(data['total_perturbation'].values)
-    ratio = y_length / (y_ax2_max - y_ax2_min) * 0.5
-    ax2.set_ylim(min(y_lim_min * ratio, -0.6), max(y_lim_max * ratio, 0.6))
-    ax2.set_yticks([-0.5, -0.25, 0, 0.25, 0.5])
-    ax2.set_ylabel('Total perturbation (rad)')
-else:
-    ax2 = None
-# plot error angles
-plot_error_angles()
-
-# plot perturbation regimes
-if not np.all(data['perturbation_mode'].values == 0):
-    perturbation_boundaries = mode_boundaries('perturbation_mode')
-    perturbation_boundaries[perturbation_boundaries[:, 2] == 1, 2] = 'sudden'
-    perturbation_boundaries[perturbation_boundaries[:, 2] == 2, 2] = 'gradual'
-    perturbation_boundaries[perturbation_boundaries[:, 2] == 3, 2] = 'random'
-
-    for i, perturbation in enumerate(perturbation_boundaries):
-        perturbation_length = perturbation[1] - perturbation[0]
-        ax1.fill_betweenx(ax1.get_ylim(), perturbation[0], perturbation[1], color='orange', alpha=0.15)
-        ax1.text(perturbation[0] + perturbation_length / 2, y_lim_max - 0.2, f'{perturbation[2]}\n perturbation',
-                 ha='center', va='center', alpha=0.75, color='orange', fontweight='bold')
-
-# plot motor noise regimes
-if not np.all(data['motor_noise'].values == 0):
-    motor_noise_boundaries = mode_boundaries('motor_noise')
-
-    for i, motor_noise in enumerate(motor_noise_boundaries):
-        motor_length = motor_noise[1] - motor_noise[0]
-
-        ax1.fill_betweenx((y_lim_min, y_lim_min + 0.1), motor_noise[0], motor_noise[1], color='red',
-                          alpha=0.1 + motor_noise[2] / 25, label=f'motor noise: {motor_noise[2]}')
-        ax1.text(motor_noise[0] + motor_length / 2, y_lim_min + 0.05, f'{motor_noise[2]}', va='center', ha='center',
-                 fontweight='bold')
-
-# plot target angle changes
-sequence_target_boundaries = mode_boundaries('sequence_target')
-for i, target in enumerate(sequence_target_boundaries):
-    ax1.vlines(target[0], color='green', linestyle='-', linewidth=2, label='target angle\nchange' if i == 0 else '',
-               ymin=y_lim_max - 0.1, ymax=y_lim_max)
-    ax1.text(target[0], y_lim_max - 0.05, f'  {target[2]}°', va='center', ha='left',
-             fontweight='bold', color='green')
-    # ax1.arrow(target[0], y_lim_max - 0.1, x_length / 100, 0, linewidth=2, head_width=y_length / 50,
-    #          head_length=x_length / 100, fc='green',
-    #          ec='green')
-
-# plot feedback regimes
-if not np.all(data['feedback'].values == 0):
-    feedback_boundaries = mode_boundaries('feedback')
-    feedback_boundaries[feedback_boundaries[:, 2] == 1, 2] = 'trajectory'
-    feedback_boundaries[feedback_boundaries[:, 2] == 2, 2] = 'end_pos'
-    feedback_boundaries[feedback_boundaries[:, 2] == 3, 2] = 'reinforcement'
-
-    for i, feedback in enumerate(feedback_boundaries):
-        feedback_length = feedback[1] - feedback[0]
-
-        ax1.fill_betweenx((y_lim_min + 0.1, y_lim_min + 0.2), feedback[0], feedback[1], color='blue',
-                          alpha=0.1, label='feedback' if i == 0 else '')
-        ax1.text(feedback[0] + feedback_length / 2, y_lim_min + 0.15, f'{feedback[2]}', va='center', ha='center',
-                 fontweight='bold')
-
-plt.xlabel('Attempts')
-ax1.set_ylabel('Error angles (rad)')
-
-# plot 0 line
-ax1.axhline(0, color='black', linewidth=0.7)
-
-# combine and print legend
-handles_1, labels_1 = ax1.get_legend_handles_labels()
-if ax2:
-    handles_2, labels_2 = ax2.get_legend_handles_labels()
-    handles = handles_1 + handles_2
-    labels = labels_1 + labels_2
-else:
-    handles = handles_1
-    labels = labels_1
-ax1.legend(handles, labels, loc='center left', bbox_to_anchor=(1.05, 0.5))
-plt.subplots_adjust(right=0.85, left=0.05)
-subject_id = subject_id(path)
-script_name = script_name(path)
-plt.title(f'Error angles and experimental conditions for subject {subject_id} in the {script_name} experiment')
-plt.savefig(f'{path}/experiment.png')  # Save the plot
-plt.show()
+        ax2 = None
+    # plot error angles
+    plot_error_angles(ax1, timeline, error_angles)
+
+    # plot the experimental conditions
+    motor_noise_handles = plot_regimes(ax1, boundaries, y_lim_min, y_lim_max)
+
+    ax1.autoscale_view()  # x limits including the collections
+    ax1.set_xlabel('Attempts')
+    ax1.set_ylabel('Error angles (rad)')
+
+    # plot 0 line
+    ax1.axhline(0, color='black', linewidth=0.7)
+
+    # combine and print legend
+    handles_1, labels_1 = ax1.get_legend_handles_labels()
+    handles = handles_1 + motor_noise_handles
+    labels = labels_1 + [handle.get_label() for handle in motor_noise_handles]
+    if ax2:
+        handles_2, labels_2 = ax2.get_legend_handles_labels()
+        handles += handles_2
+        labels += labels_2
+    ax1.legend(handles, labels, loc='center left', bbox_to_anchor=(1.05, 0.5))
+    fig.subplots_adjust(right=0.85, left=0.05)
+    ax1.set_title(f'Error angles and experimental conditions for subject {subject_id(path)} in the {script_name(path)} '
+                  f'experiment')
+    save_figure(fig, path, formats, dpi)  # Save the plot
+    return fig
+
+
+def session_summary(data, critical_angle=CRITICAL_ANGLE):
+    """ Function to summarize the error angles of a session per block of constant experimental conditions.
+    The blocks are found by block_starts(), like the blocks of adaptation_metrics.block_metrics().
+    Args:
+        data: The data read from experimental_data.csv
+        critical_angle: The critical angle in degrees of the outliers, which are counted but not summarized
+    Returns:
+        summary: DataFrame with one row per block: start and end attempts, experimental conditions, number of
+        attempts, number of outliers, mean, std. dev., mean absolute, initial (first 5 attempts) and final
+        (last 5 attempts) error angles in radians
+    """
+    data = data.reset_index(drop=True)
+    # same blocks as adaptation_metrics.block_metrics (metrics.csv)
+    block_start, _ = block_starts(data, CONDITION_COLUMNS)
+    block = pd.Series(np.cumsum(block_start.any(axis=0)) - 1)
+    outlier = np.abs(data['error_angle']) >= np.radians(critical_angle)
+
+    summary = data.groupby(block).agg(start=('attempts', 'first'), end=('attempts', 'last'),
+                                      **{column: (column, 'first') for column in CONDITION_COLUMNS},
+                                      attempts=('attempts', 'size'))
+    summary['outliers'] = outlier.groupby(block).sum()
+
+    valid = data['error_angle'][~outlier]
+    valid_block = block[~outlier]
+    grouped = valid.groupby(valid_block)
+    summary['mean_error'] = grouped.mean()
+    summary['std_error'] = grouped.std()
+    summary['mean_abs_error'] = valid.abs().groupby(valid_block).mean()
+    from_start = grouped.cumcount()
+    from_end = grouped.cumcount(ascending=False)
+    summary['initial_error'] = valid[from_start < 5].groupby(valid_block[from_start < 5]).mean()
+    summary['final_error'] = valid[from_end < 5].groupby(valid_block[from_end < 5]).mean()
+    return summary.reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    from tkinter import Tk
+
+    import GUI
+
+    # Create a dialog window asking for the path to the csv file
+    dialog_window = Tk()
+    filepath = GUI.reader_menu(dialog_window)
+    print(filepath)
+
+    # Update this to your actual file path
+    # filepath = '/Users/a1/Desktop/exp_data/motor_noise_test/motor_noise_test_2024_03_18_16_31_58/motor_noise/experimental_data.csv'
+
+    data, path = read_data(filepath)  # read data
+    plot_experiment(data, path, interactive=True)
+    plt.show()
@@ -0,0 +1,168 @@
+"""
+Per-block adaptation metrics of the reaching game data.
+The attempts of a session are divided into blocks of constant experimental conditions (perturbation, feedback,
+motor noise and target angle, see Reader_module.block_starts). For every block the metrics of the error angles are
+computed in one vectorized pass over all blocks (grouped sums with np.bincount), so the data of a whole cohort
+(concatenated sessions identified by the 'by' columns) is processed at once. The result is a tidy table with one row
+per session and block, see METRIC_COLUMNS.
+Outliers (error angles above the critical angle) are counted but excluded from the error metrics, all attempts are
+included in the hit rate, which is taken from the outcome scored by the game (the 'outcome' column): a fast reach can
+pass the target without a hit even with a small error angle.
+"""
+
+import numpy as np
+import pandas as pd
+
+from Reader_module import CONDITION_COLUMNS, block_starts
+from defaults import CRITICAL_ANGLE
+from session_output import OFF_VALUES, typed_data
+
+EARLY_ATTEMPTS = 5  # attempts at the start of a block for the early error
+LATE_ATTEMPTS = 5  # attempts at the end of a block for the late error
+MIN_ABS_ERROR = 1e-3  # radians, floor of the absolute error in the logarithmic fit of the adaptation rate
+
+METRIC_COLUMNS = (
+    'block',  # index of the block in the session
+    'start',  # first attempt of the block
+    'end',  # last attempt of the block
+    *CONDITION_COLUMNS,  # experimental conditions of the block
+    'attempts',  # number of attempts of the block
+    'outliers',  # number of attempts with an error angle above the critical angle
+    'circular_mean',  # circular mean of the error angles (radians)
+    'circular_variance',  # circular variance of the error angles, 1 - mean resultant length, between 0 and 1
+    'early_error',  # mean error angle of the first EARLY_ATTEMPTS attempts (radians)
+    'late_error',  # mean error angle of the last LATE_ATTEMPTS attempts (radians)
+    'adaptation_rate',  # exponential decay rate of the absolute error per attempt, positive if the error decreases
+    'aftereffect',  # early error of a block after a perturbation minus the baseline late error, NaN for other blocks
+    'hit_rate',  # fraction of the attempts scored as hits by the game, NaN without the outcome column
+)
+
+
+def grouped_sum(groups, values, blocks):
+    """ Function to sum values per block.
+    Args:
+        groups: array of int, block index of every value
+        values: array of float, the values (None to count the values)
+        blocks: int, number of blocks
+    Returns:
+        sums: array of float, one sum per block
+    """
+    return np.bincount(groups, weights=values, minlength=blocks)
+
+
+def grouped_mean(groups, values, blocks):
+    """ Function to average values per block.
+    Args:
+        groups: array of int, block index of every value
+        values: array of float, the values
+        blocks: int, number of blocks
+    Returns:
+        means: array of float, one mean per block, NaN for blocks without values
+    """
+    counts = grouped_sum(groups, None, blocks)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return grouped_sum(groups, values, blocks) / counts
+
+
+def block_positions(groups, blocks):
+    """ Function to number the values of every block from its start and from its end.
+    Args:
+        groups: array of int, block index of every value, sorted
+        blocks: int, number of blocks
+    Returns:
+        from_start: array of int, 0 for the first value of a block
+        from_end: array of int, 0 for the last value of a block
+    """
+    counts = grouped_sum(groups, None, blocks).astype(np.int64)
+    first = np.cumsum(counts) - counts  # position of the first value of every block
+    from_start = np.arange(len(groups)) - first[groups]
+    from_end = counts[groups] - 1 - from_start
+    return from_start, from_end
+
+
+def adaptation_rates(groups, positions, errors, blocks):
+    """ Function to fit an exponential decay |error| = a * exp(-rate * attempt) to every block by least squares
+    on the logarithm of the absolute error, vectorized over all blocks.
+    Args:
+        groups: array of int, block index of every error
+        positions: array of int, attempt of every error counted from the start of its block
+        errors: array of float, error angles (radians)
+        blocks: int, number of blocks
+    Returns:
+        rates: array of float, decay rate per attempt of every block, NaN for blocks with less than 3 errors
+    """
+    log_errors = np.log(np.maximum(np.abs(errors), MIN_ABS_ERROR))
+    positions = positions.astype(float)
+    n = grouped_sum(groups, None, blocks)
+    sum_t = grouped_sum(groups, positions, blocks)
+    sum_y = grouped_sum(groups, log_errors, blocks)
+    sum_tt = grouped_sum(groups, positions ** 2, blocks)
+    sum_ty = grouped_sum(groups, positions * log_errors, blocks)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = (n * sum_ty - sum_t * sum_y) / (n * sum_tt - sum_t ** 2)
+    slopes[n < 3] = np.nan
+    return -slopes
+
+
+def block_metrics(data, by=None, critical_angle=CRITICAL_ANGLE, early=EARLY_ATTEMPTS, late=LATE_ATTEMPTS):
+    """ Function to compute the adaptation metrics of every block of constant experimental conditions.
+    Args:
+        data: The data, e.g. experimental_data.csv of one session or the concatenated data of a cohort
+        by: optional list of columns identifying the sessions in concatenated data, e.g. ['participant', 'session']
+        critical_angle: The critical angle in degrees of the outliers
+        early: Number of attempts at the start of a block for the early error
+        late: Number of attempts at the end of a block for the late error
+    Returns:
+        metrics: DataFrame with the 'by' columns and the METRIC_COLUMNS, one row per session and block
+    """
+    by = list(by or [])
+    data = typed_data(data).reset_index(drop=True)
+    block_start, new_session = block_starts(data, CONDITION_COLUMNS, by)
+    first_rows = np.flatnonzero(block_start.any(axis=0))
+    groups = np.cumsum(block_start.any(axis=0)) - 1  # block of every attempt
+    sessions = np.cumsum(new_session)[first_rows]  # session of every block
+    blocks = len(first_rows)
+
+    metrics = data.loc[first_rows, by].reset_index(drop=True)
+    metrics['block'] = pd.Series(first_rows).groupby(sessions).cumcount().to_numpy()
+    attempts = data['attempts'].to_numpy()
+    metrics['start'] = attempts[first_rows]
+    metrics['end'] = attempts[np.append(first_rows[1:] - 1, len(data) - 1)[:blocks]]
+    for column in CONDITION_COLUMNS:
+        metrics[column] = data[column].to_numpy()[first_rows]
+    metrics['attempts'] = grouped_sum(groups, None, blocks).astype(np.int64)
+
+    errors = data['error_angle'].to_numpy()
+    valid = np.abs(errors) < np.radians(critical_angle)
+    metrics['outliers'] = grouped_sum(groups[~valid], None, blocks).astype(np.int64)
+    valid_groups = groups[valid]
+    valid_errors = errors[valid]
+
+    # circular statistics of the error angles
+    mean_cos = grouped_mean(valid_groups, np.cos(valid_errors), blocks)
+    mean_sin = grouped_mean(valid_groups, np.sin(valid_errors), blocks)
+    metrics['circular_mean'] = np.arctan2(mean_sin, mean_cos)
+    metrics['circular_variance'] = 1 - np.hypot(mean_sin, mean_cos)
+
+    # early and late error
+    from_start, from_end = block_positions(valid_groups, blocks)
+    metrics['early_error'] = grouped_mean(valid_groups[from_start < early], valid_errors[from_start < early], blocks)
+    metrics['late_error'] = grouped_mean(valid_groups[from_end < late], valid_errors[from_end < late], blocks)
+    metrics['adaptation_rate'] = adaptation_rates(valid_groups, from_start, valid_errors, blocks)
+
+    # aftereffect: first unperturbed block after a perturbation, relative to the late error of the last unperturbed
+    # block before the perturbation (0 if the session starts with the perturbation)
+    perturbed = ~metrics['perturbation_mode'].isin(OFF_VALUES).to_numpy()
+    previous_perturbed = np.zeros(blocks, dtype=bool)
+    previous_perturbed[1:] = perturbed[:-1] & (sessions[1:] == sessions[:-1])
+    baseline = metrics['late_error'].where(~perturbed).groupby(sessions).shift().groupby(sessions).ffill()
+    aftereffect = metrics['early_error'] - baseline.fillna(0)
+    metrics['aftereffect'] = aftereffect.where(~perturbed & previous_perturbed)
+
+    if 'outcome' in data:  # attempts without outcome (e.g. recorded before it was saved) are not counted
+        scored = data['outcome'].notna().to_numpy()
+        hits = (data['outcome'][scored] == 'hit').to_numpy(dtype=float)
+        metrics['hit_rate'] = grouped_mean(groups[scored], hits, blocks)
+    else:  # simulated data
+        metrics['hit_rate'] = np.nan
+    return metrics[by + list(METRIC_COLUMNS)]
@@ -0,0 +1,121 @@
+"""
+Content-hash cache of the analysis results.
+The results of the analysis of a session (summary table, figures) depend only on the content of its data file
+and on the analysis parameters (e.g. the critical angle of the outliers). They are cached under a key made of
+the content hash of the data file read by the analysis (see session_output.data_file) and the parameters, so a
+session is analysed again only if its data or the parameters changed.
+Every cache entry is a folder {cache directory}/{key}/ with the tables (pickled DataFrames, dtypes are kept) and
+the files (figures) of the analysis. A hit updates the modification time of the entry, the least recently used
+entries are evicted when the total size of the cache exceeds its limit.
+The cache is a dictionary created by open_cache().
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+CACHE_NAME = '.analysis_cache'  # hidden folder, ignored by the session catalog
+MAX_BYTES = 500 * 2 ** 20
+ANALYSIS_VERSION = 3  # increase when the analysis changes, so the old results are not used anymore
+
+
+def open_cache(directory, max_bytes=MAX_BYTES):
+    """ Function to open a cache, the folder is created if it doesn't exist
+    Args:
+        directory: str, folder of the cache
+        max_bytes: int, size limit of the cache, the least recently used entries are evicted above it
+    Returns:
+        cache: dict with the folder and the size limit of the cache
+    """
+    os.makedirs(directory, exist_ok=True)
+    return {'directory': directory, 'max_bytes': max_bytes}
+
+
+def cache_key(content_hash, parameters):
+    """ Function to calculate the key of the results of an analysis
+    Args:
+        content_hash: str, content hash of the data file
+        parameters: dict, parameters of the analysis, JSON serializable
+    Returns:
+        key: str, hexadecimal sha256 hash
+    """
+    description = json.dumps({'content_hash': content_hash, 'parameters': parameters, 'version': ANALYSIS_VERSION},
+                             sort_keys=True)
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def load(cache, key):
+    """ Function to load the results of an analysis from the cache
+    Args:
+        cache: dict, the cache
+        key: str, key of the results (see cache_key())
+    Returns:
+        entry: dict with the tables {name: DataFrame} and the paths of the files {name: path},
+        or None if the results are not in the cache
+    """
+    directory = os.path.join(cache['directory'], key)
+    try:
+        names = os.listdir(directory)
+        os.utime(directory)  # most recently used
+        tables = {name[:-len('.pkl')]: pd.read_pickle(os.path.join(directory, name))
+                  for name in names if name.endswith('.pkl')}
+    except FileNotFoundError:  # not in the cache or evicted meanwhile
+        return None
+    files = {name: os.path.join(directory, name) for name in names if not name.endswith('.pkl')}
+    return {'tables': tables, 'files': files}
+
+
+def store(cache, key, tables=None, files=None):
+    """ Function to store the results of an analysis in the cache, the entry is written to a temporary folder
+    and renamed, so a process reading the cache never sees an incomplete entry
+    Args:
+        cache: dict, the cache
+        key: str, key of the results (see cache_key())
+        tables: dict, optional, {name: DataFrame} derived tables
+        files: dict, optional, {name: path} files to copy to the cache, e.g. {'experiment.png': ...}
+    """
+    directory = os.path.join(cache['directory'], key)
+    temporary = tempfile.mkdtemp(prefix='.tmp_', dir=cache['directory'])
+    for name, table in (tables or {}).items():
+        table.to_pickle(os.path.join(temporary, f'{name}.pkl'))
+    for name, file_path in (files or {}).items():
+        shutil.copyfile(file_path, os.path.join(temporary, name))
+    try:
+        os.rename(temporary, directory)
+    except OSError:  # stored meanwhile by another process
+        shutil.rmtree(temporary, ignore_errors=True)
+
+
+def entry_size(directory):
+    """ Function to calculate the size of a cache entry
+    Args:
+        directory: str, folder of the entry
+    Returns:
+        size: int, bytes
+    """
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+def evict(cache):
+    """ Function to remove the least recently used entries until the cache is below its size limit
+    Should not run while other processes use the cache.
+    Args:
+        cache: dict, the cache
+    Returns:
+        removed: int, number of removed entries
+    """
+    entries = [(entry.stat().st_mtime, entry_size(entry.path), entry.path)
+               for entry in os.scandir(cache['directory']) if entry.is_dir()]
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= cache['max_bytes']:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,156 @@
+"""
+Batch analysis of a whole experiment root folder.
+Reaching game.py saves every session as {root}/{participant}/{participant}_{time}/{script}/experimental_data.csv
+(sessions in test mode in an additional test/ folder). This module finds all sessions of the root folder and
+processes them in parallel in a process pool, one session per process, without opening any dialog:
+    experiment.png: plot of the error angles and the experimental conditions (see Reader_module.plot_experiment),
+        optionally also as experiment.svg and experiment.pdf, rendered by Agg without any display
+    summary.csv: error angles per block of constant experimental conditions (see Reader_module.session_summary)
+    metrics.csv: adaptation metrics per block (see adaptation_metrics.block_metrics)
+The tables of all sessions are collected in {root}/batch_summary.csv and {root}/batch_metrics.csv with the
+participant, session and script.
+The sessions are found with the session catalog (session_catalog.py), which is updated first, and the results are
+cached by the content hash of the data and the analysis parameters ({root}/.analysis_cache, see analysis_cache.py):
+a session is analysed again only if its data or the parameters changed.
+Usage:
+    python batch_analysis.py {root} [--workers N] [--include-test] [--critical-angle DEG] [--formats png svg pdf]
+                             [--dpi DPI] [--no-cache]
+"""
+
+import argparse
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import Reader_module
+import adaptation_metrics
+import analysis_cache
+import session_catalog
+import session_output
+from defaults import CRITICAL_ANGLE
+
+TABLE_NAMES = ('summary', 'metrics')  # tables of a session, saved as {name}.csv, collected in batch_{name}.csv
+
+
+def analyse_session(file_path, content_hash=None, critical_angle=CRITICAL_ANGLE, formats=('png',),
+                    dpi=Reader_module.FIGURE_DPI, cache_directory=None):
+    """ Function to plot, summarize and compute the metrics of one session, the results are saved in the session folder
+    If a cache is given, the results are taken from the cache if the data and the parameters didn't change and
+    copied to the session folder, so its files always match the parameters of the last analysis.
+    Args:
+        file_path: str, path to experimental_data.csv of the session
+        content_hash: str, optional, content hash of the data file read by the analysis, calculated if it's not given
+        critical_angle: float, critical angle in degrees of the outliers
+        formats: tuple of str, file formats of the figure, see Reader_module.FIGURE_FORMATS
+        dpi: float, resolution of the raster formats in dots per inch
+        cache_directory: str, optional, folder of the analysis cache
+    Returns:
+        tables: dict {name: DataFrame} of the TABLE_NAMES, with the participant, session and script columns
+    """
+    path = os.path.dirname(file_path)
+    figure_names = [f'experiment.{figure_format}' for figure_format in formats]
+
+    entry = None
+    if cache_directory:
+        cache = analysis_cache.open_cache(cache_directory)
+        # the title of the figure shows the subject and the script taken from the path
+        key = analysis_cache.cache_key(content_hash or session_catalog.file_hash(session_output.data_file(file_path)),
+                                       {'critical_angle': critical_angle, 'formats': list(formats), 'dpi': dpi,
+                                        'title': [Reader_module.subject_id(path), Reader_module.script_name(path)]})
+        entry = analysis_cache.load(cache, key)
+
+    if entry:
+        tables = entry['tables']
+        # the session files may come from a run with other parameters, they are replaced by the cached results
+        for name, table in tables.items():
+            table.to_csv(os.path.join(path, f'{name}.csv'), index=False)
+        for name in figure_names:
+            shutil.copyfile(entry['files'][name], os.path.join(path, name))
+    else:
+        data, path = Reader_module.read_data(file_path)
+        tables = {'summary': Reader_module.session_summary(data, critical_angle),
+                  'metrics': adaptation_metrics.block_metrics(data, critical_angle=critical_angle)}
+        for name, table in tables.items():
+            table.to_csv(os.path.join(path, f'{name}.csv'), index=False)
+
+        Reader_module.plot_experiment(data, path, critical_angle, formats, dpi)
+        if cache_directory:
+            analysis_cache.store(cache, key, tables=tables,
+                                 files={name: os.path.join(path, name) for name in figure_names})
+
+    # {root}/{participant}/{participant}_{time}/{script}[/test]
+    parts = os.path.normpath(path).split(os.sep)
+    if parts[-1] == 'test':
+        parts = parts[:-1]
+    participant, session, script = parts[-3:]
+    for name in TABLE_NAMES:
+        tables[name] = tables[name].copy()
+        tables[name].insert(0, 'script', script)
+        tables[name].insert(0, 'session', session)
+        tables[name].insert(0, 'participant', participant)
+    return tables
+
+
+def run_batch(file_saving_root, workers=None, include_test=False, critical_angle=CRITICAL_ANGLE, formats=('png',),
+              dpi=Reader_module.FIGURE_DPI, use_cache=True):
+    """ Function to analyse all sessions of an experiment root folder in parallel
+    A session which fails is reported and skipped, the other sessions are still analysed.
+    Args:
+        file_saving_root: str, root folder of the experiment
+        workers: int, optional, number of processes, by default the number of CPUs
+        include_test: bool, True to include the sessions run in test mode
+        critical_angle: float, critical angle in degrees of the outliers
+        formats: tuple of str, file formats of the figures, see Reader_module.FIGURE_FORMATS
+        dpi: float, resolution of the raster formats in dots per inch
+        use_cache: bool, True to take the results of the unchanged sessions from the analysis cache
+    Returns:
+        tables: dict {name: DataFrame} of the TABLE_NAMES of all sessions, also saved as {root}/batch_{name}.csv
+    """
+    session_catalog.update_catalog(file_saving_root)
+    sessions = session_catalog.find_sessions(file_saving_root, test_mode=None if include_test else False)
+    sessions = sessions[sessions['csv_path'].notna()]
+    print(f'{len(sessions)} sessions found in {file_saving_root}')
+
+    cache_directory = os.path.join(file_saving_root, analysis_cache.CACHE_NAME) if use_cache else None
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(analyse_session, os.path.join(file_saving_root, csv_path), content_hash,
+                                   critical_angle, tuple(formats), dpi, cache_directory): csv_path
+                   for csv_path, content_hash in zip(sessions['csv_path'], sessions['content_hash'])}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as error:
+                print(f'failed: {futures[future]}: {error!r}')
+    if use_cache:
+        analysis_cache.evict(analysis_cache.open_cache(cache_directory))
+
+    if not results:
+        return {name: pd.DataFrame() for name in TABLE_NAMES}
+    tables = {}
+    for name in TABLE_NAMES:
+        tables[name] = pd.concat([result[name] for result in results], ignore_index=True).sort_values(
+            ['participant', 'session', 'script', 'start'], ignore_index=True)
+        tables[name].to_csv(os.path.join(file_saving_root, f'batch_{name}.csv'), index=False)
+    print(f'{len(results)} sessions analysed')
+    return tables
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plot, summarize and compute the metrics of all sessions of an '
+                                                 'experiment root folder')
+    parser.add_argument('root', help='root folder of the experiment')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: number of CPUs)')
+    parser.add_argument('--include-test', action='store_true', help='include the sessions run in test mode')
+    parser.add_argument('--critical-angle', type=float, default=CRITICAL_ANGLE,
+                        help='critical angle in degrees of the outliers')
+    parser.add_argument('--formats', nargs='+', default=['png'], choices=Reader_module.FIGURE_FORMATS,
+                        help='file formats of the figures (default: png)')
+    parser.add_argument('--dpi', type=float, default=Reader_module.FIGURE_DPI,
+                        help='resolution of the raster figures in dots per inch')
+    parser.add_argument('--no-cache', action='store_true', help='analyse all sessions again')
+    arguments = parser.parse_args()
+    run_batch(arguments.root, arguments.workers, arguments.include_test, arguments.critical_angle, arguments.formats,
+              arguments.dpi, not arguments.no_cache)
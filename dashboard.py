@@ -0,0 +1,350 @@
+"""
+Live dashboard of a session for the experimenter, served by a separate process on a local port.
+The game loop sends its records as JSON lines over a non-blocking pipe to the dashboard process (this module run with
+--serve, started with a low priority):
+    {"type": "attempt", "outcome": ..., "score": ..., ...}: data row of every finished attempt
+    {"type": "frames", "frames": ..., "mean_ms": ..., "max_ms": ..., "missed": ..., "state": {...}}: frame telemetry,
+        sent TELEMETRY_RATE times per second: frame times since the last telemetry, missed deadlines of the session
+        and the game state shown as debug text in test mode (mouse angle, perturbation, cursor and target position)
+The records are compact JSON with rounded floats, so they are shorter than 512 bytes (the smallest PIPE_BUF allowed
+by POSIX, the one of macOS) and a record is written to the pipe at once or not at all: if the pipe is full
+(the dashboard can't keep up) or the dashboard process stopped, the record is dropped and counted instead of blocking
+the game. With the dashboard, the debug text of the test mode is not drawn on the participant display.
+The dashboard process serves a page on http://localhost:{port} with a rolling plot of the error angles, the current
+regime (perturbation, motor noise, feedback and target angle), the hit rate and the frame-time health, updated from
+{port}/state.json every POLL_MS milliseconds. At the end of the session the page is still served for LINGER seconds,
+so it shows the finished session, the game doesn't wait for the dashboard process.
+The dashboard is a dictionary created by new_dashboard().
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from defaults import DASHBOARD_PORT
+
+TELEMETRY_RATE = 4  # frame telemetry records per second
+HISTORY = 300  # attempts in the rolling plot
+HIT_WINDOW = 20  # attempts of the recent hit rate
+POLL_MS = 500  # update period of the page
+FRAME_PERIOD_MS = 1000 / 60  # deadline of a frame
+MAX_RECORD = 512  # bytes, PIPE_BUF of macOS (POSIX minimum), larger writes to a non-blocking pipe may be partial
+DIGITS = 4  # decimals of the floats in the records (radians in the attempt records)
+FRAME_DIGITS = 2  # decimals of the floats in the frame telemetry (ms, degrees)
+LINGER = 3  # seconds the page is served after the end of the session
+REGIME_COLUMNS = ('perturbation_mode', 'total_perturbation', 'motor_noise', 'feedback', 'sequence_target',
+                  'MASK_RADIUS')
+STATE_VARIABLES = ('attempts', 'score', 'mouse_angle', 'total_perturbation', 'gradual_step', 'gradual_attempts',
+                   'perturbation_angle', 'motor_noise_perturbation', 'error_angle', 'circle_pos', 'target')
+ANGLE_VARIABLES = ('mouse_angle', 'total_perturbation', 'error_angle')  # radians, shown in degrees
+POSITION_VARIABLES = ('circle_pos', 'target')  # pixels
+
+
+def compact(value, digits=DIGITS):
+    """ Function to convert the values of a record to short JSON values: numpy scalars and arrays to python scalars and
+    lists, floats rounded
+    Args:
+        value: value of a record, lists, tuples, arrays and dicts are converted recursively
+        digits: int, decimals of the floats
+    Returns:
+        value: the converted value
+    """
+    if hasattr(value, 'tolist'):  # numpy scalar or array
+        value = value.tolist()
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {key: compact(item, digits) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [compact(item, digits) for item in value]
+    return value
+
+
+def new_dashboard(port=DASHBOARD_PORT, rate=TELEMETRY_RATE):
+    """ Function to start the dashboard process
+    Args:
+        port: int, local port of the dashboard page
+        rate: float, frame telemetry records per second
+    Returns:
+        dashboard: dict, the dashboard
+    """
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', str(port)],
+                               stdin=subprocess.PIPE)
+    os.set_blocking(process.stdin.fileno(), False)
+    print(f'dashboard: http://localhost:{port}')
+    return {'process': process, 'period': int(1_000_000_000 / rate), 'next_telemetry': 0, 'frames': 0,
+            'frame_sum': 0, 'frame_max': 0, 'sent': 0, 'dropped': 0}
+
+
+def send(dashboard, record):
+    """ Function to send a record to the dashboard process, never blocks
+    Args:
+        dashboard: dict, the dashboard
+        record: dict, the record
+    Returns:
+        sent: bool, False if the record was dropped
+    """
+    line = (json.dumps(compact(record), separators=(',', ':')) + '\n').encode()
+    if len(line) > MAX_RECORD:
+        dashboard['dropped'] += 1
+        return False
+    try:
+        os.write(dashboard['process'].stdin.fileno(), line)
+    except (BlockingIOError, BrokenPipeError):  # the pipe is full or the dashboard stopped
+        dashboard['dropped'] += 1
+        return False
+    dashboard['sent'] += 1
+    return True
+
+
+def send_attempt(dashboard, session, outcome):
+    """ Function to send the last attempt written by write_data() to the dashboard
+    Args:
+        dashboard: dict, the dashboard
+        session: dict, the game session
+        outcome: str, outcome of the attempt ('hit', 'miss' or 'near_miss')
+    """
+    send(dashboard, {'type': 'attempt', 'outcome': outcome, 'score': session['dynamic_variables']['score'],
+                     **{key: values[-1] for key, values in session['data'].items()}})
+
+
+def send_frame(dashboard, timer, session):
+    """ Function to count the last frame timed by the frame timer and send the frame telemetry if it's due
+    Args:
+        dashboard: dict, the dashboard
+        timer: dict, the frame timer, after frame_timing.end_frame()
+        session: dict, the game session
+    """
+    dashboard['frames'] += 1
+    dashboard['frame_sum'] += timer['last_frame']
+    dashboard['frame_max'] = max(dashboard['frame_max'], timer['last_frame'])
+    now = time.perf_counter_ns()
+    if now < dashboard['next_telemetry']:
+        return
+    dashboard['next_telemetry'] = now + dashboard['period']
+
+    dynamic_variables = session['dynamic_variables']
+    state = {key: dynamic_variables[key] for key in STATE_VARIABLES}
+    for key in ANGLE_VARIABLES:
+        state[key] = math.degrees(state[key])
+    for key in POSITION_VARIABLES:  # whole pixels
+        if state[key] is not None:
+            state[key] = [round(float(coordinate)) for coordinate in state[key]]
+    state['perturbation_mode'] = session['parameters']['perturbation_mode']
+    state['sequence_target'] = session['parameters']['sequence_target']
+    send(dashboard, compact({'type': 'frames', 'frames': dashboard['frames'],
+                             'mean_ms': dashboard['frame_sum'] / dashboard['frames'] / 1e6,
+                             'max_ms': dashboard['frame_max'] / 1e6, 'total_frames': timer['frames'],
+                             'missed': len(timer['missed_frames']), 'state': state}, FRAME_DIGITS))
+    dashboard['frames'] = dashboard['frame_sum'] = dashboard['frame_max'] = 0
+
+
+def close_dashboard(dashboard):
+    """ Function to end the session on the dashboard, the dashboard process stops by itself LINGER seconds later
+    Args:
+        dashboard: dict, the dashboard
+    Returns:
+        sent, dropped: int, number of sent and dropped records
+    """
+    try:
+        dashboard['process'].stdin.close()  # end of the session
+    except BrokenPipeError:
+        pass
+    return dashboard['sent'], dashboard['dropped']
+
+
+### DASHBOARD PROCESS ###
+
+def finite(value):
+    """ Function to replace NaN and infinite values, which are not valid JSON for the page, by None
+    Args:
+        value: value of a record, scalars, lists and dicts are converted recursively
+    Returns:
+        value: the value with None instead of the non-finite floats
+    """
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: finite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [finite(item) for item in value]
+    return value
+
+
+def new_state():
+    """ Function to create the state of the dashboard process
+    Returns:
+        state: dict with the recent attempts, the hit counts, the regime, the frame telemetry and the game state
+    """
+    return {'attempts': collections.deque(maxlen=HISTORY), 'recent': collections.deque(maxlen=HIT_WINDOW),
+            'count': 0, 'hits': 0, 'regime': {}, 'frames': {}, 'state': {}, 'running': True,
+            'lock': threading.Lock()}
+
+
+def update_state(state, record):
+    """ Function to update the state of the dashboard with a record of the game
+    Args:
+        state: dict, the state of the dashboard process
+        record: dict, attempt or frames record
+    """
+    record = finite(record)
+    with state['lock']:
+        if record['type'] == 'attempt':
+            hit = record['outcome'] == 'hit'
+            error_angle = record['error_angle']
+            state['attempts'].append([record['attempts'], None if error_angle is None else math.degrees(error_angle),
+                                      record['outcome']])
+            state['recent'].append(hit)
+            state['count'] += 1
+            state['hits'] += hit
+            state['regime'] = {key: record.get(key) for key in REGIME_COLUMNS}
+            state['regime']['total_perturbation'] = math.degrees(state['regime']['total_perturbation'] or 0)
+            state['regime']['score'] = record['score']
+        elif record['type'] == 'frames':
+            state['state'] = record.pop('state')
+            state['frames'] = record
+
+
+def snapshot(state):
+    """ Function to get the state of the dashboard for the page
+    Args:
+        state: dict, the state of the dashboard process
+    Returns:
+        snapshot: dict, JSON serializable
+    """
+    with state['lock']:
+        return {'attempts': list(state['attempts']),
+                'hit_rate': state['hits'] / state['count'] if state['count'] else None,
+                'recent_hit_rate': sum(state['recent']) / len(state['recent']) if state['recent'] else None,
+                'hit_window': HIT_WINDOW, 'count': state['count'], 'regime': state['regime'],
+                'frames': state['frames'], 'frame_period_ms': FRAME_PERIOD_MS, 'state': state['state'],
+                'running': state['running']}
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    """ Handler of the dashboard requests: the page (/) and its data (/state.json) """
+
+    def do_GET(self):
+        if self.path == '/state.json':
+            body, content_type = json.dumps(snapshot(self.server.state)).encode(), 'application/json'
+        elif self.path in ('/', '/index.html'):
+            body, content_type = PAGE.replace('{POLL_MS}', str(POLL_MS)).encode(), 'text/html; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # no log line per request
+
+
+def serve(port):
+    """ Function of the dashboard process: serves the page and updates the state with the records read from stdin
+    until the end of the session, then serves the finished session for LINGER seconds
+    Args:
+        port: int, local port of the dashboard page
+    """
+    if hasattr(os, 'nice'):
+        os.nice(10)  # the game process has the priority
+    server = ThreadingHTTPServer(('127.0.0.1', port), DashboardHandler)
+    server.state = new_state()
+    threading.Thread(target=server.serve_forever, name='dashboard server', daemon=True).start()
+
+    for line in sys.stdin.buffer:
+        try:
+            update_state(server.state, json.loads(line))
+        except (ValueError, KeyError, TypeError) as error:
+            print(f'dashboard: invalid record: {error!r}')
+    server.state['running'] = False
+    time.sleep(LINGER)  # the page polls the finished state
+    server.shutdown()
+    server.server_close()
+
+
+PAGE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Reaching game dashboard</title>
+<style>
+body {font-family: sans-serif; background: #111; color: #ddd; margin: 20px}
+.row {display: flex; gap: 20px; flex-wrap: wrap}
+.box {background: #1c1c1c; padding: 12px 16px; border-radius: 6px; min-width: 220px}
+h1 {font-size: 20px} h2 {font-size: 15px; color: #999; margin: 0 0 8px}
+td {padding: 1px 10px 1px 0} .bad {color: #f55} .good {color: #5d5}
+canvas {background: #1c1c1c; border-radius: 6px; width: 100%; height: 320px}
+</style></head>
+<body>
+<h1>Reaching game <span id="status"></span></h1>
+<canvas id="plot"></canvas>
+<div class="row">
+<div class="box"><h2>Regime</h2><table id="regime"></table></div>
+<div class="box"><h2>Hit rate</h2><table id="hits"></table></div>
+<div class="box"><h2>Frame time</h2><table id="frames"></table></div>
+<div class="box"><h2>Game state</h2><table id="state"></table></div>
+</div>
+<script>
+const colors = {hit: '#5d5', miss: '#f55', near_miss: '#fd5'};
+function format(value) {
+  if (typeof value === 'number') return Number.isInteger(value) ? value : value.toFixed(2);
+  if (Array.isArray(value)) return value.map(format).join(', ');
+  return value === null || value === undefined ? '-' : String(value);
+}
+function table(id, rows) {
+  document.getElementById(id).innerHTML = rows.map(([name, value, cls]) =>
+    `<tr><td>${name}</td><td class="${cls || ''}">${format(value)}</td></tr>`).join('');
+}
+function plot(attempts) {
+  const canvas = document.getElementById('plot'), ctx = canvas.getContext('2d');
+  canvas.width = canvas.clientWidth; canvas.height = canvas.clientHeight;
+  const w = canvas.width, h = canvas.height, pad = 40;
+  attempts = attempts.filter(a => a[1] !== null);
+  const limit = Math.max(10, ...attempts.map(a => Math.min(Math.abs(a[1]), 100)));
+  const first = attempts.length ? attempts[0][0] : 0, last = attempts.length ? attempts[attempts.length - 1][0] : 1;
+  const x = n => pad + (n - first) / Math.max(last - first, 1) * (w - 2 * pad);
+  const y = v => h / 2 - Math.max(-limit, Math.min(limit, v)) / limit * (h / 2 - pad / 2);
+  ctx.strokeStyle = '#555'; ctx.beginPath(); ctx.moveTo(pad, y(0)); ctx.lineTo(w - pad, y(0)); ctx.stroke();
+  ctx.fillStyle = '#999'; ctx.fillText(`${limit.toFixed(0)}°`, 5, y(limit) + 4);
+  ctx.fillText(`${(-limit).toFixed(0)}°`, 5, y(-limit)); ctx.fillText('error angle', pad, 12);
+  ctx.strokeStyle = '#48f'; ctx.beginPath();
+  attempts.forEach((a, i) => i ? ctx.lineTo(x(a[0]), y(a[1])) : ctx.moveTo(x(a[0]), y(a[1]))); ctx.stroke();
+  attempts.forEach(a => {ctx.fillStyle = colors[a[2]] || '#fff'; ctx.fillRect(x(a[0]) - 2, y(a[1]) - 2, 4, 4);});
+}
+async function update() {
+  try {
+    const s = await (await fetch('state.json')).json();
+    document.getElementById('status').textContent = s.running ? '' : '(session finished)';
+    plot(s.attempts);
+    table('regime', Object.entries(s.regime));
+    const rate = r => r === null ? null : `${(100 * r).toFixed(0)} %`;
+    table('hits', [['attempts', s.count], ['all attempts', rate(s.hit_rate)],
+                   [`last ${s.hit_window}`, rate(s.recent_hit_rate)]]);
+    const f = s.frames, late = f.max_ms > s.frame_period_ms;
+    table('frames', [['mean work time (ms)', f.mean_ms, ''], ['max work time (ms)', f.max_ms, late ? 'bad' : 'good'],
+                     ['frames', f.total_frames], ['missed deadlines', f.missed, f.missed ? 'bad' : 'good']]);
+    table('state', Object.entries(s.state));
+  } catch (error) {
+    document.getElementById('status').textContent = '(dashboard stopped)';
+  }
+}
+update(); setInterval(update, {POLL_MS});
+</script>
+</body></html>
+'''
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dashboard process of a session, started by new_dashboard()')
+    parser.add_argument('--serve', action='store_true', required=True)
+    parser.add_argument('port', type=int, help='local port of the dashboard page')
+    arguments = parser.parse_args()
+    serve(arguments.port)
@@ -0,0 +1,12 @@
+"""
+Defaults shared by the game, the analysis modules and the command line.
+The module has no imports, so reaching_cli.py and the menus use the same values as Reader_module, the dashboard and
+the session recorder without importing matplotlib, numpy or pygame at the start.
+"""
+
+CRITICAL_ANGLE = 100  # degrees, attempts with larger error angles are outliers
+FIGURE_DPI = 100  # resolution of the raster figures in dots per inch
+FIGURE_FORMATS = ('png', 'svg', 'pdf')  # figure formats supported by Reader_module.save_figure()
+DASHBOARD_PORT = 8050  # local port of the live dashboard
+RECORD_RATE = 10  # frames per second of the session recording
+RECORD_WIDTH = 640  # pixels, width of the recorded frames, the height follows the aspect ratio of the screen
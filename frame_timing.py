@@ -0,0 +1,108 @@
+"""
+Frame-timing instrumentation of the game loop.
+Every section of a frame (schedule update, movement parameters, data saving, drawing, event handling, display flip,
+screenshot copy) is timed with time.perf_counter_ns(). The durations are accumulated in per-section histograms and the frames that
+missed their deadline (took longer than the frame period) are recorded with the attempt and the section durations,
+so the stutter during a reach can be traced back to its cause.
+At the end of the session the report is written next to experimental_data.csv:
+    frame_timing.csv: histogram of the section and frame durations, counts per bin of BIN_WIDTH ms
+    frame_timing_missed.csv: missed frames with the attempt and the section durations in ms
+"""
+
+import time
+
+import numpy as np
+
+SECTIONS = ('script update', 'movement parameters', 'data saving', 'drawing', 'event handling', 'display flip',
+            'screenshot', 'recording')
+BIN_WIDTH = 0.25  # ms
+BINS = 200  # the last bin collects all durations above BIN_WIDTH * BINS ms
+
+
+def new_frame_timer(frame_rate=60):
+    """ Function to create the frame timer
+    Args:
+        frame_rate: int, frame rate of the game in Hz, defines the deadline of each frame
+    Returns:
+        timer: dict with the histograms, the missed frames and the timing of the current frame
+    """
+    return {
+        'frame_period': 1_000_000_000 // frame_rate,  # ns
+        'histograms': {section: np.zeros(BINS + 1, dtype=np.int64) for section in (*SECTIONS, 'frame')},
+        'frames': 0,
+        'missed_frames': [],
+        'current': dict.fromkeys(SECTIONS, 0),
+        'frame_start': 0,
+        'last_mark': 0,
+        'last_frame': 0,  # duration of the last frame, ns
+    }
+
+
+def start_frame(timer):
+    """ Function to start timing a new frame
+    Args:
+        timer: dict, the frame timer
+    """
+    timer['frame_start'] = timer['last_mark'] = time.perf_counter_ns()
+    for section in SECTIONS:
+        timer['current'][section] = 0
+
+
+def mark(timer, section):
+    """ Function to mark the end of a section, the time since the previous mark is added to the section
+    Args:
+        timer: dict, the frame timer
+        section: str, one of SECTIONS
+    """
+    now = time.perf_counter_ns()
+    timer['current'][section] += now - timer['last_mark']
+    timer['last_mark'] = now
+
+
+def add_to_histogram(histogram, duration):
+    """ Function to count a duration in a histogram
+    Args:
+        histogram: np.ndarray, counts per bin
+        duration: int, duration in ns
+    """
+    histogram[min(int(duration / 1e6 / BIN_WIDTH), BINS)] += 1
+
+
+def end_frame(timer, attempts):
+    """ Function to finish timing the frame, the frame is missed if it took longer than the frame period
+    Args:
+        timer: dict, the frame timer
+        attempts: int, current attempt, saved for the missed frames
+    """
+    frame_duration = time.perf_counter_ns() - timer['frame_start']
+    timer['last_frame'] = frame_duration
+    histograms = timer['histograms']
+    for section, duration in timer['current'].items():
+        add_to_histogram(histograms[section], duration)
+    add_to_histogram(histograms['frame'], frame_duration)
+
+    if frame_duration > timer['frame_period']:
+        timer['missed_frames'].append({'frame': timer['frames'], 'attempts': attempts,
+                                       'frame_ms': frame_duration / 1e6,
+                                       **{f'{section}_ms': duration / 1e6
+                                          for section, duration in timer['current'].items()}})
+    timer['frames'] += 1
+
+
+def write_report(timer, directory):
+    """ Function to write the timing report of the session and print its summary
+    Args:
+        timer: dict, the frame timer
+        directory: str, session folder (file saving path)
+    """
+    import pandas as pd  # only needed at the end of the session, not at the start of the game (see startup.py)
+
+    histograms = pd.DataFrame({'bin_ms': np.arange(BINS + 1) * BIN_WIDTH, **timer['histograms']})
+    histograms.to_csv(f'{directory}/frame_timing.csv', index=False)
+    missed_frames = pd.DataFrame(timer['missed_frames'],
+                                 columns=['frame', 'attempts', 'frame_ms', *[f'{section}_ms' for section in SECTIONS]])
+    missed_frames.to_csv(f'{directory}/frame_timing_missed.csv', index=False)
+
+    print(f'frames: {timer["frames"]}, missed deadlines: {len(missed_frames)}')
+    if len(missed_frames):
+        print('worst frame:', missed_frames.loc[missed_frames['frame_ms'].idxmax()].to_dict())
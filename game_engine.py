@@ -0,0 +1,450 @@
+"""
+Headless engine of the reaching game.
+The engine contains the state machine of the game: target generation, cursor movement parameters, hit/miss detection,
+error angle calculation and data writing. It doesn't draw anything and doesn't depend on a display or a frame clock:
+the mouse position and the time are provided by pluggable sources, so that the same engine can be driven either by
+the participant in 'Reaching game.py' (pygame.mouse and pygame.time.get_ticks) or by a synthetic reacher
+in 'headless_simulation.py'.
+The whole state of a game session is kept in a single 'session' dictionary created by new_session().
+"""
+
+import math
+
+import numpy as np
+
+import random_streams
+
+### GAME CONSTANTS ###
+CIRCLE_SIZE = 40
+TARGET_SIZE = CIRCLE_SIZE
+TARGET_RADIUS = 300
+ATTEMPTS_LIMIT = 400
+START_ANGLE = 0
+TIME_LIMIT = 1000  # time limit in ms
+OUTER_RADIUS = 600
+
+# parameters that change according to the active script and their defaults
+default_parameters = {
+    'running': True,
+    'motor_noise': 0,
+    'target_mode': 'fix',
+    'sequence_target': 0,
+    'perturbation_mode': False,
+    'MASK_RADIUS': 0.75 * TARGET_RADIUS,
+    'max_perturbation': -30,
+
+    # feedback mode
+    'feedback': False,
+
+    # assisting modes
+    'assisting_circle': False,
+    'assisting_flicker': False,
+    'limited_mask': False,
+}
+
+
+def new_session(setup_schedule, width, height, seed=None):
+    """ Function to create the state of a new game session
+    Args:
+        setup_schedule: dict, compiled parameter schedule of the experimental setup (see schedule.py)
+        width: int, width of the playing field in pixels
+        height: int, height of the playing field in pixels
+        seed: int, optional, seed of the random streams, a new seed is generated if it's None
+    Returns:
+        session: dict with the parameters, dynamic variables and data of the session
+    """
+    session = {
+        'schedule': setup_schedule,
+        'schedule_attempts': None,  # attempts for which the schedule was last applied
+        'event_parameters': {},  # parameters set by the last keyboard event, override the schedule
+        'pending_target': None,  # target to present instead of a new one, e.g. after resuming a session
+        'WIDTH': width,
+        'HEIGHT': height,
+        'START_POSITION': (width // 2, height // 2),
+        'escape': False,
+
+        # seeded random streams of motor noise, random perturbation and random targets (see random_streams.py)
+        'random': random_streams.new_streams(setup_schedule, seed),
+
+        # parameters of the script presets
+        'parameters': setup_schedule['initial'].copy(),
+
+        # dynamic variables used for calculations inside the game loop
+        'dynamic_variables': {
+            'motor_noise_perturbation': 0.0,
+            'gradual_step': 0,
+            'gradual_attempts': 1,
+            'total_perturbation': 0,
+            'perturbation_angle': 0,
+            'circle_pos': [0.0, 0.0],
+            'game_event': None,
+            'score': 0,
+            'attempts': 0,
+            'error_angle': 0,
+            'move_faster': False,
+            'hit_time': 0,
+            'start_time': 0,
+            'target': None,
+            'trajectory': [(0, 0)],
+            'attempt_trajectory': [(0, 0)],
+            'mouse_pos': (width // 2, height // 2),
+            'distance': 0.0,
+            'mouse_angle': 0.0,
+            'outcome': None,
+        },
+
+        # data to be saved
+        'data': {'attempts': [],
+                 'error_angle': [],
+                 'move_faster': [],
+
+                 'perturbation_mode': [],
+                 'total_perturbation': [],
+
+                 'motor_noise': [],
+                 'MASK_RADIUS': [],
+                 'sequence_target': [],
+
+                 'max_perturbation': [],
+                 'feedback': [],
+
+                 'outcome': []
+                 },
+    }
+    return session
+
+
+### PARAMETERS ###
+
+def update_parameters(session):
+    """ Function to update game parameters according to the schedule, the current attempt and the last game event
+    Parameters are touched only when the attempts count changes, the last keyboard event keeps overriding the schedule.
+    Args:
+        session: dict, the game session
+    """
+    attempts = session['dynamic_variables']['attempts']
+    if attempts != session['schedule_attempts']:
+        session['schedule_attempts'] = attempts
+        parameters = session['parameters']
+        parameters.update(session['schedule']['changes'].get(attempts, {}))
+        parameters.update(session['event_parameters'])
+
+    # Quit the game if escape is pressed
+    if session['escape']:
+        session['parameters']['running'] = False
+
+
+def handle_event(session, game_event):
+    """ Function to register a game event (manual intervention via keyboard)
+    Args:
+        session: dict, the game session
+        game_event: str, 'escape', 'test_perturbation', 'end perturbation' or 'mask400'
+    """
+    session['dynamic_variables']['game_event'] = game_event
+    session['event_parameters'] = session['schedule']['events'].get(game_event, {})
+    session['parameters'].update(session['event_parameters'])
+    if game_event == 'escape':
+        session['escape'] = True
+
+
+### FUNCTIONS TO CHECK GAME STATES ###
+
+# Function to generate coordinates for the target position
+def generate_target_position(session):
+    """Function to generate coordinates for the target position depending on the target_mode in effect
+    Args:
+        session: dict, the game session
+    Returns:
+         [x, y] coordinates for the target position
+    """
+    parameters = session['parameters']
+    angle = 0
+    if parameters['target_mode'] == 'random':
+        angle = random_streams.draw(session['random'], 'target')  # random angle for each attempt
+
+    elif parameters['target_mode'] == 'fix':
+        angle = math.radians(START_ANGLE)  # fix the target at a specific angle for all attempts
+
+    elif parameters['target_mode'] == 'sequence':
+        angle = math.radians(
+            parameters['sequence_target'])  # sequence_target is a variable that changes over the attempts
+
+    target_x = session['WIDTH'] // 2 + TARGET_RADIUS * math.sin(angle)
+    target_y = session['HEIGHT'] // 2 + TARGET_RADIUS * -math.cos(angle)  # zero-angle at the top
+    return [target_x, target_y]
+
+
+# Function to check if the current target is reached
+def check_target_reached(session):
+    """
+    Function to check if the current target is reached.
+    First, it checks if there is a target. Then, it calculates the distance
+    between the circle and the target and returns True if the distance is less
+    than or equal to half the circle's size.
+    Args:
+        session: dict, the game session
+    Returns:
+         bool: True if the target is within the circle, False otherwise.
+    """
+    dynamic_variables = session['dynamic_variables']
+    if dynamic_variables['target']:
+        distance = math.hypot(float(dynamic_variables['circle_pos'][0]) - dynamic_variables['target'][0],
+                              float(dynamic_variables['circle_pos'][1]) - dynamic_variables['target'][1])
+        if distance <= CIRCLE_SIZE // 2:
+            return True
+    return False
+
+
+# Function to check if player has returned to the starting position
+def at_start_position(session):
+    """
+    Function to check if the starting position is reached.
+    First, it calculates the distance between the mouse position and the starting position
+    and returns True if the distance is less than or equal to the circle's size
+    Args:
+        session: dict, the game session
+    Returns:
+         bool: True if the mouse position is within the circle, False otherwise.
+    """
+    mouse_pos = session['dynamic_variables']['mouse_pos']
+    start_position = session['START_POSITION']
+    distance = math.hypot(mouse_pos[0] - start_position[0], mouse_pos[1] - start_position[1])
+    if distance <= CIRCLE_SIZE:
+        return True
+    return False
+
+
+def read_mouse(session, mouse):
+    """ Function to read the mouse position and calculate the mouse distance and angle relative to the starting position
+    Args:
+        session: dict, the game session
+        mouse: input source with get_pos() method, e.g. pygame.mouse
+    """
+    dynamic_variables = session['dynamic_variables']
+    start_position = session['START_POSITION']
+    mouse_pos = mouse.get_pos()
+    deltax = mouse_pos[0] - start_position[0]
+    deltay = mouse_pos[1] - start_position[1]
+    dynamic_variables['mouse_pos'] = mouse_pos
+    dynamic_variables['distance'] = math.hypot(deltax, deltay)
+    dynamic_variables['mouse_angle'] = math.atan2(deltay, deltax)  # mouse angle in RADIANS
+
+
+def movement_parameters(session):
+    """ Function to calculate the cursor movement parameters
+    Updates the following parameters based on the current game state:
+            circle_pos: [x,y] coordinates for the cursor position relative to the mouse position given perturbation
+            gradual_step: int, current step for gradual perturbation
+            gradual_attempts: int, passed number of attempts for gradual perturbation
+            total_perturbation: float, the total perturbation angle in radians
+            perturbation_angle: float, the perturbation angle in radians
+    Args:
+        session: dict, the game session
+    """
+    parameters = session['parameters']
+    dynamic_variables = session['dynamic_variables']
+    start_position = session['START_POSITION']
+
+    # calculate perturbation parameters
+
+    # sudden perturbation
+    if parameters['perturbation_mode'] == 'sudden':
+        dynamic_variables['perturbation_angle'] = parameters['max_perturbation']
+
+    # gradual perturbation
+    if parameters['perturbation_mode'] == 'gradual':
+        if not dynamic_variables['target'] and at_start_position(session):
+            dynamic_variables['gradual_attempts'] += 1
+        dynamic_variables['gradual_step'] = np.min([np.ceil(dynamic_variables['gradual_attempts'] / 3), 10])
+        dynamic_variables['perturbation_angle'] = dynamic_variables['gradual_step'] * parameters[
+            'max_perturbation'] / 10
+    # random perturbation
+    if parameters['perturbation_mode'] == 'random':
+        if not dynamic_variables['target'] and at_start_position(session):
+            dynamic_variables['perturbation_angle'] = random_streams.draw(session['random'], 'perturbation')
+
+    # reset perturbation parameters if perturbation mode is off
+    if parameters['perturbation_mode'] == False:
+        dynamic_variables['perturbation_angle'] = 0
+        dynamic_variables['gradual_step'] = 0
+        dynamic_variables['gradual_attempts'] = 1
+
+    # generate motor noise
+    generate_motor_noise(session)
+
+    # calculate the total perturbation and resulting cursor movement parameters
+    dynamic_variables['total_perturbation'] = np.radians(dynamic_variables['perturbation_angle']) + np.radians(
+        dynamic_variables['motor_noise_perturbation'])
+    perturbed_mouse_angle = dynamic_variables['mouse_angle'] - dynamic_variables['total_perturbation']
+    perturbed_mouse_pos = [
+        start_position[0] + dynamic_variables['distance'] * math.cos(perturbed_mouse_angle),
+        start_position[1] + dynamic_variables['distance'] * math.sin(perturbed_mouse_angle)]
+    dynamic_variables['circle_pos'] = perturbed_mouse_pos  # calculate the cursor position
+
+
+def get_error_angle(session):
+    """ Function to calculate the error angle between the target and the circle end position
+    Args:
+        session: dict, the game session
+    Returns:
+            float: error_angle in radians
+    """
+    dynamic_variables = session['dynamic_variables']
+    start_position = session['START_POSITION']
+    target_angle = math.atan2(dynamic_variables['target'][1] - start_position[1],
+                              dynamic_variables['target'][0] - start_position[0])
+    circle_end_angle = math.atan2(float(dynamic_variables['circle_pos'][1]) - start_position[1],
+                                  float(dynamic_variables['circle_pos'][0]) - start_position[0])
+    error_angle = circle_end_angle - target_angle
+    error_angle = (error_angle + math.pi) % (2 * math.pi) - math.pi  # wrap to -pi to pi
+    return error_angle
+
+
+def write_data(session):
+    """ Function to write the data to data dictionary according to its keys from parameters or dynamic_variables
+    Args:
+        session: dict, the game session
+    """
+    parameters = session['parameters']
+    dynamic_variables = session['dynamic_variables']
+    for key, values in session['data'].items():
+        values.append(parameters[key]) if key in parameters else values.append(dynamic_variables[key])
+
+
+def generate_motor_noise(session):
+    """ Function to generate motor noise perturbation value
+    Args:
+        session: dict, the game session
+    Returns:
+            float: motor_noise_perturbation
+    """
+    parameters = session['parameters']
+    dynamic_variables = session['dynamic_variables']
+
+    if not dynamic_variables['target'] and at_start_position(session):
+        if parameters['motor_noise'] != 0.0:
+            dynamic_variables['motor_noise_perturbation'] = random_streams.draw(session['random'], 'motor_noise',
+                                                                                parameters['motor_noise'])
+            return dynamic_variables['motor_noise_perturbation']
+        else:
+            dynamic_variables['motor_noise_perturbation'] = 0.0
+            return dynamic_variables['motor_noise_perturbation']
+
+
+def end_attempt(session):
+    """ Function to reset the attempt state after a hit or a miss
+    Args:
+        session: dict, the game session
+    """
+    dynamic_variables = session['dynamic_variables']
+
+    # Disable target after the attempt
+    dynamic_variables['target'] = None
+
+    # Reset attempt time after the attempt
+    dynamic_variables['start_time'] = 0
+
+    # save the trajectory of the cursor for the attempt and reset the trajectory for the next attempt
+    dynamic_variables['attempt_trajectory'] = dynamic_variables['trajectory']
+    dynamic_variables['trajectory'] = []
+
+
+### GAME STEP ###
+
+def step(session, mouse, get_ticks):
+    """ Function to advance the game state by one frame
+    Args:
+        session: dict, the game session
+        mouse: input source with get_pos() and set_pos() methods, e.g. pygame.mouse
+        get_ticks: function returning the current time in ms, e.g. pygame.time.get_ticks
+    Returns:
+        outcome: str, 'hit', 'near_miss' (a miss rewarded in the reinforcement feedback mode), 'miss'
+        or None if the attempt is not finished in this frame
+    """
+    parameters = session['parameters']
+    dynamic_variables = session['dynamic_variables']
+    start_position = session['START_POSITION']
+    outcome = None
+
+    # Get mouse position, calculate mouse_distance and mouse_angle
+    read_mouse(session, mouse)
+
+    # get circle movement parameters
+    movement_parameters(session)
+
+    # save the trajectory of the cursor
+    if dynamic_variables['target']:
+        dynamic_variables['trajectory'].append(dynamic_variables['circle_pos'])
+
+    ### HIT ###
+
+    # hit if circle touches target's center
+    if check_target_reached(session):
+
+        # get hit time, used later for assist in return to start position
+        dynamic_variables['hit_time'] = get_ticks()
+
+        # update game metrics
+        dynamic_variables['score'] += 1
+        dynamic_variables['attempts'] += 1
+
+        # calculate and save error angles between target and circle end position for a hit
+        dynamic_variables['error_angle'] = get_error_angle(session)
+        outcome = 'hit'
+        dynamic_variables['outcome'] = outcome
+        write_data(session)
+        end_attempt(session)
+
+    ### MISS ###
+
+    # miss if player leaves the target_radius + 1% tolerance
+    elif dynamic_variables['target'] and math.hypot(float(dynamic_variables['circle_pos'][0]) - start_position[0],
+                                                    float(dynamic_variables['circle_pos'][1]) - start_position[
+                                                        1]) > TARGET_RADIUS * 1.01:
+
+        # get miss time, used later for assist in return to start position
+        dynamic_variables['hit_time'] = get_ticks()
+
+        # update game metrics
+        dynamic_variables['attempts'] += 1
+
+        # Calculate and save errors between target and circle end position for a miss
+        dynamic_variables['error_angle'] = get_error_angle(session)
+        outcome = 'miss'
+
+        # reinforcement feedback mode: intermediate reinforcement if the angle is less than 8.5 degrees
+        if parameters['feedback'] == 'reinforcement' and abs(np.degrees(dynamic_variables['error_angle'])) < 8.5:
+            dynamic_variables['score'] += 0.25
+            outcome = 'near_miss'
+
+        # exclude attempts where the cursor wandered away in the opposite direction in the dark
+        if abs(np.degrees(
+                dynamic_variables['error_angle'])) > 100:
+            dynamic_variables['attempts'] -= 1
+
+        dynamic_variables['outcome'] = outcome
+        write_data(session)
+        end_attempt(session)
+
+    # teleport the cursor to the center at the vicinity of the center
+    if not dynamic_variables['target'] and dynamic_variables['distance'] < 80:
+        mouse.set_pos(start_position)
+
+    # Check if player moved to the center and generate new target
+    if not dynamic_variables['target'] and at_start_position(session):
+        # get coordinates for the new target, a pending target replaces it but the random target is still drawn
+        # to keep the random streams in the same order as in an uninterrupted session
+        dynamic_variables['target'] = generate_target_position(session)
+        if session['pending_target']:
+            dynamic_variables['target'] = session['pending_target']
+            session['pending_target'] = None
+        dynamic_variables['move_faster'] = False
+        dynamic_variables['start_time'] = get_ticks()  # Start the timer for the attempt
+
+    # Check if time limit for the attempt is reached
+    current_time = get_ticks()
+    if dynamic_variables['start_time'] != 0 and (current_time - dynamic_variables['start_time']) > TIME_LIMIT:
+        dynamic_variables['move_faster'] = True
+        dynamic_variables['start_time'] = 0  # Reset start_time
+
+    return outcome
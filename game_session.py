@@ -0,0 +1,451 @@
+"""
+A session of the reaching game, without any dialog.
+run_session() runs the game loop of one session with the given setup, participant and root folder and saves its data:
+the experimental setup script or schedule file is compiled, the session folder
+{root}/{participant}/{participant}_{date}_{time}/{script}[/test] is created (or the interrupted session is
+continued), the game runs until the end of the setup or 'esc' and the data, the journal, the trajectories and the frame
+timing report are saved in the session folder.
+The session is started by the Tk menu of Reaching game.py or by the command line (reaching_cli.py), both call
+run_session() with the values chosen by the user.
+"""
+
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pygame
+from screeninfo import get_monitors
+
+import dashboard
+import frame_timing
+import game_engine
+import input_capture
+import random_streams
+import render
+import schedule
+import screen_capture
+import session_recorder
+import startup
+import trajectory_store
+import trial_journal
+from game_engine import CIRCLE_SIZE, OUTER_RADIUS, TARGET_RADIUS, TARGET_SIZE
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+
+
+def screen_resolution():
+    """ Function to get the resolution of the primary monitor
+    Returns:
+        resolution: (width, height) in pixels
+    """
+    primary_monitor = get_monitors()[0]
+    return primary_monitor.width, primary_monitor.height
+
+
+def run_session(exp_setup, participant_number, file_saving_root, test_mode=True, resume=False, seed=None,
+                user_screen=None, capture_attempts=False, record_session=False,
+                record_rate=session_recorder.RECORD_RATE, record_width=session_recorder.RECORD_WIDTH,
+                dashboard_port=None, launch=None):
+    """ Function to run a session of the reaching game and save its data
+    Args:
+        exp_setup: str, name of the setup script (e.g. 'feedback_script') or path to a .json/.toml schedule file
+        participant_number: str, participant ID
+        file_saving_root: str, root folder of the experiment
+        test_mode: bool, True to run in a window with the test information, False to run in full screen
+        resume: bool, True to continue the last interrupted session of the participant
+        seed: int, optional, seed of the random streams, by default a new seed (the seed of the interrupted session
+            if it's resumed)
+        user_screen: (width, height) of the screen, by default the resolution of the primary monitor
+        capture_attempts: bool, True to save the last frame of every attempt (see screen_capture.py)
+        record_session: bool, True to record a video of the session (see session_recorder.py)
+        record_rate: float, recording rate in frames per second
+        record_width: int, width of the recorded frames in pixels
+        dashboard_port: int, optional, local port of the live dashboard for the experimenter (see dashboard.py), the
+            debug text of the test mode is shown on the dashboard instead of the participant display
+        launch: dict, optional, launch state of the prewarm thread with the compiled setups and the fonts
+            (see startup.py)
+    Returns:
+        file_saving_path: str, the session folder
+    """
+    if user_screen is None:
+        user_screen = screen_resolution()
+
+    # date and time
+    time_ID = datetime.now().strftime('%Y_%m_%d_%H_%M_%S')
+
+    print(exp_setup)
+    print(participant_number)
+
+    # Import the chosen script or schedule file and compile it into a parameter schedule
+    # script_name = f'{setups_list[exp_setup - 1]}_script'
+    if launch:  # the built-in setups are compiled by the prewarm thread
+        setup_schedule = startup.load_setup(launch, exp_setup, game_engine.default_parameters)
+    else:
+        setup_schedule = schedule.load_setup(exp_setup, game_engine.default_parameters)
+    exp_setup_name = schedule.setup_name(exp_setup)
+    print('experiment setup:', exp_setup)
+
+    print('test mode:', test_mode)
+
+    # Enter Participant ID
+    # participant_number = str(input('enter participant ID: '))
+    participant_trial_folder = participant_number + '_' + time_ID  # generate unique folder for each trial of the participant
+    print('participant ID:', participant_number)
+
+    ### FILE SAVING PATH ###
+    # File saving directory is created according to the generated participant ID and the experimental setup.
+    # Create a folder for participant
+
+    file_saving_path = f'{file_saving_root}/{participant_number}/{participant_trial_folder}/{exp_setup_name}'
+    if test_mode:
+        file_saving_path = f'{file_saving_root}/{participant_number}/{participant_trial_folder}/{exp_setup_name}/test/'
+
+    # Continue the last interrupted session of the participant in its folder if resume is chosen
+    resume_path = None
+    if resume:
+        resume_path = trial_journal.find_interrupted_session(file_saving_root, participant_number, exp_setup_name,
+                                                             test_mode)
+        print('resumed session:', resume_path)
+        if resume_path:
+            file_saving_path = resume_path
+
+    os.makedirs(file_saving_path, exist_ok=True)
+    print(file_saving_path)
+
+    ### GAME SETUP ###
+    SCREEN_X, SCREEN_Y = user_screen  # your screen resolution
+    WIDTH, HEIGHT = SCREEN_X // 1, SCREEN_Y // 1  # be aware of monitor scaling on windows (150%)
+    START_POSITION = (WIDTH // 2, HEIGHT // 2)
+
+    target_color = BLUE
+    center_color = WHITE
+
+    # Initialize Pygame
+    pygame.init()
+
+    # Set up the display
+    if test_mode:
+        screen = pygame.display.set_mode((WIDTH - 200, HEIGHT - 200))
+    else:
+        screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
+    pygame.display.set_caption("Reaching Game")
+
+    # Initialize the renderer: cached fonts, texts and sprites, only the changed rectangles are updated on the display
+    renderer = render.new_renderer(screen, BLACK, launch['fonts'] if launch else None)
+    if launch:
+        startup.mark(launch, 'window opened')
+
+    # Initialize the mouse capture, the mouse is sampled at 1000 Hz between the frames
+    capture = input_capture.new_capture()
+
+    # Initialize the frame timer, the duration of every section of the game loop is measured
+    timer = frame_timing.new_frame_timer()
+
+    # Start the screenshot writer, the screenshots are encoded and saved in a background thread
+    screenshots = screen_capture.new_writer(directory=file_saving_path if capture_attempts else None)
+
+    # Start the session recording, the frames are encoded in a separate process
+    recorder = None
+    if record_session:
+        recorder = session_recorder.new_recorder(file_saving_path, screen, record_rate, record_width)
+
+    # Start the live dashboard, the records of the game are sent to a separate process
+    live_dashboard = dashboard.new_dashboard(dashboard_port) if dashboard_port else None
+
+    # Open the store for the per-attempt cursor and mouse trajectories
+    store = trajectory_store.open_store(f'{file_saving_path}/trajectories.h5')
+    attempt_start_time = time.perf_counter_ns()  # time of the target appearance, ns
+
+    # The random values of the session are drawn from streams seeded with the session seed, a resumed session
+    # continues with the seed of the interrupted one
+    if resume_path:
+        seed = random_streams.load_seed(resume_path)
+
+    # The game state (parameters, dynamic variables and data to be saved) is handled by the game engine
+    session = game_engine.new_session(setup_schedule, WIDTH, HEIGHT, seed)
+    parameters = session['parameters']
+    dynamic_variables = session['dynamic_variables']
+    data = session['data']
+
+    # Restore the data and the game state of the interrupted session
+    if resume_path:
+        trial_journal.resume_session(session, trial_journal.read_journal(resume_path))
+        print('resumed at attempt:', dynamic_variables['attempts'])
+
+    # Open the journal, every attempt is saved immediately to survive a crash
+    journal = trial_journal.open_journal(file_saving_path, header={'exp_setup': exp_setup,
+                                                                   'participant': participant_number,
+                                                                   'time_ID': time_ID})
+
+    # Save the seed with the data, the session can be reproduced with the same seed and schedule
+    if not resume_path:
+        random_streams.save_session_info(file_saving_path, {'seed': session['random']['seed'], 'exp_setup': exp_setup,
+                                                            'participant': participant_number, 'time_ID': time_ID})
+    print('seed:', session['random']['seed'])
+    if launch:
+        startup.mark(launch, 'game ready')
+        startup.print_report(launch)
+
+    ### DRAWING FUNCTIONS ###
+
+    def draw_trajectory():
+        """
+        Function to draw the trajectory of the cursor
+        """
+        for coordinate in dynamic_variables['attempt_trajectory']:
+            render.circle(renderer, WHITE, coordinate, 2)
+
+    def draw_end_pos():
+        """
+        Function to draw the end position of the cursor
+        """
+        render.circle(renderer, RED, dynamic_variables['attempt_trajectory'][-1], 10)
+
+    def screenshot():
+        """
+        Function to take a screenshot of the game window, the screen is copied and saved in the background
+        """
+        screen_capture.capture(screenshots, screen,
+                               f'{file_saving_path}/f{dynamic_variables['attempts']}_screenshot.png')
+
+    ### MAIN GAME LOOP ###
+
+    while parameters['running']:
+        frame_timing.start_frame(timer)
+        render.begin_frame(renderer)  # erase what was drawn in the previous frame
+
+        # Hide the mouse cursor
+        pygame.mouse.set_visible(False)
+        frame_timing.mark(timer, 'drawing')
+
+        # update game parameters according to the schedule
+        game_engine.update_parameters(session)
+        frame_timing.mark(timer, 'script update')
+
+        # advance the game state: cursor movement, hit/miss detection, new targets and time limit
+        had_target = dynamic_variables['target'] is not None
+        outcome = game_engine.step(session, pygame.mouse, pygame.time.get_ticks)
+        distance = dynamic_variables['distance']
+        mouse_angle = dynamic_variables['mouse_angle']
+        frame_timing.mark(timer, 'movement parameters')
+
+        # save the finished attempt to the journal and its cursor and mouse trajectories to the store
+        frame_time = time.perf_counter_ns()
+        if outcome:
+            trial_journal.append_attempt(journal, session, time_ns=frame_time)
+            trajectory_store.append_attempt(store, len(data['attempts']) - 1, dynamic_variables['attempts'],
+                                            dynamic_variables['attempt_trajectory'],
+                                            input_capture.read_samples(capture['buffer'], since=attempt_start_time,
+                                                                       until=frame_time),
+                                            attempt_start_time, frame_time)
+            if live_dashboard:
+                dashboard.send_attempt(live_dashboard, session, outcome)
+        if dynamic_variables['target'] and not had_target:
+            attempt_start_time = frame_time
+            trial_journal.append_target(journal, dynamic_variables['target'], time_ns=frame_time)
+        frame_timing.mark(timer, 'data saving')
+
+        # reinforcement feedback mode
+        if parameters['feedback'] == 'reinforcement':
+            if outcome == 'hit':  # paint the center green if there was a hit
+                center_color = GREEN
+            elif outcome == 'miss':  # paint the center red if there was a miss
+                center_color = RED
+            elif outcome == 'near_miss':  # paint the center yellow for intermediate reinforcement
+                center_color = YELLOW
+
+        # Other feedback modes
+        draw_trajectory() if parameters[
+                                 'feedback'] == 'trajectory' else None  # draw the trajectory if trajectory mode is on
+        draw_end_pos() if parameters[
+                              'feedback'] == 'end_pos' else None  # draw the end position if end_pos mode is on
+
+        if not parameters['feedback']:  # paint the center white if there is no feedback mode
+            center_color = WHITE
+
+        # Show 'MOVE FASTER!'
+        if dynamic_variables['move_faster']:
+            render.text(renderer, 'move faster', 'MOVE FASTER!', 36, RED, center=START_POSITION)
+
+        ### GENERATE PLAYING FIELD ###
+        # Draw current target
+        if dynamic_variables['target']:
+            render.circle(renderer, target_color, dynamic_variables['target'],
+                          TARGET_SIZE // 2)  # draw the target if the coordinates are available (i.e., if target is not None)
+
+        # Draw start position
+        render.circle(renderer, center_color, START_POSITION, 10)  # draw the center
+
+        # Draw cursor
+        if distance <= parameters['MASK_RADIUS']:
+            render.circle(renderer, WHITE, dynamic_variables['circle_pos'], CIRCLE_SIZE // 2)  # draw the cursor
+
+        ### ASSISTANCE ###
+        # Draw assisting circle if returning to start position takes too long
+
+        if parameters['assisting_circle']:
+            if not dynamic_variables['target'] and pygame.time.get_ticks() - dynamic_variables['hit_time'] > 5000:
+                render.circle(renderer, WHITE, START_POSITION, distance, width=1)
+
+        # implement assisting flickering cursor if returning to start position takes too long
+        if parameters['assisting_flicker']:
+            if not dynamic_variables['target'] and pygame.time.get_ticks() - dynamic_variables['hit_time'] > 5000:
+                if 0 < np.sin(pygame.time.get_ticks() / 750) < 0.5:
+                    render.circle(renderer, YELLOW, dynamic_variables['circle_pos'], CIRCLE_SIZE // 4)
+
+        # limit mask radius
+        if parameters['limited_mask']:
+            if distance > OUTER_RADIUS:
+                render.circle(renderer, WHITE, dynamic_variables['circle_pos'], CIRCLE_SIZE // 2)
+
+        ### DISPLAY METRICS ###
+        # Show attempts
+        render.text(renderer, 'attempts', f"Attempts: {dynamic_variables['attempts']}", 36, WHITE, topleft=(10, 40))
+
+        # Show score
+        render.text(renderer, 'score', f"SCORE: {dynamic_variables['score']}", 52, WHITE, topleft=(WIDTH // 2 - 100, 40))
+
+        if test_mode:
+            # display the cursor
+            render.circle(renderer, WHITE, dynamic_variables['circle_pos'], CIRCLE_SIZE // 2)
+
+        if test_mode and not live_dashboard:  # without the dashboard, the debug text is shown on the display
+            # Show score
+            render.text(renderer, 'test score', f"Score: {dynamic_variables['score']}", 36, WHITE, topleft=(10, 10))
+
+            # Show Mouse_angle
+            render.text(renderer, 'mouse angle', f"Mouse_Ang: {np.rint(np.degrees(mouse_angle))}", 36, WHITE,
+                        topleft=(10, 70))
+
+            # Show total_perturbation
+            formatted_value = "{:.2f}".format(np.degrees(dynamic_variables['total_perturbation']))
+            render.text(renderer, 'total perturbation', f"Total_perturbation: {formatted_value}", 36, WHITE,
+                        topleft=(10, 100))
+
+            # Show gradual_step
+            render.text(renderer, 'gradual step', f"Grad_step: {dynamic_variables['gradual_step']}", 36, WHITE,
+                        topleft=(10, 130))
+
+            # Show if perturbation_mode is on or off
+            render.text(renderer, 'perturbation mode', f"Perturbation: {parameters['perturbation_mode']}", 36, WHITE,
+                        topleft=(10, 160))
+
+            # show perturbation_angle
+            render.text(renderer, 'perturbation angle', f"perturbation angle: {dynamic_variables['perturbation_angle']}",
+                        36, WHITE, topleft=(10, 190))
+
+            # show motor_noise_perturbation
+            formatted_motor_noise_perturbation = "{:.2f}".format(dynamic_variables['motor_noise_perturbation'])
+            render.text(renderer, 'motor noise', f"motor noise: {formatted_motor_noise_perturbation}", 36, WHITE,
+                        topleft=(10, 220))
+
+            # show error_angle
+            formatted_error_angle = "{:.2f}".format(np.degrees(dynamic_variables['error_angle']))
+            render.text(renderer, 'error angle', f"error_angle: {formatted_error_angle}", 36, WHITE, topleft=(10, 250))
+
+            # Show target_angle
+            formatted_target_angle = "{:.2f}".format((parameters['sequence_target']))
+            render.text(renderer, 'target angle', f"target_angle: {formatted_target_angle}", 36, WHITE,
+                        topleft=(10, 280))
+
+            # Show circle_pos
+            formatted_circle_pos_x = "{:.2f}".format(float(dynamic_variables['circle_pos'][0]))
+            formatted_circle_pos_y = "{:.2f}".format(float(dynamic_variables['circle_pos'][1]))
+            render.text(renderer, 'circle pos', f"circle_pos: {formatted_circle_pos_x},{formatted_circle_pos_y}", 36,
+                        WHITE, topleft=(10, 310))
+
+            # Show target_pos
+            if dynamic_variables['target']:
+                formatted_target_pos_x = "{:.2f}".format(dynamic_variables['target'][0])
+                formatted_target_pos_y = "{:.2f}".format(dynamic_variables['target'][1])
+                render.text(renderer, 'target pos', f"target_pos: {formatted_target_pos_x},{formatted_target_pos_y}", 36,
+                            WHITE, topleft=(10, 340))
+
+            # Show gradual_attempts
+            render.text(renderer, 'gradual attempts', f"Grad_attempts: {dynamic_variables['gradual_attempts']}", 36,
+                        WHITE, topleft=(10, 370))
+        frame_timing.mark(timer, 'drawing')
+
+        # Event handling
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game_engine.handle_event(session, 'escape')
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:  # Press 'esc' to close the experiment
+                    game_engine.handle_event(session, 'escape')
+
+                    # Change script_parameters manually
+                elif event.key == pygame.K_4:  # Press '4' to start perturbation_mode
+                    game_engine.handle_event(session, 'test_perturbation')
+                elif event.key == pygame.K_5:  # Press '5' to end perturbation_mode
+                    game_engine.handle_event(session, 'end perturbation')
+                elif event.key == pygame.K_6:  # Press '6' to set the mask radius to 400
+                    game_engine.handle_event(session, 'mask400')
+                elif event.key == pygame.K_s:  # press 's' for a screenshot
+                    screenshot()
+                elif event.key == pygame.K_m:
+                    pygame.mouse.set_visible(True) if pygame.mouse.get_visible() == False else pygame.mouse.set_visible(
+                        False)
+        frame_timing.mark(timer, 'event handling')
+
+        # Update display, only the rectangles erased and drawn in this frame are pushed to the display
+        render.end_frame(renderer)
+        frame_timing.mark(timer, 'display flip')
+
+        # capture the last frame of the attempt with its feedback
+        if outcome and capture_attempts:
+            screen_capture.capture_attempt(screenshots, screen, len(session['data']['attempts']),
+                                           dynamic_variables['attempts'], outcome)
+            frame_timing.mark(timer, 'screenshot')
+        if recorder:
+            session_recorder.record_frame(recorder, screen, dynamic_variables['attempts'])
+            frame_timing.mark(timer, 'recording')
+        frame_timing.end_frame(timer, dynamic_variables['attempts'])
+        if live_dashboard:
+            dashboard.send_frame(live_dashboard, timer, session)
+
+        # sample the mouse until the next frame
+        input_capture.wait_next_frame(capture)
+
+    print('game finished without issues')
+    # Save the queued screenshots
+    written, dropped = screen_capture.close_writer(screenshots)
+    print(f'{written} screenshots saved, {dropped} dropped')
+    # Wait for the encoding of the recorded frames
+    if recorder:
+        recorded, dropped = session_recorder.close_recorder(recorder)
+        print(f'{recorded} frames recorded, {dropped} dropped')
+    # Stop the dashboard
+    if live_dashboard:
+        sent, dropped = dashboard.close_dashboard(live_dashboard)
+        print(f'{sent} dashboard records sent, {dropped} dropped')
+    # Quit Pygame
+    pygame.quit()
+    store.close()
+    trial_journal.close_journal(journal)
+
+    ### SAVING IMPORTANT DATA ###
+    import session_output  # pandas is imported only to save the data (see startup.py)
+
+    # save the data as csv and as Parquet file with the session metadata embedded
+    session_output.write_session(data, file_saving_path, {'exp_setup': exp_setup,
+                                                          'script_name': exp_setup_name,
+                                                          'participant': participant_number,
+                                                          'time_ID': time_ID,
+                                                          'seed': session['random']['seed'],
+                                                          'screen_resolution': [WIDTH, HEIGHT],
+                                                          'TARGET_RADIUS': TARGET_RADIUS,
+                                                          'software_version': session_output.software_version(),
+                                                          'startup_ms': startup.report(launch) if launch else None})
+
+    # save the frame timing report
+    frame_timing.write_report(timer, file_saving_path)
+
+    return file_saving_path
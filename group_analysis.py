@@ -0,0 +1,206 @@
+"""
+Group learning curves of the sessions of one experimental setup.
+The sessions of a script (found with the session catalog, see session_catalog.py) are aligned by attempt index:
+one row per subject and one column per attempt, outliers and missing attempts are NaN. The group curve is the mean
+error angle of every attempt over the subjects with its bootstrap confidence interval.
+The bootstrap is vectorized: the subjects of all resamples are drawn at once as one rng.integers matrix, turned into
+a matrix of counts (how often every subject is drawn in every resample), so the means of all resamples and attempts
+are one matrix product (resamples x subjects) @ (subjects x attempts), without a Python loop over the resamples.
+The group curve is saved as {root}/group_{script}.csv and plotted with the experimental conditions
+(see Reader_module.plot_regimes) as {root}/group_{script}.png.
+Usage:
+    python group_analysis.py {root} {script} [--resamples N] [--confidence C] [--seed S] [--include-test]
+                             [--critical-angle DEG] [--formats png svg pdf] [--dpi DPI]
+"""
+
+import argparse
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+import Reader_module
+import session_catalog
+import session_output
+from defaults import CRITICAL_ANGLE
+
+RESAMPLES = 10000
+CONFIDENCE = 0.95
+
+
+def load_group(file_saving_root, script, include_test=False):
+    """ Function to load the data of all sessions of an experimental setup, the catalog is updated first
+    Args:
+        file_saving_root: str, root folder of the experiment
+        script: str, experimental setup (script or schedule file name)
+        include_test: bool, True to include the sessions run in test mode
+    Returns:
+        sessions: DataFrame, the sessions of the setup (see session_catalog.SESSION_COLUMNS)
+        group_data: list of DataFrame, the data of every session
+    """
+    session_catalog.update_catalog(file_saving_root)
+    sessions = session_catalog.find_sessions(file_saving_root, script=script,
+                                             test_mode=None if include_test else False)
+    group_data = [session_output.read_experimental_data(os.path.join(file_saving_root, csv_path or parquet_path))
+                  for csv_path, parquet_path in zip(sessions['csv_path'], sessions['parquet_path'])]
+    return sessions, group_data
+
+
+def aligned_curves(group_data, critical_angle=CRITICAL_ANGLE):
+    """ Function to align the error angles of the sessions by attempt index
+    The attempts excluded by the game (error angle above 100 degrees) don't increase the attempt counter, their rows
+    repeat the attempts of the previous row (0 before the first attempt), they are dropped like the outliers.
+    Args:
+        group_data: list of DataFrame, the data of every session
+        critical_angle: float, critical angle in degrees of the outliers
+    Returns:
+        curves: np.ndarray (subjects, attempts), error angles in radians, NaN for outliers and missing attempts
+    """
+    attempts = max((int(data['attempts'].max()) for data in group_data if len(data)), default=0)
+    curves = np.full((len(group_data), attempts), np.nan)
+    for subject, data in enumerate(group_data):
+        attempt = data['attempts'].to_numpy()
+        error_angle = data['error_angle'].to_numpy(dtype=float)
+        excluded = attempt == np.append(0, attempt[:-1])
+        valid = ~excluded & (np.abs(error_angle) < np.radians(critical_angle))
+        if (attempt[~excluded] < 1).any() or (np.diff(attempt[~excluded]) <= 0).any():
+            raise ValueError(f'session {subject}: the attempts must be increasing from 1, except for the excluded '
+                             f'attempts')
+        curves[subject, attempt[valid] - 1] = error_angle[valid]
+    return curves
+
+
+def bootstrap_counts(generator, subjects, resamples):
+    """ Function to draw the bootstrap resamples of the subjects as counts
+    Args:
+        generator: np.random.Generator
+        subjects: int, number of subjects
+        resamples: int, number of resamples
+    Returns:
+        counts: np.ndarray (resamples, subjects), how often every subject is drawn in every resample
+    """
+    drawn = generator.integers(0, subjects, (resamples, subjects))
+    drawn += np.arange(resamples)[:, np.newaxis] * subjects  # index in the flattened counts
+    return np.bincount(drawn.ravel(), minlength=resamples * subjects).reshape(resamples, subjects).astype(float)
+
+
+def group_curve(curves, resamples=RESAMPLES, confidence=CONFIDENCE, seed=None):
+    """ Function to average the curves over the subjects with percentile bootstrap confidence intervals
+    Args:
+        curves: np.ndarray (subjects, attempts), error angles, NaN for missing values (see aligned_curves())
+        resamples: int, number of bootstrap resamples
+        confidence: float, confidence level of the intervals
+        seed: int, optional, seed of the random generator
+    Returns:
+        curve: DataFrame with one row per attempt: attempts, mean, ci_low, ci_high and subjects (number of subjects
+        with a value)
+    """
+    present = ~np.isnan(curves)
+    values = np.where(present, curves, 0)
+    subjects = present.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = values.sum(axis=0) / subjects
+
+        # means of all resamples and attempts, weighted by the counts of the subjects
+        counts = bootstrap_counts(np.random.default_rng(seed), len(curves), resamples)
+        resampled = (counts @ values) / (counts @ present)
+
+    quantiles = [(1 - confidence) / 2, (1 + confidence) / 2]
+    if np.isnan(resampled).any():  # attempts with only a few subjects, some resamples have no value
+        ci_low, ci_high = np.nanquantile(resampled, quantiles, axis=0)
+    else:
+        ci_low, ci_high = np.quantile(resampled, quantiles, axis=0)
+    return pd.DataFrame({'attempts': np.arange(1, curves.shape[1] + 1), 'mean': mean, 'ci_low': ci_low,
+                         'ci_high': ci_high, 'subjects': subjects})
+
+
+def plot_group(curve, template, path, script, confidence=CONFIDENCE, formats=('png',), dpi=Reader_module.FIGURE_DPI,
+               interactive=False):
+    """ Function to plot the group curve with its confidence interval and the experimental conditions and save
+    the plot as group_{script}.png (and/or .svg, .pdf)
+    Args:
+        curve: DataFrame, the group curve (see group_curve())
+        template: DataFrame, data of one session with the experimental conditions of every attempt
+        path: str, folder of the plot
+        script: str, experimental setup
+        confidence: float, confidence level of the intervals, for the legend
+        formats: tuple of str, file formats, see Reader_module.FIGURE_FORMATS
+        dpi: float, resolution of the raster formats in dots per inch
+        interactive: True to create the figure with pyplot, so it can be shown with plt.show()
+    Returns:
+        fig: The matplotlib figure
+    """
+    fig = plt.figure(figsize=Reader_module.FIGURE_SIZE) if interactive else Figure(figsize=Reader_module.FIGURE_SIZE)
+    ax1 = fig.subplots()
+
+    limit = np.nanmax(np.abs(curve[['ci_low', 'ci_high', 'mean']].to_numpy()), initial=0)
+    y_lim_max = float(f'{limit + 0.1:.1f}')
+    y_lim_min = -y_lim_max
+    ax1.set_ylim(y_lim_min, y_lim_max)
+
+    ax1.fill_between(curve['attempts'], curve['ci_low'], curve['ci_high'], color='blue', alpha=0.25, linewidth=0,
+                     label=f'{confidence:.0%} confidence\ninterval')
+    ax1.plot(curve['attempts'], curve['mean'], 'b-', label='mean error angle')
+    boundaries = Reader_module.regime_boundaries(session_output.typed_data(template))
+    motor_noise_handles = Reader_module.plot_regimes(ax1, boundaries, y_lim_min, y_lim_max)
+
+    ax1.autoscale_view()
+    ax1.set_xlabel('Attempts')
+    ax1.set_ylabel('Error angles (rad)')
+    ax1.axhline(0, color='black', linewidth=0.7)
+    handles, labels = ax1.get_legend_handles_labels()
+    ax1.legend(handles + motor_noise_handles, labels + [handle.get_label() for handle in motor_noise_handles],
+               loc='center left', bbox_to_anchor=(1.05, 0.5))
+    fig.subplots_adjust(right=0.85, left=0.05)
+    ax1.set_title(f'Group learning curve of {int(curve["subjects"].max())} subjects in the {script} experiment')
+    Reader_module.save_figure(fig, path, formats, dpi, name=f'group_{script}')
+    return fig
+
+
+def run_group(file_saving_root, script, resamples=RESAMPLES, confidence=CONFIDENCE, seed=None, include_test=False,
+              critical_angle=CRITICAL_ANGLE, formats=('png',), dpi=Reader_module.FIGURE_DPI):
+    """ Function to compute, save and plot the group curve of an experimental setup
+    Args:
+        file_saving_root: str, root folder of the experiment
+        script: str, experimental setup
+        resamples: int, number of bootstrap resamples
+        confidence: float, confidence level of the intervals
+        seed: int, optional, seed of the random generator
+        include_test: bool, True to include the sessions run in test mode
+        critical_angle: float, critical angle in degrees of the outliers
+        formats: tuple of str, file formats of the plot, see Reader_module.FIGURE_FORMATS
+        dpi: float, resolution of the raster formats in dots per inch
+    Returns:
+        curve: DataFrame, the group curve (see group_curve()), also saved as {root}/group_{script}.csv
+    """
+    sessions, group_data = load_group(file_saving_root, script, include_test)
+    if not group_data:
+        raise ValueError(f'No sessions of {script} in {file_saving_root}')
+    print(f'{len(group_data)} sessions of {script} found in {file_saving_root}')
+
+    curve = group_curve(aligned_curves(group_data, critical_angle), resamples, confidence, seed)
+    curve.to_csv(os.path.join(file_saving_root, f'group_{script}.csv'), index=False)
+    template = max(group_data, key=len)  # the longest session has the conditions of all attempts
+    plot_group(curve, template, file_saving_root, script, confidence, formats, dpi)
+    return curve
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plot the group learning curve of an experimental setup')
+    parser.add_argument('root', help='root folder of the experiment')
+    parser.add_argument('script', help='experimental setup (script or schedule file name)')
+    parser.add_argument('--resamples', type=int, default=RESAMPLES, help='number of bootstrap resamples')
+    parser.add_argument('--confidence', type=float, default=CONFIDENCE, help='confidence level of the intervals')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the bootstrap')
+    parser.add_argument('--include-test', action='store_true', help='include the sessions run in test mode')
+    parser.add_argument('--critical-angle', type=float, default=CRITICAL_ANGLE,
+                        help='critical angle in degrees of the outliers')
+    parser.add_argument('--formats', nargs='+', default=['png'], choices=Reader_module.FIGURE_FORMATS,
+                        help='file formats of the plot (default: png)')
+    parser.add_argument('--dpi', type=float, default=Reader_module.FIGURE_DPI,
+                        help='resolution of the raster plot in dots per inch')
+    arguments = parser.parse_args()
+    run_group(arguments.root, arguments.script, arguments.resamples, arguments.confidence, arguments.seed,
+              arguments.include_test, arguments.critical_angle, arguments.formats, arguments.dpi)
@@ -0,0 +1,122 @@
+"""
+Headless simulation of the reaching game.
+This module runs an experimental setup script through the game engine without a display and without a frame clock.
+The mouse is replaced by a synthetic reacher, which moves the mouse from the start position towards the target,
+returns to the start position after each attempt and adapts its aim to the experienced error angles.
+The simulation time advances by one frame duration per step, so hundreds of attempts are simulated in a fraction
+of a second. It is meant to check new *_script.py schedules before a participant sits down, e.g.:
+
+    session = run_simulation('feedback_script', seed=1)
+    print(pd.DataFrame(session['data']))
+"""
+
+import math
+import random
+
+import game_engine
+import schedule
+
+
+class SimulatedClock:
+    """
+    Clock advancing by a fixed frame duration, replaces pygame.time.get_ticks in the headless mode.
+    """
+
+    def __init__(self, frame_ms=1000 / 60):
+        self.frame_ms = frame_ms
+        self.ticks = 1.0  # start_time == 0 means 'no timer' in the game engine
+
+    def tick(self):
+        self.ticks += self.frame_ms
+
+    def get_ticks(self):
+        return int(self.ticks)
+
+
+class SyntheticReacher:
+    """
+    Synthetic participant replacing the mouse in the headless mode, provides get_pos() and set_pos() as pygame.mouse.
+    The reacher aims at the target with an adaptive aim offset and a gaussian aiming noise:
+        aim_angle = target_angle + aim_offset + noise
+    After every attempt the aim offset is corrected by a fraction of the error angle (learning_rate).
+    Args:
+        session: dict, the game session the reacher is playing
+        speed: float, mouse displacement per frame in pixels
+        aim_noise: float, std. dev. of the aiming noise in radians
+        learning_rate: float, fraction of the error angle corrected after each attempt
+        seed: int, seed of the aiming noise
+    """
+
+    def __init__(self, session, speed=25.0, aim_noise=0.02, learning_rate=0.2, seed=None):
+        self.session = session
+        self.speed = speed
+        self.aim_noise = aim_noise
+        self.learning_rate = learning_rate
+        self.rng = random.Random(seed)
+        self.aim_offset = 0.0
+        self.aim_angle = None
+        self.attempts = 0
+        self.pos = session['START_POSITION']
+
+    def get_pos(self):
+        return self.pos
+
+    def set_pos(self, pos):
+        self.pos = tuple(pos)
+
+    def move(self):
+        """
+        Moves the mouse by one frame: towards the target if there is one, otherwise back to the start position.
+        """
+        dynamic_variables = self.session['dynamic_variables']
+        start_x, start_y = self.session['START_POSITION']
+
+        # adapt the aim after each finished attempt
+        if dynamic_variables['attempts'] != self.attempts:
+            self.attempts = dynamic_variables['attempts']
+            self.aim_offset -= self.learning_rate * dynamic_variables['error_angle']
+
+        target = dynamic_variables['target']
+        if target:
+            if self.aim_angle is None:
+                target_angle = math.atan2(target[1] - start_y, target[0] - start_x)
+                self.aim_angle = target_angle + self.aim_offset + self.rng.gauss(0, self.aim_noise)
+            self.pos = (self.pos[0] + self.speed * math.cos(self.aim_angle),
+                        self.pos[1] + self.speed * math.sin(self.aim_angle))
+        else:
+            self.aim_angle = None
+            distance = math.hypot(self.pos[0] - start_x, self.pos[1] - start_y)
+            if distance > self.speed:
+                self.pos = (self.pos[0] + self.speed * (start_x - self.pos[0]) / distance,
+                            self.pos[1] + self.speed * (start_y - self.pos[1]) / distance)
+
+
+def run_simulation(exp_setup, width=1680, height=1050, frame_ms=1000 / 60, max_frames=1_000_000, seed=None,
+                   **reacher_parameters):
+    """ Function to run a whole experimental setup script with a synthetic reacher and without a display
+    Args:
+        exp_setup: str, name of the experimental setup script (e.g. 'feedback_script') or path to a schedule file
+        width: int, width of the simulated playing field in pixels
+        height: int, height of the simulated playing field in pixels
+        frame_ms: float, simulated frame duration in ms
+        max_frames: int, the simulation stops after this number of frames even if the script is still running
+        seed: int, seed of the random streams of the session (see random_streams.py) and of the aiming noise
+        **reacher_parameters: keyword arguments passed to SyntheticReacher
+    Returns:
+        session: dict, the finished game session, session['data'] contains the recorded data
+    """
+    setup_schedule = schedule.load_setup(exp_setup, game_engine.default_parameters)
+    session = game_engine.new_session(setup_schedule, width, height, seed)
+    reacher = SyntheticReacher(session, seed=seed, **reacher_parameters)
+    clock = SimulatedClock(frame_ms)
+
+    frames = 0
+    while session['parameters']['running'] and frames < max_frames:
+        game_engine.update_parameters(session)
+        reacher.move()
+        game_engine.step(session, reacher, clock.get_ticks)
+        clock.tick()
+        frames += 1
+
+    session['frames'] = frames
+    return session
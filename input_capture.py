@@ -0,0 +1,123 @@
+"""
+High-rate mouse sampling, independent of the render rate.
+The game loop renders at 60 Hz, but between two frames the mouse is polled at a much higher rate (1000 Hz by default)
+and every sample is stored with a time.perf_counter_ns() timestamp in a preallocated NumPy ring buffer.
+The polling replaces the frame clock (clock.tick(60)): wait_next_frame() samples the mouse until the deadline
+of the next frame, so the render load doesn't change.
+SDL events may only be pumped from the thread which created the window (macOS), therefore the sampling runs
+in the main thread between the frames instead of a separate thread. No samples are taken while a frame is rendered,
+the faster the rendering, the shorter these gaps.
+The ring buffer is a dictionary:
+    buffer['samples']: np.ndarray (capacity, 3) of int64: timestamp in ns, x and y mouse position in pixels
+    buffer['count']: int, total number of samples pushed, the last 'capacity' samples are kept
+"""
+
+import time
+
+import numpy as np
+import pygame
+
+SAMPLING_RATE = 1000  # Hz
+FRAME_RATE = 60  # Hz
+BUFFER_CAPACITY = 2 ** 20  # ~17 min at 1000 Hz
+
+
+def new_ring_buffer(capacity=BUFFER_CAPACITY):
+    """ Function to create a preallocated ring buffer for mouse samples
+    Args:
+        capacity: int, number of samples kept in the buffer
+    Returns:
+        buffer: dict, the ring buffer
+    """
+    return {'samples': np.zeros((capacity, 3), dtype=np.int64), 'count': 0}
+
+
+def push_sample(buffer, timestamp, x, y):
+    """ Function to add a sample to the ring buffer, the oldest sample is overwritten if the buffer is full
+    Args:
+        buffer: dict, the ring buffer
+        timestamp: int, time.perf_counter_ns() of the sample
+        x, y: int, mouse position in pixels
+    """
+    samples = buffer['samples']
+    samples[buffer['count'] % len(samples)] = (timestamp, x, y)
+    buffer['count'] += 1
+
+
+def read_samples(buffer, since=None, until=None):
+    """ Function to read the samples of the ring buffer in chronological order
+    Args:
+        buffer: dict, the ring buffer
+        since: int, optional, only samples with timestamp >= since (ns) are returned
+        until: int, optional, only samples with timestamp < until (ns) are returned
+    Returns:
+        samples: np.ndarray (n, 3) copy of the samples: timestamp in ns, x, y
+    """
+    samples = buffer['samples']
+    capacity = len(samples)
+    count = buffer['count']
+    if count <= capacity:
+        ordered = samples[:count]
+    else:
+        start = count % capacity
+        ordered = np.concatenate((samples[start:], samples[:start]))
+
+    # timestamps are sorted, so the time window is found with binary search
+    first = 0 if since is None else np.searchsorted(ordered[:, 0], since, side='left')
+    last = len(ordered) if until is None else np.searchsorted(ordered[:, 0], until, side='left')
+    return ordered[first:last].copy()
+
+
+def new_capture(sampling_rate=SAMPLING_RATE, frame_rate=FRAME_RATE, capacity=BUFFER_CAPACITY):
+    """ Function to create the mouse capture state
+    Args:
+        sampling_rate: int, mouse sampling rate in Hz
+        frame_rate: int, render rate in Hz
+        capacity: int, capacity of the ring buffer
+    Returns:
+        capture: dict with the ring buffer and the sampling and frame periods
+    """
+    return {
+        'buffer': new_ring_buffer(capacity),
+        'sample_period': 1_000_000_000 // sampling_rate,  # ns
+        'frame_period': 1_000_000_000 // frame_rate,  # ns
+        'next_frame': time.perf_counter_ns(),
+    }
+
+
+def sample_mouse(capture):
+    """ Function to take one mouse sample: pump the SDL events and store the current mouse position
+    Args:
+        capture: dict, the mouse capture state
+    """
+    pygame.event.pump()  # events stay in the queue for the event handling of the game loop
+    x, y = pygame.mouse.get_pos()
+    push_sample(capture['buffer'], time.perf_counter_ns(), x, y)
+
+
+def wait_next_frame(capture):
+    """ Function to sample the mouse at the sampling rate until the deadline of the next frame, replaces clock.tick()
+    Args:
+        capture: dict, the mouse capture state
+    Returns:
+        late: bool, True if the deadline of the frame had already passed (the frame took too long)
+    """
+    capture['next_frame'] += capture['frame_period']
+    now = time.perf_counter_ns()
+    if now >= capture['next_frame']:
+        # don't try to catch up the missed frames
+        capture['next_frame'] = now
+        sample_mouse(capture)
+        return True
+
+    next_sample = now
+    while now < capture['next_frame']:
+        if now >= next_sample:
+            sample_mouse(capture)
+            next_sample += capture['sample_period']
+        now = time.perf_counter_ns()
+        sleep = min(next_sample, capture['next_frame']) - now
+        if sleep > 200_000:  # sleep only if it's worth it, otherwise spin for precision
+            time.sleep((sleep - 100_000) / 1e9)
+            now = time.perf_counter_ns()
+    return False
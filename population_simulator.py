@@ -0,0 +1,208 @@
+"""
+Vectorized population simulator for experiment design.
+A compiled experimental schedule is run by N virtual learners at once: the attempts are simulated one after
+the other, but all learners of an attempt are updated with array operations, so 10,000 learners x 400 attempts
+take about a second. The predicted error curves are meant for the design of a protocol (e.g. motor_noise_script)
+and for power analysis by parameter sweeps, before participants are recorded.
+
+The schedule supplies the parameters of every attempt (schedule.parameters_at): perturbation mode and angle,
+gradual ramp steps (as in game_engine.movement_parameters), motor noise and feedback mode.
+The learners follow the standard state-space model of visuomotor adaptation:
+    error[n] = aim[n] + execution_noise - total_perturbation[n]
+    aim[n + 1] = retention * aim[n] - learning_rate * feedback_gain * error[n] + planning_noise
+with the aim (hand direction relative to the target) and the errors in radians. Retention and learning rate vary
+between learners (normal distribution, clipped to [0, 1]).
+
+The simulated data has the columns of experimental_data.csv, so the predicted curves can be plotted
+with Reader_module, e.g.:
+
+    population = simulate_population('motor_noise_script', learners=10000, seed=1)
+    write_experimental_data(population, 'prediction/P_sim/motor_noise_script/experimental_data.csv')
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+import game_engine
+import random_streams
+import schedule
+
+# relative learning rate in each feedback mode
+FEEDBACK_GAINS = {False: 1.0, 'trajectory': 1.0, 'end_pos': 1.0, 'reinforcement': 0.5}
+
+# learner model defaults
+RETENTION = 0.98
+RETENTION_SD = 0.01
+LEARNING_RATE = 0.15
+LEARNING_RATE_SD = 0.05
+EXECUTION_NOISE = 2.0  # degrees
+PLANNING_NOISE = 0.5  # degrees
+
+# columns of experimental_data.csv (game_engine.new_session) and the columns taken from the schedule parameters
+DATA_COLUMNS = ['attempts', 'error_angle', 'move_faster', 'perturbation_mode', 'total_perturbation', 'motor_noise',
+                'MASK_RADIUS', 'sequence_target', 'max_perturbation', 'feedback']
+SCHEDULE_COLUMNS = ('perturbation_mode', 'motor_noise', 'MASK_RADIUS', 'sequence_target', 'max_perturbation',
+                    'feedback')
+
+
+def schedule_arrays(setup_schedule, attempts=None):
+    """ Function to expand a compiled schedule into per-attempt arrays
+    Args:
+        setup_schedule: dict, compiled parameter schedule (see schedule.py)
+        attempts: int, optional, number of attempts, by default the attempts until the schedule stops
+    Returns:
+        arrays: dict with a value per attempt of the SCHEDULE_COLUMNS and
+            'perturbation_angle': np.ndarray, perturbation angle in degrees (NaN for random perturbation)
+    """
+    if attempts is None:
+        attempts = setup_schedule['last_attempt']
+    parameters = [schedule.parameters_at(setup_schedule, attempt) for attempt in range(attempts)]
+    arrays = {column: np.array([attempt_parameters[column] for attempt_parameters in parameters], dtype=object)
+              for column in SCHEDULE_COLUMNS}
+
+    # perturbation angle per attempt with the gradual ramp of game_engine.movement_parameters
+    perturbation_angle = np.zeros(attempts)
+    angle = 0.0
+    gradual_attempts = 1
+    for attempt, attempt_parameters in enumerate(parameters):
+        mode = attempt_parameters['perturbation_mode']
+        if mode == 'sudden':
+            angle = attempt_parameters['max_perturbation']
+        elif mode == 'gradual':
+            gradual_attempts += 1
+            angle = min(math.ceil(gradual_attempts / 3), 10) * attempt_parameters['max_perturbation'] / 10
+        elif mode == 'random':
+            angle = np.nan
+        elif mode == False:
+            angle = 0.0
+            gradual_attempts = 1
+        perturbation_angle[attempt] = angle
+    arrays['perturbation_angle'] = perturbation_angle
+    return arrays
+
+
+def draw_perturbations(arrays, learners, generator):
+    """ Function to draw the total perturbation of every learner and attempt
+    Args:
+        arrays: dict, per-attempt schedule arrays (see schedule_arrays())
+        learners: int, number of learners
+        generator: np.random.Generator
+    Returns:
+        total_perturbation: np.ndarray (learners, attempts), total perturbation in radians
+    """
+    attempts = len(arrays['perturbation_angle'])
+    perturbation = np.broadcast_to(arrays['perturbation_angle'], (learners, attempts)).copy()
+
+    random_attempts = np.flatnonzero(np.isnan(arrays['perturbation_angle']))
+    perturbation[:, random_attempts] = generator.uniform(-random_streams.PERTURBATION_LIMIT,
+                                                         random_streams.PERTURBATION_LIMIT,
+                                                         (learners, len(random_attempts)))
+
+    # truncated normal motor noise, drawn for all attempts with the same noise level at once
+    motor_noise = arrays['motor_noise'].astype(float)
+    for level in np.unique(motor_noise[motor_noise != 0]):
+        noise_attempts = np.flatnonzero(motor_noise == level)
+        noise = random_streams.truncated_normal(generator, level, learners * len(noise_attempts))
+        perturbation[:, noise_attempts] += noise.reshape(learners, len(noise_attempts))
+    return np.radians(perturbation)
+
+
+def simulate_population(exp_setup, learners=1000, seed=None, attempts=None, retention=RETENTION,
+                        retention_sd=RETENTION_SD, learning_rate=LEARNING_RATE, learning_rate_sd=LEARNING_RATE_SD,
+                        execution_noise=EXECUTION_NOISE, planning_noise=PLANNING_NOISE, feedback_gains=None):
+    """ Function to simulate a population of learners in an experimental setup
+    Args:
+        exp_setup: str, name of the experimental setup script or path to a schedule file, or a compiled schedule
+        learners: int, number of simulated learners
+        seed: int, seed of the random generator
+        attempts: int, optional, number of attempts, by default the attempts until the schedule stops
+        retention: float, mean retention factor of the learners
+        retention_sd: float, std. dev. of the retention factor between learners
+        learning_rate: float, mean learning rate of the learners
+        learning_rate_sd: float, std. dev. of the learning rate between learners
+        execution_noise: float, std. dev. of the execution noise in degrees
+        planning_noise: float, std. dev. of the planning noise in degrees
+        feedback_gains: dict, optional, relative learning rate in each feedback mode, by default FEEDBACK_GAINS
+    Returns:
+        population: dict with
+            'error_angle': np.ndarray (learners, attempts), error angles in radians
+            'total_perturbation': np.ndarray (learners, attempts), total perturbation in radians
+            'retention', 'learning_rate': np.ndarray (learners,), parameters of the learners
+            'schedule': dict, per-attempt schedule arrays (see schedule_arrays())
+    """
+    if isinstance(exp_setup, dict):
+        setup_schedule = exp_setup
+    else:
+        setup_schedule = schedule.load_setup(exp_setup, game_engine.default_parameters)
+    if feedback_gains is None:
+        feedback_gains = FEEDBACK_GAINS
+
+    generator = np.random.default_rng(seed)
+    arrays = schedule_arrays(setup_schedule, attempts)
+    total_perturbation = draw_perturbations(arrays, learners, generator)
+    gains = np.array([feedback_gains[feedback] for feedback in arrays['feedback']])
+
+    learner_retention = np.clip(generator.normal(retention, retention_sd, learners), 0, 1)
+    learner_learning_rate = np.clip(generator.normal(learning_rate, learning_rate_sd, learners), 0, 1)
+    execution = generator.normal(0, np.radians(execution_noise), total_perturbation.shape)
+    planning = generator.normal(0, np.radians(planning_noise), total_perturbation.shape)
+
+    error_angle = np.empty_like(total_perturbation)
+    aim = np.zeros(learners)
+    for attempt in range(total_perturbation.shape[1]):
+        error = aim + execution[:, attempt] - total_perturbation[:, attempt]
+        error_angle[:, attempt] = (error + np.pi) % (2 * np.pi) - np.pi  # wrap to -pi to pi
+        aim = learner_retention * aim - learner_learning_rate * gains[attempt] * error + planning[:, attempt]
+
+    return {
+        'error_angle': error_angle,
+        'total_perturbation': total_perturbation,
+        'retention': learner_retention,
+        'learning_rate': learner_learning_rate,
+        'schedule': arrays,
+    }
+
+
+def to_experimental_data(population, learner=None):
+    """ Function to convert the simulated population to the format of experimental_data.csv
+    Args:
+        population: dict, the simulated population (see simulate_population())
+        learner: int, optional, index of the learner, by default the mean over the learners
+    Returns:
+        data: pd.DataFrame with the columns of experimental_data.csv
+    """
+    if learner is None:
+        error_angle = population['error_angle'].mean(axis=0)
+        total_perturbation = population['total_perturbation'].mean(axis=0)
+    else:
+        error_angle = population['error_angle'][learner]
+        total_perturbation = population['total_perturbation'][learner]
+
+    arrays = population['schedule']
+    data = {'attempts': np.arange(1, len(error_angle) + 1),
+            'error_angle': error_angle,
+            'move_faster': False,
+            'perturbation_mode': arrays['perturbation_mode'],
+            'total_perturbation': total_perturbation,
+            'motor_noise': arrays['motor_noise'],
+            'MASK_RADIUS': arrays['MASK_RADIUS'],
+            'sequence_target': arrays['sequence_target'],
+            'max_perturbation': arrays['max_perturbation'],
+            'feedback': arrays['feedback']}
+    return pd.DataFrame(data, columns=DATA_COLUMNS)
+
+
+def write_experimental_data(population, file_path, learner=None):
+    """ Function to save the simulated data as experimental_data.csv, e.g. to plot it with Reader_module
+    Args:
+        population: dict, the simulated population (see simulate_population())
+        file_path: str, path to the csv file
+        learner: int, optional, index of the learner, by default the mean over the learners
+    """
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    to_experimental_data(population, learner).to_csv(file_path, index=False)
@@ -0,0 +1,148 @@
+"""
+Seeded random streams of a game session.
+All random values of the game (motor noise, random perturbation and random target angle) are drawn from
+a per-session numpy.random.Generator created from a seed. At the start of the session the values for the whole
+schedule are pre-generated into tables, so a draw in the game loop is an array lookup:
+    'motor_noise': truncated normal motor noise in degrees (|noise| <= NOISE_LIMIT), one table per motor_noise level
+                   found in the schedule (initial parameters, changes and keyboard events)
+    'perturbation': uniform random perturbation angle in degrees (-PERTURBATION_LIMIT to +PERTURBATION_LIMIT)
+    'target': uniform random target angle in radians (0 to 2 pi)
+Each stream has a draw counter, the n-th draw of a stream is always the n-th value of its table. If a table is
+exhausted (e.g. attempts excluded and repeated) or a motor_noise level is not in the schedule, the value is generated
+from a generator seeded with (seed, stream, draw), so the values stay reproducible.
+The seed is saved with the data of the session (session_info.json), the same seed and the same schedule
+reproduce the session exactly.
+The streams are a dictionary created by new_streams().
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+STREAMS = ('motor_noise', 'perturbation', 'target')
+NOISE_LIMIT = 10  # degrees
+PERTURBATION_LIMIT = 45  # degrees
+TABLE_MARGIN = 2  # the tables have TABLE_MARGIN draws per attempt of the schedule
+SESSION_INFO_NAME = 'session_info.json'
+
+
+def new_seed():
+    """ Function to get a new random seed from the OS entropy
+    Returns:
+        seed: int
+    """
+    return int(np.random.SeedSequence().entropy)
+
+
+def truncated_normal(generator, sigma, size, limit=NOISE_LIMIT):
+    """ Function to draw values from a normal distribution truncated at +-limit
+    Args:
+        generator: np.random.Generator
+        sigma: float, std. dev. of the normal distribution
+        size: int, number of values
+        limit: float, values with absolute value above limit are drawn again
+    Returns:
+        values: np.ndarray of float
+    """
+    values = generator.normal(0, sigma, size)
+    rejected = np.flatnonzero(np.abs(values) > limit)
+    while len(rejected):
+        values[rejected] = generator.normal(0, sigma, len(rejected))
+        rejected = rejected[np.abs(values[rejected]) > limit]
+    return values
+
+
+def noise_levels(setup_schedule):
+    """ Function to collect the motor_noise levels used in a schedule
+    Args:
+        setup_schedule: dict, compiled parameter schedule (see schedule.py)
+    Returns:
+        levels: sorted list of the non-zero motor_noise values
+    """
+    parameter_sets = [setup_schedule['initial'], *setup_schedule['changes'].values(),
+                      *setup_schedule['events'].values()]
+    return sorted({float(parameters['motor_noise']) for parameters in parameter_sets
+                   if parameters.get('motor_noise', 0) != 0})
+
+
+def new_streams(setup_schedule, seed=None):
+    """ Function to create the random streams of a session and pre-generate their tables
+    Args:
+        setup_schedule: dict, compiled parameter schedule (see schedule.py)
+        seed: int, optional, seed of the session, a new seed is generated if it's None
+    Returns:
+        streams: dict with the seed, the tables and the draw counters
+    """
+    if seed is None:
+        seed = new_seed()
+    generator = np.random.default_rng(seed)
+    size = TABLE_MARGIN * (setup_schedule['last_attempt'] + 1)
+    tables = {
+        'motor_noise': {level: truncated_normal(generator, level, size) for level in noise_levels(setup_schedule)},
+        'perturbation': generator.uniform(-PERTURBATION_LIMIT, PERTURBATION_LIMIT, size),
+        'target': generator.uniform(0, 2 * math.pi, size),
+    }
+    return {'seed': seed, 'tables': tables, 'draws': dict.fromkeys(STREAMS, 0)}
+
+
+def generate_value(seed, stream, draw, motor_noise=0.0):
+    """ Function to generate a value which is not in the tables, seeded with the session seed, the stream and the draw
+    Args:
+        seed: int, seed of the session
+        stream: str, one of STREAMS
+        draw: int, draw counter of the stream
+        motor_noise: float, motor_noise level for the 'motor_noise' stream
+    Returns:
+        value: float
+    """
+    generator = np.random.default_rng((seed, STREAMS.index(stream), draw))
+    if stream == 'motor_noise':
+        return float(truncated_normal(generator, motor_noise, 1)[0])
+    if stream == 'perturbation':
+        return float(generator.uniform(-PERTURBATION_LIMIT, PERTURBATION_LIMIT))
+    return float(generator.uniform(0, 2 * math.pi))
+
+
+def draw(streams, stream, motor_noise=0.0):
+    """ Function to draw the next value of a stream
+    Args:
+        streams: dict, the random streams of the session
+        stream: str, one of STREAMS
+        motor_noise: float, motor_noise level for the 'motor_noise' stream
+    Returns:
+        value: float, motor noise or perturbation angle in degrees, or target angle in radians
+    """
+    index = streams['draws'][stream]
+    streams['draws'][stream] += 1
+    table = streams['tables'][stream]
+    if stream == 'motor_noise':
+        table = table.get(float(motor_noise))
+    if table is not None and index < len(table):
+        return float(table[index])
+    return generate_value(streams['seed'], stream, index, motor_noise)
+
+
+def save_session_info(directory, info):
+    """ Function to save the information needed to reproduce the session (seed, setup, participant)
+    Args:
+        directory: str, session folder (file saving path)
+        info: dict, information about the session, must contain the 'seed'
+    """
+    with open(os.path.join(directory, SESSION_INFO_NAME), 'w') as file:
+        json.dump(info, file, indent=4)
+
+
+def load_seed(directory):
+    """ Function to load the seed of a session
+    Args:
+        directory: str, session folder
+    Returns:
+        seed: int or None if the session has no saved seed
+    """
+    file_path = os.path.join(directory, SESSION_INFO_NAME)
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path) as file:
+        return json.load(file).get('seed')
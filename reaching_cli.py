@@ -0,0 +1,131 @@
+"""
+Command line entry point of the reaching game and the analysis, without any Tk dialog.
+The same functions as the Tk menus are used: a session is run by game_session.run_session() (like Reaching game.py)
+and analysed by batch_analysis (like Reader_module.py), so scripted, automated or remote runs give the same files.
+Subcommands:
+    run: run a session with the given participant, setup, root folder, mode and seed, optionally analyse it
+    analyse: analyse session files (experimental_data.csv) or all sessions of experiment root folders
+Usage:
+    python reaching_cli.py run --participant ID --setup SETUP --root ROOT [--mode test|full_screen] [--resume]
+                               [--seed SEED] [--resolution WIDTH HEIGHT] [--capture-attempts] [--record]
+                               [--record-rate HZ] [--record-width PIXELS] [--dashboard [PORT]]
+                               [--formats png svg pdf] [--dpi DPI]
+    python reaching_cli.py analyse PATH [PATH ...] [--workers N] [--include-test] [--critical-angle DEG]
+                                   [--formats png svg pdf] [--dpi DPI] [--no-cache]
+"""
+
+import argparse
+import os
+
+from defaults import CRITICAL_ANGLE, DASHBOARD_PORT, FIGURE_DPI, FIGURE_FORMATS, RECORD_RATE, RECORD_WIDTH
+
+MODES = ('test', 'full_screen')
+
+
+def run(arguments):
+    """ Function of the run subcommand: runs a session and analyses it if figure formats are given
+    Args:
+        arguments: argparse.Namespace, the parsed arguments
+    """
+    import game_session
+
+    file_saving_path = game_session.run_session(
+        arguments.setup, arguments.participant, arguments.root, test_mode=arguments.mode == 'test',
+        resume=arguments.resume, seed=arguments.seed, user_screen=arguments.resolution,
+        capture_attempts=arguments.capture_attempts, record_session=arguments.record, record_rate=arguments.record_rate,
+        record_width=arguments.record_width, dashboard_port=arguments.dashboard)
+    if not arguments.formats:
+        return
+    import batch_analysis
+    import session_output
+
+    file_path = os.path.join(file_saving_path, session_output.CSV_NAME)
+    if session_output.read_experimental_data(file_path).empty:
+        print('no attempts, the session is not analysed')
+        return
+    batch_analysis.analyse_session(file_path, critical_angle=arguments.critical_angle, formats=tuple(arguments.formats),
+                                   dpi=arguments.dpi)
+    print('session analysed:', file_saving_path)
+
+
+def analyse(arguments):
+    """ Function of the analyse subcommand: analyses session files and experiment root folders
+    Args:
+        arguments: argparse.Namespace, the parsed arguments
+    """
+    import batch_analysis
+
+    for path in arguments.paths:
+        if os.path.isdir(path):
+            batch_analysis.run_batch(path, arguments.workers, arguments.include_test, arguments.critical_angle,
+                                     tuple(arguments.formats), arguments.dpi, not arguments.no_cache)
+        elif os.path.isfile(path):
+            batch_analysis.analyse_session(path, critical_angle=arguments.critical_angle,
+                                           formats=tuple(arguments.formats), dpi=arguments.dpi)
+            print('session analysed:', os.path.dirname(path))
+        else:
+            raise FileNotFoundError(f'{path} is neither a session file nor a root folder')
+
+
+def add_figure_arguments(parser, default_formats):
+    """ Function to add the arguments of the analysis figures and tables to a subcommand
+    Args:
+        parser: argparse.ArgumentParser of the subcommand
+        default_formats: list of str, default file formats of the figures
+    """
+    parser.add_argument('--formats', nargs='+', default=default_formats, choices=FIGURE_FORMATS,
+                        help=f'file formats of the figures (default: {" ".join(default_formats) or "none"})')
+    parser.add_argument('--dpi', type=float, default=FIGURE_DPI,
+                        help='resolution of the raster figures in dots per inch')
+    parser.add_argument('--critical-angle', type=float, default=CRITICAL_ANGLE,
+                        help='critical angle in degrees of the outliers')
+
+
+def parse_arguments(argv=None):
+    """ Function to parse the command line
+    Args:
+        argv: list of str, optional, the arguments, by default sys.argv[1:]
+    Returns:
+        arguments: argparse.Namespace, with the function of the subcommand in arguments.command
+    """
+    parser = argparse.ArgumentParser(description='Run sessions of the reaching game and analyse them without dialogs')
+    subparsers = parser.add_subparsers(title='subcommands', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run a session of the reaching game')
+    run_parser.add_argument('--participant', required=True, help='participant ID')
+    run_parser.add_argument('--setup', required=True,
+                            help='setup script name (e.g. feedback_script) or path to a .json/.toml schedule file')
+    run_parser.add_argument('--root', required=True, help='root folder of the experiment')
+    run_parser.add_argument('--mode', choices=MODES, default='test',
+                            help='test: window with the test information, full_screen: the experiment (default: test)')
+    run_parser.add_argument('--resume', action='store_true', help='continue the last interrupted session')
+    run_parser.add_argument('--seed', type=int, default=None, help='seed of the random streams (default: new seed)')
+    run_parser.add_argument('--resolution', type=int, nargs=2, default=None, metavar=('WIDTH', 'HEIGHT'),
+                            help='screen resolution (default: resolution of the primary monitor)')
+    run_parser.add_argument('--capture-attempts', action='store_true', help='save the last frame of every attempt')
+    run_parser.add_argument('--record', action='store_true', help='record a video of the session')
+    run_parser.add_argument('--record-rate', type=float, default=RECORD_RATE,
+                            help='recording rate in frames per second')
+    run_parser.add_argument('--record-width', type=int, default=RECORD_WIDTH,
+                            help='width of the recorded frames in pixels')
+    run_parser.add_argument('--dashboard', type=int, nargs='?', const=DASHBOARD_PORT, default=None, metavar='PORT',
+                            help=f'serve the live dashboard on http://localhost:PORT (default port: {DASHBOARD_PORT})')
+    add_figure_arguments(run_parser, [])
+    run_parser.set_defaults(command=run)
+
+    analyse_parser = subparsers.add_parser('analyse', aliases=['analyze'],
+                                           help='plot, summarize and compute the metrics of sessions')
+    analyse_parser.add_argument('paths', nargs='+',
+                                help='session files (experimental_data.csv) or root folders of experiments')
+    analyse_parser.add_argument('--workers', type=int, default=None,
+                                help='number of processes for the root folders (default: number of CPUs)')
+    analyse_parser.add_argument('--include-test', action='store_true', help='include the sessions run in test mode')
+    analyse_parser.add_argument('--no-cache', action='store_true', help='analyse all sessions again')
+    add_figure_arguments(analyse_parser, ['png'])
+    analyse_parser.set_defaults(command=analyse)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    arguments.command(arguments)
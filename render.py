@@ -0,0 +1,132 @@
+"""
+Render layer of the reaching game with cached text and sprites and dirty-rectangle display updates.
+Instead of clearing the whole screen and flipping the whole display every frame, the renderer:
+    - keeps the Font objects and the rendered text surfaces, a text is rendered again only when its value changes,
+    - blits pre-drawn circle sprites for the target, the cursor and the start position,
+    - records the rectangles drawn in the frame, erases only the rectangles of the previous frame and pushes only
+      the rectangles of both frames to the display (pygame.display.update).
+All drawing of the game loop has to go through the renderer, otherwise it would not be erased in the next frame.
+The renderer is a dictionary created by new_renderer().
+"""
+
+import pygame
+
+BLACK = (0, 0, 0)
+MAX_DIRTY_RECTS = 64  # above this number the dirty rectangles are merged into one
+
+
+def new_renderer(screen, background=BLACK, fonts=None):
+    """ Function to create the renderer of a display surface
+    Args:
+        screen: pygame.Surface, the display surface
+        background: tuple, background color
+        fonts: dict {size: pygame.font.Font}, optional, preloaded fonts (see startup.py)
+    Returns:
+        renderer: dict with the caches and the dirty rectangles
+    """
+    return {
+        'screen': screen,
+        'background': background,
+        'fonts': dict(fonts or {}),  # {size: pygame.font.Font}
+        'texts': {},  # {slot: (text, size, color, surface)}
+        'sprites': {},  # {(color, radius): pygame.Surface}
+        'dirty': [],  # rectangles drawn in the current frame
+        'previous_dirty': [],  # rectangles drawn in the previous frame
+        'full_update': True,  # the whole display is updated in the first frame
+    }
+
+
+def begin_frame(renderer):
+    """ Function to start a new frame: the rectangles drawn in the previous frame are erased
+    Args:
+        renderer: dict, the renderer
+    """
+    screen = renderer['screen']
+    for rect in renderer['dirty']:
+        screen.fill(renderer['background'], rect)
+    renderer['previous_dirty'] = renderer['dirty']
+    renderer['dirty'] = []
+
+
+def end_frame(renderer):
+    """ Function to push the frame to the display: only the rectangles erased and drawn in this frame are updated
+    Args:
+        renderer: dict, the renderer
+    """
+    if renderer['full_update']:
+        pygame.display.flip()
+        renderer['full_update'] = False
+        return
+    rects = renderer['previous_dirty'] + renderer['dirty']
+    if len(rects) > MAX_DIRTY_RECTS:
+        rects = [rects[0].unionall(rects[1:])]
+    pygame.display.update(rects)
+
+
+def get_font(renderer, size):
+    """ Function to get a cached default font of the given size
+    Args:
+        renderer: dict, the renderer
+        size: int, font size
+    Returns:
+        font: pygame.font.Font
+    """
+    fonts = renderer['fonts']
+    if size not in fonts:
+        fonts[size] = pygame.font.Font(None, size)
+    return fonts[size]
+
+
+def text(renderer, slot, string, size, color, **position):
+    """ Function to draw a text, the text surface of the slot is rendered again only if the text changes
+    Args:
+        renderer: dict, the renderer
+        slot: str, name of the text slot (e.g. 'score')
+        string: str, the text
+        size: int, font size
+        color: tuple, text color
+        **position: position of the text rectangle, e.g. topleft=(10, 10) or center=(100, 100)
+    """
+    cached = renderer['texts'].get(slot)
+    if cached is None or cached[:3] != (string, size, color):
+        surface = get_font(renderer, size).render(string, True, color)
+        renderer['texts'][slot] = (string, size, color, surface)
+    else:
+        surface = cached[3]
+    rect = renderer['screen'].blit(surface, surface.get_rect(**position))
+    renderer['dirty'].append(rect)
+
+
+def get_sprite(renderer, color, radius):
+    """ Function to get a cached sprite of a filled circle
+    Args:
+        renderer: dict, the renderer
+        color: tuple, circle color
+        radius: int, circle radius
+    Returns:
+        sprite: pygame.Surface with transparent background
+    """
+    sprites = renderer['sprites']
+    key = (color, radius)
+    if key not in sprites:
+        sprite = pygame.Surface((2 * radius, 2 * radius), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, color, (radius, radius), radius)
+        sprites[key] = sprite
+    return sprites[key]
+
+
+def circle(renderer, color, center, radius, width=0):
+    """ Function to draw a circle, filled circles are blitted from cached sprites
+    Args:
+        renderer: dict, the renderer
+        color: tuple, circle color
+        center: [x, y] coordinates of the circle center
+        radius: float, circle radius
+        width: int, line width, 0 for a filled circle
+    """
+    if width == 0:
+        sprite = get_sprite(renderer, color, int(radius))
+        rect = renderer['screen'].blit(sprite, sprite.get_rect(center=(round(center[0]), round(center[1]))))
+    else:
+        rect = pygame.draw.circle(renderer['screen'], color, center, radius, width)
+    renderer['dirty'].append(rect)
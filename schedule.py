@@ -0,0 +1,339 @@
+"""
+Parameter schedules of the experimental setups.
+An experimental setup is either a script (*_script.py) or a declarative schedule file (.json or .toml).
+Both are compiled once at startup into the same schedule dictionary, so the game loop doesn't call the script
+or look through the blocks on every frame:
+    schedule['initial']: dict, parameters before the first attempt
+    schedule['changes']: dict, {attempts: {parameter: value}} with the parameters changed at the given attempt
+    schedule['events']: dict, {game_event: {parameter: value}} with the parameters set by the keyboard events
+    schedule['last_attempt']: int, attempt at which the experiment stops (running is False)
+    schedule['boundaries']: list, sorted attempts at which the parameters change (interval index)
+    schedule['segments']: list, full parameter dictionaries in effect from the corresponding boundary on
+parameters_at() looks up the parameters of any attempt in O(log n) with a binary search over the boundaries.
+
+SCHEDULE FILES
+A schedule file lists blocks of attempts with the parameter values in effect during the block, e.g. in JSON:
+    {
+        "name": "feedback",
+        "attempts": 400,
+        "parameters": {"target_mode": "sequence", "assisting_circle": true},
+        "blocks": [
+            {"name": "first target", "start": 0, "end": 100, "parameters": {"sequence_target": 60}},
+            {"name": "gradual", "start": 20, "end": 80, "parameters": {"perturbation_mode": "gradual"}}
+        ]
+    }
+    attempts: int, the experiment ends after this number of attempts
+    parameters: dict, values in effect outside the blocks, the game defaults are used for the missing parameters
+    blocks: list of blocks, a block sets its parameters for the attempts from 'start' (included) to 'end' (excluded).
+        Blocks may overlap, but two overlapping blocks can't set the same parameter.
+    events: dict, optional, parameters set by the keyboard events, DEFAULT_EVENTS are used by default
+See the 'schedules' folder for the schedules of the experimental setup scripts.
+"""
+
+import ast
+import bisect
+import importlib
+import inspect
+import json
+import os
+import tomllib
+
+# keyboard events handled by the scripts (see the EVENTS section in the scripts)
+GAME_EVENTS = ('escape', 'test_perturbation', 'end perturbation', 'mask400')
+
+# parameters set by the keyboard events in the schedule files
+DEFAULT_EVENTS = {
+    'escape': {'running': False},
+    'test_perturbation': {'perturbation_mode': 'sudden'},
+    'end perturbation': {'perturbation_mode': False},
+    'mask400': {'MASK_RADIUS': 400},
+}
+
+# allowed values of the mode parameters
+PARAMETER_OPTIONS = {
+    'target_mode': ('fix', 'random', 'sequence'),
+    'perturbation_mode': (False, 'sudden', 'gradual', 'random'),
+    'feedback': (False, 'trajectory', 'end_pos', 'reinforcement'),
+}
+
+# attempts limit for the replay of scripts which never set 'running' to False
+MAX_SCRIPT_ATTEMPTS = 10000
+
+
+### SCHEDULE INDEX ###
+
+def script_parameters(script, defaults):
+    """ Function to get the current parameters of the script, missing values are set to defaults
+    Args:
+        script: imported experimental setup script
+        defaults: dict, default parameters of the game
+    Returns:
+        parameters: dict with the same keys as defaults
+    """
+    parameters = script.return_parameters()
+    return {key: parameters[key] if key in parameters else defaults[key] for key in defaults}
+
+
+def changed_parameters(previous, current):
+    """ Function to find the parameters changed between two parameter dictionaries
+    Note that False and 0 are considered different values (e.g. perturbation_mode False vs motor_noise 0)
+    Args:
+        previous: dict, parameters before the change
+        current: dict, parameters after the change
+    Returns:
+        changes: dict with the changed parameters and their new values
+    """
+    return {key: value for key, value in current.items()
+            if value != previous[key] or type(value) is not type(previous[key])}
+
+
+def build_index(schedule):
+    """ Function to build the interval index of a schedule from its change table
+    Args:
+        schedule: dict, schedule with the 'initial' parameters and the 'changes' table
+    Returns:
+        schedule: the same dict with the 'boundaries' and 'segments' lists added
+    """
+    boundaries = sorted(schedule['changes'])
+    segments = []
+    parameters = schedule['initial']
+    for attempts in boundaries:
+        parameters = {**parameters, **schedule['changes'][attempts]}
+        segments.append(parameters)
+    schedule['boundaries'] = boundaries
+    schedule['segments'] = segments
+    return schedule
+
+
+def parameters_at(schedule, attempts):
+    """ Function to look up the parameters in effect at the given attempt
+    Args:
+        schedule: dict, compiled schedule
+        attempts: int, the attempt number
+    Returns:
+        parameters: dict, parameters in effect at the attempt (without keyboard events)
+    """
+    index = bisect.bisect_right(schedule['boundaries'], attempts) - 1
+    if index < 0:
+        return schedule['initial'].copy()
+    return schedule['segments'][index].copy()
+
+
+### SCRIPTS ###
+
+def duplicate_branches(script):
+    """ Function to find unreachable branches of the scripts, i.e. repeated 'attempts == N' conditions within
+    the same if/elif chain, e.g.:
+        if attempts == 50:
+            ...
+        elif attempts == 50:  # never executed
+    Args:
+        script: imported experimental setup script
+    Returns:
+        duplicates: list of (line number, N) tuples of the unreachable branches
+    """
+    tree = ast.parse(inspect.getsource(script))
+    duplicates = []
+    chained = set()  # 'elif' nodes, already checked as part of their chain
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.If) or id(node) in chained:
+            continue
+        seen = set()
+        while True:
+            test = node.test
+            if (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name) and test.left.id == 'attempts'
+                    and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq)
+                    and isinstance(test.comparators[0], ast.Constant)):
+                value = test.comparators[0].value
+                if value in seen:
+                    duplicates.append((node.lineno, value))
+                seen.add(value)
+            if len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If):
+                node = node.orelse[0]
+                chained.add(id(node))
+            else:
+                break
+    return duplicates
+
+
+def compile_script(script, defaults, max_attempts=MAX_SCRIPT_ATTEMPTS):
+    """ Function to compile an experimental setup script into an attempt-indexed change table
+    The script is reloaded before and after the compilation, so its module state is left untouched.
+    Args:
+        script: imported experimental setup script, providing update_parameters() and return_parameters()
+        defaults: dict, default parameters of the game
+        max_attempts: int, attempts limit for the replay of the script
+    Returns:
+        schedule: dict with the initial parameters, the change table and the event parameters
+    """
+    for line, attempts in duplicate_branches(script):
+        print(f'WARNING: {script.__name__}, line {line}: unreachable branch, attempts == {attempts} '
+              f'is already checked in the same if/elif chain')
+
+    script = importlib.reload(script)
+    initial = script_parameters(script, defaults)
+
+    # replay the protocol attempt by attempt
+    changes = {}
+    previous = initial
+    last_attempt = max_attempts
+    for attempts in range(max_attempts + 1):
+        script.update_parameters(attempts, None)
+        current = script_parameters(script, defaults)
+        changed = changed_parameters(previous, current)
+        if changed:
+            changes[attempts] = changed
+        previous = current
+        if not current['running']:
+            last_attempt = attempts
+            break
+
+    # parameters set by the keyboard events: the script parameters are marked as untouched and the event is replayed
+    # at attempt -1, which doesn't trigger any attempt-based change
+    events = {}
+    untouched = object()
+    for game_event in GAME_EVENTS:
+        script = importlib.reload(script)
+        parameters = script.return_parameters()
+        for key in parameters:
+            parameters[key] = untouched
+        script.update_parameters(-1, game_event)
+        events[game_event] = {key: value for key, value in script.return_parameters().items()
+                              if key in defaults and value is not untouched}
+
+    # report the values the game doesn't recognize (e.g. perturbation_mode True instead of 'sudden')
+    checked = [('initial parameters', initial)]
+    checked += [(f'attempts == {attempts}', parameters) for attempts, parameters in changes.items()]
+    checked += [(f'event {game_event!r}', parameters) for game_event, parameters in events.items()]
+    for where, parameters in checked:
+        try:
+            validate_parameters(parameters, defaults, f'{script.__name__}, {where}')
+        except ValueError as error:
+            print(f'WARNING: {error}')
+
+    importlib.reload(script)
+    return build_index({'initial': initial, 'changes': changes, 'events': events, 'last_attempt': last_attempt})
+
+
+### SCHEDULE FILES ###
+
+def validate_parameters(parameters, defaults, where):
+    """ Function to validate the parameter values of a schedule file
+    Args:
+        parameters: dict, parameters to validate
+        defaults: dict, default parameters of the game
+        where: str, location of the parameters in the schedule file, used in the error messages
+    Raises:
+        ValueError: if a parameter is unknown or has an invalid value
+    """
+    if not isinstance(parameters, dict):
+        raise ValueError(f'{where}: parameters must be a dictionary')
+    for key, value in parameters.items():
+        if key not in defaults:
+            raise ValueError(f'{where}: unknown parameter {key!r}')
+        if key in PARAMETER_OPTIONS:
+            if not any(value == option and type(value) is type(option) for option in PARAMETER_OPTIONS[key]):
+                raise ValueError(f'{where}: {key} must be one of {PARAMETER_OPTIONS[key]}, got {value!r}')
+        elif isinstance(defaults[key], bool):
+            if not isinstance(value, bool):
+                raise ValueError(f'{where}: {key} must be true or false, got {value!r}')
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f'{where}: {key} must be a number, got {value!r}')
+
+
+def load_schedule(file_path, defaults):
+    """ Function to load, validate and compile a schedule file (.json or .toml)
+    Args:
+        file_path: str, path to the schedule file
+        defaults: dict, default parameters of the game
+    Returns:
+        schedule: dict, compiled schedule
+    Raises:
+        ValueError: if the schedule file is invalid
+    """
+    if file_path.endswith('.toml'):
+        with open(file_path, 'rb') as file:
+            content = tomllib.load(file)
+    else:
+        with open(file_path) as file:
+            content = json.load(file)
+
+    name = content.get('name', os.path.basename(file_path))
+    last_attempt = content.get('attempts')
+    if isinstance(last_attempt, bool) or not isinstance(last_attempt, int) or last_attempt <= 0:
+        raise ValueError(f'{name}: attempts must be a positive integer, got {last_attempt!r}')
+
+    session_parameters = content.get('parameters', {})
+    validate_parameters(session_parameters, defaults, f'{name}, parameters')
+    initial = {**defaults, **session_parameters}
+
+    events = content.get('events', DEFAULT_EVENTS)
+    for game_event, event_parameters in events.items():
+        validate_parameters(event_parameters, defaults, f'{name}, event {game_event!r}')
+
+    # validate the blocks and collect the attempt ranges of every parameter
+    ranges = {}  # {parameter: [(start, end, block name, value)]}
+    for i, block in enumerate(content.get('blocks', [])):
+        block_name = block.get('name', f'block {i}')
+        where = f'{name}, {block_name}'
+        start, end = block.get('start'), block.get('end')
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in (start, end)):
+            raise ValueError(f'{where}: start and end must be integers')
+        if not 0 <= start < end <= last_attempt:
+            raise ValueError(f'{where}: expected 0 <= start < end <= {last_attempt}, got start={start}, end={end}')
+        validate_parameters(block.get('parameters', {}), defaults, where)
+        for key, value in block.get('parameters', {}).items():
+            ranges.setdefault(key, []).append((start, end, block_name, value))
+
+    # overlapping blocks can't set the same parameter
+    for key, key_ranges in ranges.items():
+        key_ranges.sort(key=lambda key_range: key_range[0])
+        for previous, current in zip(key_ranges, key_ranges[1:]):
+            if current[0] < previous[1]:
+                raise ValueError(f'{name}: {previous[2]!r} and {current[2]!r} both set {key} for attempts '
+                                 f'{current[0]}-{min(previous[1], current[1]) - 1}')
+
+    # change table: block values at the block starts, session values back at the block ends
+    # (the values of the last blocks are kept at the end of the experiment)
+    changes = {}
+    for key, key_ranges in ranges.items():
+        for start, end, _, value in key_ranges:
+            if end < last_attempt:
+                changes.setdefault(end, {})[key] = initial[key]
+        for start, end, _, value in key_ranges:
+            changes.setdefault(start, {})[key] = value
+    changes.setdefault(last_attempt, {})['running'] = False
+
+    # drop the changes which don't change anything (e.g. adjacent blocks with the same value)
+    schedule = build_index({'initial': initial, 'changes': changes, 'events': events, 'last_attempt': last_attempt})
+    schedule['changes'] = {}
+    previous = initial
+    for attempts, parameters in zip(schedule['boundaries'], schedule['segments']):
+        changed = changed_parameters(previous, parameters)
+        if changed:
+            schedule['changes'][attempts] = changed
+        previous = parameters
+    return build_index(schedule)
+
+
+def load_setup(exp_setup, defaults):
+    """ Function to compile an experimental setup given by a script name or a schedule file path
+    Args:
+        exp_setup: str, name of the script (e.g. 'feedback_script') or path to a .json/.toml schedule file
+        defaults: dict, default parameters of the game
+    Returns:
+        schedule: dict, compiled schedule
+    """
+    if exp_setup.endswith(('.json', '.toml')):
+        return load_schedule(exp_setup, defaults)
+    return compile_script(importlib.import_module(exp_setup), defaults)
+
+
+def setup_name(exp_setup):
+    """ Function to get the name of an experimental setup, used for the file saving path
+    Args:
+        exp_setup: str, name of the script or path to a schedule file
+    Returns:
+        name: str, the script name or the schedule file name without extension
+    """
+    return os.path.splitext(os.path.basename(exp_setup))[0]
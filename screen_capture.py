@@ -0,0 +1,109 @@
+"""
+Asynchronous screenshots of the game window.
+Encoding a full-screen PNG takes tens of milliseconds (more than a frame at 60 Hz), so the game loop only takes
+a copy of the screen surface and puts it in a bounded queue. A background thread encodes the copies and writes
+them to disk; pygame.image.save releases the GIL while encoding, so the game loop keeps its frame rate.
+If the queue is full (the disk can't keep up), the screenshot is dropped and counted instead of blocking the game.
+Besides the screenshots on demand ('s' key), the writer can capture the last frame of every attempt (hit or miss)
+to document the feedback conditions (trajectory, end_pos, reinforcement) shown to the participant.
+The writer is a dictionary created by new_writer():
+    writer['queue']: queue.Queue of (surface copy, file path), None stops the thread
+    writer['attempts_folder']: str, folder of the end-of-attempt frames, created with the writer, or None
+    writer['thread']: threading.Thread, the encoding thread
+    writer['written'], writer['dropped']: int, number of written and dropped screenshots
+"""
+
+import os
+import queue
+import threading
+
+import pygame
+
+QUEUE_SIZE = 8  # screenshots waiting for the encoding, a full-screen copy takes ~10-15 MB
+ATTEMPTS_FOLDER = 'attempt_captures'  # subfolder of the session folder for the end-of-attempt frames
+
+
+def write_screenshots(writer):
+    """ Function of the encoding thread: saves the queued surfaces until None is received
+    Args:
+        writer: dict, the screenshot writer
+    """
+    while True:
+        item = writer['queue'].get()
+        if item is None:
+            break
+        surface, file_path = item
+        try:
+            pygame.image.save(surface, file_path)
+            writer['written'] += 1
+        except (pygame.error, OSError) as error:
+            print(f'screenshot {file_path} not saved: {error}')
+
+
+def new_writer(queue_size=QUEUE_SIZE, directory=None):
+    """ Function to create a screenshot writer and start its encoding thread
+    Args:
+        queue_size: int, number of screenshots which can wait for the encoding
+        directory: str, optional, session folder, to capture the end-of-attempt frames in its ATTEMPTS_FOLDER
+    Returns:
+        writer: dict, the screenshot writer
+    """
+    attempts_folder = None
+    if directory is not None:
+        attempts_folder = os.path.join(directory, ATTEMPTS_FOLDER)
+        os.makedirs(attempts_folder, exist_ok=True)
+    writer = {'queue': queue.Queue(maxsize=queue_size), 'thread': None, 'attempts_folder': attempts_folder,
+              'written': 0, 'dropped': 0}
+    writer['thread'] = threading.Thread(target=write_screenshots, args=(writer,), name='screenshot writer',
+                                        daemon=True)
+    writer['thread'].start()
+    return writer
+
+
+def capture(writer, surface, file_path):
+    """ Function to take a screenshot: the surface is copied and queued for the encoding thread, never blocks
+    Args:
+        writer: dict, the screenshot writer
+        surface: pygame.Surface, e.g. the screen
+        file_path: str, path of the image file, the format is given by the extension (png, jpg, bmp, tga)
+    Returns:
+        queued: bool, False if the queue was full and the screenshot was dropped
+    """
+    if writer['queue'].full():  # don't copy a surface which would be dropped
+        writer['dropped'] += 1
+        return False
+    try:
+        writer['queue'].put_nowait((surface.copy(), file_path))
+    except queue.Full:
+        writer['dropped'] += 1
+        return False
+    return True
+
+
+def capture_attempt(writer, surface, row, attempts, outcome):
+    """ Function to capture the last frame of an attempt in the attempts folder of the writer (see new_writer())
+    The file is named by the data row of the attempt, which always increases: an excluded attempt doesn't increase
+    the attempts and would overwrite the capture of the previous attempt.
+    Args:
+        writer: dict, the screenshot writer
+        surface: pygame.Surface, the screen
+        row: int, number of the data row of the attempt, from 1
+        attempts: int, attempts of the session after the attempt
+        outcome: str, outcome of the attempt ('hit', 'miss' or 'near_miss')
+    Returns:
+        queued: bool, False if the screenshot was dropped
+    """
+    file_name = f'row_{row:04d}_attempt_{attempts:04d}_{outcome}.png'
+    return capture(writer, surface, os.path.join(writer['attempts_folder'], file_name))
+
+
+def close_writer(writer):
+    """ Function to stop the writer after all queued screenshots are saved
+    Args:
+        writer: dict, the screenshot writer
+    Returns:
+        written, dropped: int, number of written and dropped screenshots
+    """
+    writer['queue'].put(None)
+    writer['thread'].join()
+    return writer['written'], writer['dropped']
@@ -0,0 +1,301 @@
+"""
+SQLite catalog of the sessions of an experiment root folder.
+Reaching game.py saves every session as {root}/{participant}/{participant}_{time_ID}/{script}/experimental_data.csv
+(sessions in test mode in an additional test/ folder). The catalog indexes all sessions of the root folder into
+a SQLite database ({root}/session_catalog.sqlite), so the sessions are found with a query instead of a walk over
+the folders, e.g. all feedback sessions from March:
+
+    update_catalog(root)
+    find_sessions(root, script='feedback_script', since='2024-03-01', until='2024-04-01')
+
+The catalog is updated incrementally: the modification time of every indexed folder is stored, folders are listed
+again only if their modification time changed, and a session is indexed again only if its folder or data files
+changed. The tables of the database:
+    sessions: one row per session, see SESSION_COLUMNS
+    directories: indexed folders with their modification time
+Usage:
+    python session_catalog.py {root} [--participant P] [--script S] [--test-mode 0|1] [--since DATE] [--until DATE]
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+import session_output
+
+CATALOG_NAME = 'session_catalog.sqlite'
+TIME_ID_FORMAT = '%Y_%m_%d_%H_%M_%S'
+INDEX_VERSION = 2  # part of the signature, a new version re-indexes all sessions
+
+SESSION_COLUMNS = (
+    'path',  # session folder relative to the root folder
+    'participant',  # participant ID
+    'session',  # session folder, {participant}_{time_ID}
+    'timestamp',  # start of the session, 'YYYY-MM-DD HH:MM:SS'
+    'script',  # experimental setup (script or schedule file name)
+    'test_mode',  # 1 if the session was run in test mode
+    'attempts',  # number of rows of experimental_data
+    'csv_path',  # relative path to experimental_data.csv or NULL
+    'parquet_path',  # relative path to experimental_data.parquet or NULL
+    'content_hash',  # sha256 of the data file read by the analysis (see session_output.data_file)
+    'signature',  # index version, modification times and sizes of the folder and data files, a change re-indexes
+)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT PRIMARY KEY,
+    participant TEXT NOT NULL,
+    session TEXT NOT NULL,
+    timestamp TEXT,
+    script TEXT NOT NULL,
+    test_mode INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    csv_path TEXT,
+    parquet_path TEXT,
+    content_hash TEXT NOT NULL,
+    signature TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_participant ON sessions (participant);
+CREATE INDEX IF NOT EXISTS sessions_script ON sessions (script);
+CREATE INDEX IF NOT EXISTS sessions_timestamp ON sessions (timestamp);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+'''
+
+
+def open_catalog(file_saving_root):
+    """ Function to open the catalog of a root folder, the database is created if it doesn't exist
+    Args:
+        file_saving_root: str, root folder of the experiment
+    Returns:
+        connection: sqlite3.Connection
+    """
+    connection = sqlite3.connect(os.path.join(file_saving_root, CATALOG_NAME))
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """ Function to calculate the sha256 hash of a file
+    Args:
+        file_path: str, path to the file
+        chunk_size: int, number of bytes read at once
+    Returns:
+        hash: str, hexadecimal sha256 hash
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def session_timestamp(participant, session):
+    """ Function to get the start of a session from its folder name {participant}_{time_ID}
+    Args:
+        participant: str, participant ID
+        session: str, session folder name
+    Returns:
+        timestamp: str, 'YYYY-MM-DD HH:MM:SS' or None if the folder name has no valid time ID
+    """
+    try:
+        return datetime.strptime(session[len(participant) + 1:], TIME_ID_FORMAT).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+
+
+def count_attempts(csv_path, parquet_path):
+    """ Function to count the attempts (data rows) of a session without loading the data
+    Args:
+        csv_path: str, path to experimental_data.csv or None
+        parquet_path: str, path to experimental_data.parquet or None
+    Returns:
+        attempts: int
+    """
+    if parquet_path and session_output.pyarrow is not None:
+        return session_output.pyarrow.parquet.ParquetFile(parquet_path).metadata.num_rows
+    with open(csv_path, 'rb') as file:
+        return max(sum(1 for _ in file) - 1, 0)  # without the header
+
+
+def data_files(directory):
+    """ Function to find the data files of a session folder
+    Args:
+        directory: str, session folder
+    Returns:
+        csv_path, parquet_path: str, paths to the data files or None if they don't exist
+    """
+    csv_path = os.path.join(directory, session_output.CSV_NAME)
+    parquet_path = os.path.join(directory, session_output.PARQUET_NAME)
+    return (csv_path if os.path.exists(csv_path) else None,
+            parquet_path if os.path.exists(parquet_path) else None)
+
+
+def signature(directory, csv_path, parquet_path):
+    """ Function to get the signature of a session: version of the index, modification times and sizes of the folder
+    and the data files
+    Args:
+        directory: str, session folder
+        csv_path, parquet_path: str, paths to the data files or None
+    Returns:
+        signature: str
+    """
+    parts = [f'v{INDEX_VERSION}', str(os.stat(directory).st_mtime_ns)]
+    for file_path in (csv_path, parquet_path):
+        if file_path:
+            stat = os.stat(file_path)
+            parts.append(f'{stat.st_mtime_ns}:{stat.st_size}')
+        else:
+            parts.append('-')
+    return '|'.join(parts)
+
+
+def forget(connection, relative_path):
+    """ Function to remove a folder and everything below it from the catalog
+    Args:
+        connection: sqlite3.Connection
+        relative_path: str, folder relative to the root folder
+    """
+    pattern = relative_path.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '/%'
+    for table in ('sessions', 'directories'):
+        connection.execute(f"DELETE FROM {table} WHERE path = ? OR path LIKE ? ESCAPE '\\'", (relative_path, pattern))
+
+
+def index_session(connection, file_saving_root, relative_path, participant, session, script, test_mode):
+    """ Function to index a session folder, the session is (re-)indexed only if its signature changed
+    Args:
+        connection: sqlite3.Connection
+        file_saving_root: str, root folder of the experiment
+        relative_path: str, session folder relative to the root folder
+        participant, session, script: str, names of the folders of the session
+        test_mode: bool, True if the session was run in test mode
+    Returns:
+        indexed: bool, True if the session was (re-)indexed
+    """
+    directory = os.path.join(file_saving_root, relative_path)
+    csv_path, parquet_path = data_files(directory)
+    if not csv_path and not parquet_path:
+        connection.execute('DELETE FROM sessions WHERE path = ?', (relative_path,))
+        return False
+
+    session_signature = signature(directory, csv_path, parquet_path)
+    stored = connection.execute('SELECT signature FROM sessions WHERE path = ?', (relative_path,)).fetchone()
+    if stored and stored[0] == session_signature:
+        return False
+
+    relative = lambda file_path: os.path.relpath(file_path, file_saving_root) if file_path else None
+    row = (relative_path, participant, session, session_timestamp(participant, session), script, int(test_mode),
+           count_attempts(csv_path, parquet_path), relative(csv_path), relative(parquet_path),
+           file_hash(session_output.data_file(csv_path or parquet_path)), session_signature)
+    connection.execute(f'INSERT OR REPLACE INTO sessions ({", ".join(SESSION_COLUMNS)}) '
+                       f'VALUES ({", ".join("?" * len(SESSION_COLUMNS))})', row)
+    return True
+
+
+def list_directory(connection, file_saving_root, relative_path, parent):
+    """ Function to get the subfolders of a folder, the folder is listed only if it changed since the last update
+    Args:
+        connection: sqlite3.Connection
+        file_saving_root: str, root folder of the experiment
+        relative_path: str, folder relative to the root folder ('' for the root folder)
+        parent: str, parent folder relative to the root folder or None for the root folder
+    Returns:
+        subfolders: list of str, names of the subfolders
+    """
+    directory = os.path.join(file_saving_root, relative_path)
+    mtime = os.stat(directory).st_mtime_ns
+    stored = connection.execute('SELECT mtime FROM directories WHERE path = ?', (relative_path,)).fetchone()
+    known = [path for path, in connection.execute('SELECT path FROM directories WHERE parent = ?', (relative_path,))]
+    if stored and stored[0] == mtime:
+        return [os.path.basename(path) for path in known]
+
+    subfolders = sorted(entry.name for entry in os.scandir(directory)
+                        if entry.is_dir() and not entry.name.startswith('.'))  # hidden folders, e.g. the cache
+    for path in known:
+        if os.path.basename(path) not in subfolders:
+            forget(connection, path)
+    connection.execute('INSERT OR REPLACE INTO directories (path, parent, mtime) VALUES (?, ?, ?)',
+                       (relative_path, parent, mtime))
+    for name in subfolders:
+        connection.execute('INSERT OR IGNORE INTO directories (path, parent, mtime) VALUES (?, ?, ?)',
+                           (os.path.join(relative_path, name), relative_path, -1))
+    return subfolders
+
+
+def update_catalog(file_saving_root):
+    """ Function to update the catalog of a root folder with the new, changed and removed sessions
+    Args:
+        file_saving_root: str, root folder of the experiment
+    Returns:
+        indexed: int, number of sessions (re-)indexed
+    """
+    connection = open_catalog(file_saving_root)
+    indexed = 0
+    with connection:
+        for participant in list_directory(connection, file_saving_root, '', None):
+            for session in list_directory(connection, file_saving_root, participant, ''):
+                session_path = os.path.join(participant, session)
+                for script in list_directory(connection, file_saving_root, session_path, participant):
+                    script_path = os.path.join(session_path, script)
+                    indexed += index_session(connection, file_saving_root, script_path, participant, session, script,
+                                             test_mode=False)
+                    if 'test' in list_directory(connection, file_saving_root, script_path, session_path):
+                        indexed += index_session(connection, file_saving_root, os.path.join(script_path, 'test'),
+                                                 participant, session, script, test_mode=True)
+    connection.close()
+    return indexed
+
+
+def find_sessions(file_saving_root, participant=None, script=None, test_mode=None, since=None, until=None):
+    """ Function to query the catalog of a root folder, the catalog is not updated
+    Args:
+        file_saving_root: str, root folder of the experiment
+        participant: str, optional, participant ID
+        script: str, optional, experimental setup
+        test_mode: bool, optional, True for the sessions in test mode, False for the real sessions
+        since: str, optional, sessions started at or after this date/time ('YYYY-MM-DD[ HH:MM:SS]')
+        until: str, optional, sessions started before this date/time
+    Returns:
+        sessions: DataFrame with the SESSION_COLUMNS of the matching sessions, ordered by timestamp
+    """
+    conditions = []
+    parameters = []
+    for condition, value in (('participant = ?', participant), ('script = ?', script), ('timestamp >= ?', since),
+                             ('timestamp < ?', until)):
+        if value is not None:
+            conditions.append(condition)
+            parameters.append(value)
+    if test_mode is not None:
+        conditions.append('test_mode = ?')
+        parameters.append(int(test_mode))
+
+    query = 'SELECT * FROM sessions'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY timestamp, path'
+    connection = open_catalog(file_saving_root)
+    sessions = pd.read_sql_query(query, connection, params=parameters)
+    connection.close()
+    return sessions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Update the session catalog of an experiment root folder and query it')
+    parser.add_argument('root', help='root folder of the experiment')
+    parser.add_argument('--participant', help='participant ID')
+    parser.add_argument('--script', help='experimental setup')
+    parser.add_argument('--test-mode', type=int, choices=(0, 1), help='1 for the sessions in test mode')
+    parser.add_argument('--since', help="sessions started at or after this date ('YYYY-MM-DD')")
+    parser.add_argument('--until', help="sessions started before this date ('YYYY-MM-DD')")
+    arguments = parser.parse_args()
+    print(f'{update_catalog(arguments.root)} sessions indexed')
+    print(find_sessions(arguments.root, arguments.participant, arguments.script, arguments.test_mode, arguments.since,
+                        arguments.until).to_string())
@@ -0,0 +1,180 @@
+"""
+Session output of the reaching game.
+At the end of a session the data is written twice to the session folder:
+    experimental_data.csv: the data as text, readable by any tool
+    experimental_data.parquet: the data with typed columns (DATA_SCHEMA) and the session metadata (script name,
+        seed, screen resolution, TARGET_RADIUS, software version, ...) embedded in the file
+The mode columns (perturbation_mode, feedback), which hold False or the name of the mode, and the outcome of the
+attempts ('hit', 'miss' or 'near_miss', scored by game_engine.step()) are saved as categoricals,
+so the Parquet file is loaded without any parsing or cleaning. perturbation_mode may also hold True: the shipped
+scripts (e.g. baseline_script and the 'test_perturbation' event) set it instead of the name of a mode, it's kept as
+the legacy category 'True' (perturbation on) instead of rejecting the session.
+The readers prefer the Parquet file if it exists.
+Parquet needs pyarrow, without pyarrow only the csv file is written and read.
+"""
+
+import json
+import os
+import subprocess
+
+import pandas as pd
+
+# modes of the categorical columns, 'False' (mode off) is saved by pandas for the False parameter value,
+# 'True' is the legacy perturbation mode set by the scripts
+PERTURBATION_MODES = ['False', 'sudden', 'gradual', 'random', 'True']
+FEEDBACK_MODES = ['False', 'trajectory', 'end_pos', 'reinforcement']
+OUTCOMES = ['hit', 'miss', 'near_miss']  # outcomes of the attempts scored by game_engine.step()
+OFF_VALUES = ['False', 0]  # values of the condition columns when the condition is off
+
+# dtypes of the columns of experimental_data.csv
+DATA_SCHEMA = {
+    'attempts': 'int64',
+    'error_angle': 'float64',
+    'move_faster': 'bool',
+    'perturbation_mode': pd.CategoricalDtype(PERTURBATION_MODES),
+    'total_perturbation': 'float64',
+    'motor_noise': 'float64',
+    'MASK_RADIUS': 'float64',
+    'sequence_target': 'float64',
+    'max_perturbation': 'float64',
+    'feedback': pd.CategoricalDtype(FEEDBACK_MODES),
+    'outcome': pd.CategoricalDtype(OUTCOMES),
+}
+
+# pyarrow writes and reads the Parquet files, its csv parser is multithreaded and much faster than the default one
+try:
+    import pyarrow
+    import pyarrow.parquet
+
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    pyarrow = None
+    CSV_ENGINE = 'c'
+
+CSV_NAME = 'experimental_data.csv'
+PARQUET_NAME = 'experimental_data.parquet'
+METADATA_KEY = b'reaching_game'  # key of the session metadata in the Parquet schema metadata
+
+
+def typed_data(data, where='data'):
+    """ Function to convert the columns of the data to the dtypes of DATA_SCHEMA.
+    Args:
+        data: The data, e.g. read from experimental_data.csv or simulated
+        where: Name of the data for the error message
+    Returns:
+        data: The data with typed columns, the mode columns are categoricals with the categories of DATA_SCHEMA
+    """
+    data = data.copy()
+    for column, dtype in DATA_SCHEMA.items():
+        if column not in data:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = data[column]
+            # a column with only False is parsed as bool, the categories are compared as strings, missing values
+            # (e.g. the outcome of data recorded before it was saved) stay missing
+            if (not isinstance(values.dtype, pd.CategoricalDtype)
+                    or not all(isinstance(category, str) for category in values.cat.categories)):
+                values = values.astype(str).where(values.notna()).astype('category')
+            unknown = set(values.cat.categories) - set(dtype.categories)
+            if unknown:
+                raise ValueError(f'{where}: {column} must be one of {list(dtype.categories)}, got {sorted(unknown)}')
+            data[column] = values.cat.set_categories(dtype.categories)
+        elif data[column].dtype != dtype:
+            data[column] = data[column].astype(dtype)
+    return data
+
+
+def software_version():
+    """ Function to get the version of the game, the git commit of the working directory
+    Returns:
+        version: str, short commit hash (with '-dirty' if there are uncommitted changes) or 'unknown'
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=directory, capture_output=True,
+                              text=True, timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def write_session(data, directory, metadata):
+    """ Function to write the data of a session as csv and as Parquet file with the embedded metadata
+    The csv file is the reference: if the Parquet file can't be written (e.g. a value outside of DATA_SCHEMA), the
+    error is reported and the session ends normally, the readers then read the csv file.
+    Args:
+        data: dict or DataFrame, the data of the session
+        directory: str, session folder (file saving path)
+        metadata: dict, information about the session, JSON serializable
+    Returns:
+        written: bool, True if the Parquet file was written
+    """
+    data = pd.DataFrame(data)
+    data.to_csv(os.path.join(directory, CSV_NAME), index=False)
+    if pyarrow is None:
+        print('pyarrow is not installed, the Parquet file is not written')
+        return False
+
+    parquet_path = os.path.join(directory, PARQUET_NAME)
+    try:
+        table = pyarrow.Table.from_pandas(typed_data(data, where=directory), preserve_index=False)
+        schema_metadata = {**table.schema.metadata, METADATA_KEY: json.dumps(metadata).encode()}
+        pyarrow.parquet.write_table(table.replace_schema_metadata(schema_metadata), parquet_path)
+    except (ValueError, TypeError, OSError, pyarrow.ArrowException) as error:
+        print(f'WARNING: the Parquet file is not written, the data is saved as csv only: {error}')
+        if os.path.exists(parquet_path):  # a partial file would be preferred to the csv file by the readers
+            os.remove(parquet_path)
+        return False
+    return True
+
+
+def read_session(file_path):
+    """ Function to read the data and the metadata of a session from its Parquet file
+    Args:
+        file_path: str, path to experimental_data.parquet
+    Returns:
+        data: DataFrame with typed columns
+        metadata: dict, information about the session
+    """
+    table = pyarrow.parquet.read_table(file_path)
+    metadata = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b'{}'))
+    return typed_data(table.to_pandas(), where=file_path), metadata
+
+
+def read_csv(file_path):
+    """ Function to read experimental_data.csv with the dtypes of DATA_SCHEMA
+    Args:
+        file_path: str, path to the csv file
+    Returns:
+        data: DataFrame with typed columns
+    """
+    # the dtypes are given only for the columns present in the file
+    columns = pd.read_csv(file_path, nrows=0).columns
+    dtype = {column: 'category' if isinstance(DATA_SCHEMA[column], pd.CategoricalDtype) else DATA_SCHEMA[column]
+             for column in columns if column in DATA_SCHEMA}
+    return typed_data(pd.read_csv(file_path, dtype=dtype, engine=CSV_ENGINE), where=file_path)
+
+
+def data_file(file_path):
+    """ Function to get the file read by read_experimental_data(), e.g. to hash the data which is analysed
+    Args:
+        file_path: str, path to experimental_data.csv or experimental_data.parquet
+    Returns:
+        file_path: str, path to experimental_data.parquet if it exists and pyarrow is installed, otherwise file_path
+    """
+    parquet_path = os.path.join(os.path.dirname(file_path), PARQUET_NAME)
+    if pyarrow is not None and os.path.exists(parquet_path):
+        return parquet_path
+    return file_path
+
+
+def read_experimental_data(file_path):
+    """ Function to read the data of a session, the Parquet file is preferred to the csv file if it exists
+    Args:
+        file_path: str, path to experimental_data.csv or experimental_data.parquet
+    Returns:
+        data: DataFrame with typed columns
+    """
+    file_path = data_file(file_path)
+    if file_path.endswith('.parquet'):
+        return read_session(file_path)[0]
+    return read_csv(file_path)
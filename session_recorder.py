@@ -0,0 +1,206 @@
+"""
+Low-overhead video recording of a session.
+The game process grabs downscaled frames of the screen at the recording rate (e.g. 10 Hz) directly into a ring of
+frame slots in shared memory: pygame.transform.scale writes into a surface backed by the shared memory, so a
+recorded frame costs one scaled surface copy (about a millisecond) in the game loop. The number of the slot, the
+time.perf_counter_ns() timestamp and the attempts of the frame are sent over a pipe to a separate encoder process
+(this module run with --encode, started with a low priority), which compresses the frames and acknowledges every
+frame, so its slot can be reused. If all slots are in use (the encoder can't keep up), the frame is dropped and
+counted instead of blocking the game.
+The encoder writes to the session folder:
+    recording.mp4: H.264 video, if ffmpeg is installed, otherwise
+    recording/frame_NNNNNN.jpg: JPEG frame sequence (Pillow)
+    recording_frames.csv: frame, timestamp_ns, attempts and file of every recorded frame; the timestamps use the
+        clock of the trial journal ('time_ns' of the attempt and target records) and of the trajectory store
+The recorder is a dictionary created by new_recorder().
+"""
+
+import argparse
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pygame
+from PIL import Image
+
+from defaults import RECORD_RATE, RECORD_WIDTH
+
+SLOTS = 16  # frames in shared memory waiting for the encoder
+VIDEO_NAME = 'recording.mp4'
+FRAMES_FOLDER = 'recording'
+FRAME_INDEX_NAME = 'recording_frames.csv'
+JPEG_QUALITY = 80
+
+
+def pixel_order(surface):
+    """ Function to get the byte order of the pixels of a 32-bit surface, so the frames are copied without conversion
+    Args:
+        surface: pygame.Surface, e.g. the screen
+    Returns:
+        order: str, 'BGRX' or 'RGBX', or None if the pixels have another format
+    """
+    if surface.get_bytesize() != 4 or sys.byteorder != 'little':
+        return None
+    return {(0xff0000, 0xff00, 0xff): 'BGRX', (0xff, 0xff00, 0xff0000): 'RGBX'}.get(tuple(surface.get_masks()[:3]))
+
+
+def new_recorder(directory, screen, rate=RECORD_RATE, width=RECORD_WIDTH, slots=SLOTS):
+    """ Function to create the shared frame slots and start the encoder process
+    Args:
+        directory: str, session folder
+        screen: pygame.Surface, the screen
+        rate: float, recording rate in frames per second
+        width: int, width of the recorded frames in pixels
+        slots: int, number of frame slots in shared memory
+    Returns:
+        recorder: dict, the recorder
+    """
+    screen_width, screen_height = screen.get_size()
+    size = (width - width % 2, round(width * screen_height / screen_width / 2) * 2)  # even for the video encoder
+    frame_bytes = size[0] * size[1] * 4
+    memory = shared_memory.SharedMemory(create=True, size=slots * frame_bytes)
+    order = pixel_order(screen)
+    surfaces = [pygame.image.frombuffer(memory.buf[slot * frame_bytes:(slot + 1) * frame_bytes], size, 'RGBX')
+                for slot in range(slots)]
+
+    environment = {**os.environ, 'PYGAME_HIDE_SUPPORT_PROMPT': '1'}  # stdout carries the acknowledgements
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--encode', memory.name, str(size[0]),
+                                str(size[1]), str(slots), order or 'RGBX', str(rate), directory],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=environment)
+    os.set_blocking(process.stdout.fileno(), False)
+    return {'memory': memory, 'surfaces': surfaces, 'size': size, 'direct': order is not None, 'process': process,
+            'period': int(1_000_000_000 / rate), 'next_frame': 0, 'sent': 0, 'acknowledged': 0, 'dropped': 0}
+
+
+def record_frame(recorder, screen, attempts):
+    """ Function to record the screen if the next frame of the recording is due, never blocks
+    Args:
+        recorder: dict, the recorder
+        screen: pygame.Surface, the screen
+        attempts: int, attempts of the session at this frame
+    Returns:
+        recorded: bool, True if the frame was recorded
+    """
+    now = time.perf_counter_ns()
+    if now < recorder['next_frame']:
+        return False
+    late = now - recorder['next_frame'] >= recorder['period']  # e.g. first frame, don't catch up the missed frames
+    recorder['next_frame'] = (now if late else recorder['next_frame']) + recorder['period']
+
+    try:
+        recorder['acknowledged'] += len(os.read(recorder['process'].stdout.fileno(), 4096))
+    except BlockingIOError:
+        pass
+    surfaces = recorder['surfaces']
+    if recorder['sent'] - recorder['acknowledged'] >= len(surfaces):  # all slots wait for the encoder
+        recorder['dropped'] += 1
+        return False
+
+    slot = recorder['sent'] % len(surfaces)
+    if recorder['direct']:  # raw copy in the pixel order of the screen
+        pygame.transform.scale(screen, recorder['size'], surfaces[slot])
+    else:
+        surfaces[slot].blit(pygame.transform.scale(screen, recorder['size']), (0, 0))
+    recorder['process'].stdin.write(f'{slot} {now} {attempts}\n'.encode())
+    recorder['process'].stdin.flush()
+    recorder['sent'] += 1
+    return True
+
+
+def close_recorder(recorder):
+    """ Function to stop the recording after the encoder has written all frames
+    Args:
+        recorder: dict, the recorder
+    Returns:
+        recorded, dropped: int, number of recorded and dropped frames
+    """
+    recorder['process'].stdin.close()  # end of the recording
+    recorder['process'].wait()
+    recorder['process'].stdout.close()
+    recorder['surfaces'].clear()  # release the views of the shared memory
+    recorder['memory'].close()
+    recorder['memory'].unlink()
+    return recorder['sent'], recorder['dropped']
+
+
+def start_video(size, rate, file_path, order):
+    """ Function to start ffmpeg encoding raw frames from its stdin to an H.264 video
+    Args:
+        size: (width, height) of the frames
+        rate: float, frame rate of the video
+        file_path: str, path of the video
+        order: str, byte order of the pixels, 'BGRX' or 'RGBX'
+    Returns:
+        process: subprocess.Popen, or None if ffmpeg is not installed
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return None
+    return subprocess.Popen([ffmpeg, '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', order.lower()[:3] + '0',
+                             '-s', f'{size[0]}x{size[1]}', '-r', str(rate), '-i', '-', '-c:v', 'libx264',
+                             '-preset', 'veryfast', '-pix_fmt', 'yuv420p', file_path], stdin=subprocess.PIPE)
+
+
+def encode_frames(memory_name, size, slots, order, rate, directory):
+    """ Function of the encoder process: encodes the frames announced on stdin until the end of the input and
+    acknowledges every frame on stdout as soon as its slot is copied
+    Args:
+        memory_name: str, name of the shared memory of the frame slots
+        size: (width, height) of the frames
+        slots: int, number of frame slots
+        order: str, byte order of the pixels, 'BGRX' or 'RGBX'
+        rate: float, recording rate in frames per second
+        directory: str, session folder
+    """
+    if hasattr(os, 'nice'):
+        os.nice(10)  # the game process has the priority
+    memory = shared_memory.SharedMemory(name=memory_name)
+    resource_tracker.unregister(memory._name, 'shared_memory')  # the game process owns the shared memory
+    frames = np.ndarray((slots, size[1], size[0], 4), dtype=np.uint8, buffer=memory.buf)
+
+    video = start_video(size, rate, os.path.join(directory, VIDEO_NAME), order)
+    if video is None:
+        os.makedirs(os.path.join(directory, FRAMES_FOLDER), exist_ok=True)
+    with open(os.path.join(directory, FRAME_INDEX_NAME), 'w', newline='') as index_file:
+        index = csv.writer(index_file)
+        index.writerow(['frame', 'timestamp_ns', 'attempts', 'file'])
+        for number, line in enumerate(sys.stdin.buffer):
+            slot, timestamp, attempts = (int(value) for value in line.split())
+            frame = frames[slot].copy()
+            sys.stdout.buffer.write(b'\n')  # the slot can be reused
+            sys.stdout.buffer.flush()
+
+            if video is not None:
+                video.stdin.write(frame.data)
+                file_name = VIDEO_NAME
+            else:
+                file_name = os.path.join(FRAMES_FOLDER, f'frame_{number:06d}.jpg')
+                Image.frombuffer('RGB', size, frame.data, 'raw', order, 0, 1).save(
+                    os.path.join(directory, file_name), quality=JPEG_QUALITY)
+            index.writerow([number, timestamp, attempts, file_name])
+
+    if video is not None:
+        video.stdin.close()
+        video.wait()
+    del frames
+    memory.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Encoder process of the session recording, started by new_recorder()')
+    parser.add_argument('--encode', action='store_true', required=True)
+    parser.add_argument('memory_name', help='name of the shared memory of the frame slots')
+    parser.add_argument('width', type=int)
+    parser.add_argument('height', type=int)
+    parser.add_argument('slots', type=int)
+    parser.add_argument('order', choices=('BGRX', 'RGBX'), help='byte order of the pixels')
+    parser.add_argument('rate', type=float, help='recording rate in frames per second')
+    parser.add_argument('directory', help='session folder')
+    arguments = parser.parse_args()
+    encode_frames(arguments.memory_name, (arguments.width, arguments.height), arguments.slots, arguments.order,
+                  arguments.rate, arguments.directory)
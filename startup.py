@@ -0,0 +1,125 @@
+"""
+Fast start of the game: the slow start-up work runs in a background thread while the experimenter fills in the menu.
+Before the menu only the light modules are imported. The prewarm thread then:
+    - imports the heavy modules of the game loop (numpy, pygame, h5py and the game modules), the imports in the game
+      script after the menu find them in sys.modules,
+    - initializes the pygame fonts and loads the fonts of the game texts, they are handed to the renderer,
+    - imports and compiles (validates) the built-in experimental setup scripts.
+The display is initialized in the main thread after GO (SDL video may only be used from the main thread on macOS),
+pandas is only needed to save the data and is imported at the end of the session.
+The time of every start-up phase is recorded with time.perf_counter() relative to the start of the game script and
+reported when the game is ready, the report is also saved with the session metadata.
+The launch state is a dictionary created by start_prewarm():
+    launch['marks']: dict {phase: time in s}, in the order of the phases
+    launch['fonts']: dict {size: pygame.font.Font}, preloaded fonts
+    launch['setups']: dict {script name: compiled schedule}, compiled built-in setups
+"""
+
+import importlib
+import threading
+import time
+
+PREWARM_MODULES = ('numpy', 'pygame', 'h5py', 'game_engine', 'render', 'input_capture', 'frame_timing',
+                   'trajectory_store', 'trial_journal', 'random_streams', 'schedule', 'screen_capture',
+                   'session_recorder', 'game_session')
+FONT_SIZES = (36, 52)  # sizes of the texts drawn by the game
+
+
+def mark(launch, phase):
+    """ Function to record the time of a start-up phase
+    Args:
+        launch: dict, the launch state
+        phase: str, name of the phase
+    """
+    launch['marks'][phase] = time.perf_counter()
+
+
+def prewarm(launch, setups):
+    """ Function of the prewarm thread: imports the modules, loads the fonts and compiles the setups
+    An error is kept in launch['error'] and raised in the main thread by finish_prewarm().
+    Args:
+        launch: dict, the launch state
+        setups: iterable of str, names of the built-in setup scripts
+    """
+    try:
+        for module in PREWARM_MODULES:
+            importlib.import_module(module)
+        mark(launch, 'modules imported')
+
+        import pygame
+        pygame.font.init()
+        launch['fonts'] = {size: pygame.font.Font(None, size) for size in FONT_SIZES}
+        mark(launch, 'fonts loaded')
+
+        import game_engine
+        import schedule
+        for setup in setups:
+            launch['setups'][setup] = schedule.load_setup(setup, game_engine.default_parameters)
+        mark(launch, 'setups compiled')
+    except Exception as error:
+        launch['error'] = error
+
+
+def start_prewarm(setups, start=None):
+    """ Function to start the prewarm thread
+    Args:
+        setups: iterable of str, names of the built-in setup scripts
+        start: float, optional, time.perf_counter() of the start of the game, by default now
+    Returns:
+        launch: dict, the launch state
+    """
+    launch = {'start': time.perf_counter() if start is None else start, 'marks': {}, 'fonts': {}, 'setups': {},
+              'error': None, 'thread': None}
+    launch['thread'] = threading.Thread(target=prewarm, args=(launch, list(setups)), name='prewarm', daemon=True)
+    launch['thread'].start()
+    return launch
+
+
+def finish_prewarm(launch):
+    """ Function to wait for the prewarm thread, if the menu was closed before it finished
+    Args:
+        launch: dict, the launch state
+    """
+    launch['thread'].join()
+    mark(launch, 'prewarm joined')
+    if launch['error'] is not None:
+        raise launch['error']
+
+
+def load_setup(launch, exp_setup, defaults):
+    """ Function to get the compiled schedule of the chosen setup, compiled in the prewarm thread if it's built-in
+    Args:
+        launch: dict, the launch state
+        exp_setup: str, name of the script or path to a schedule file
+        defaults: dict, default parameters of the game
+    Returns:
+        schedule: dict, compiled schedule
+    """
+    if exp_setup in launch['setups']:
+        return launch['setups'][exp_setup]
+    import schedule
+    return schedule.load_setup(exp_setup, defaults)
+
+
+def report(launch):
+    """ Function to get the start-up report
+    Args:
+        launch: dict, the launch state
+    Returns:
+        report: dict {phase: ms since the start of the game}, in chronological order
+    """
+    return {phase: round((moment - launch['start']) * 1000, 1)
+            for phase, moment in sorted(launch['marks'].items(), key=lambda item: item[1])}
+
+
+def print_report(launch, go_phase='GO pressed', ready_phase='game ready'):
+    """ Function to print the start-up report with the delay between GO and the game
+    Args:
+        launch: dict, the launch state
+        go_phase: str, phase of the menu closing
+        ready_phase: str, phase of the game ready to run
+    """
+    print('start-up:', ', '.join(f'{phase} {ms:.0f} ms' for phase, ms in report(launch).items()))
+    marks = launch['marks']
+    if go_phase in marks and ready_phase in marks:
+        print(f'game ready {(marks[ready_phase] - marks[go_phase]) * 1000:.0f} ms after {go_phase}')
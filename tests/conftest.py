@@ -0,0 +1,17 @@
+"""
+Shared set-up of the tests: the modules of the game are imported from the repository root, the figures are rendered
+by Agg and pygame runs without a display.
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # the schedule files are given relative to the repository root
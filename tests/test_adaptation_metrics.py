@@ -0,0 +1,88 @@
+"""
+The per-block metrics of adaptation_metrics.block_metrics() on small hand-built sessions.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Reader_module
+import adaptation_metrics
+
+
+def new_data(blocks, outcome=True):
+    """ Function to build the data of a session from its blocks
+    Args:
+        blocks: list of (perturbation_mode, error angles in radians)
+        outcome: bool, True to add the outcome column: a hit for the error angles below 0.1 radians
+    Returns:
+        data: DataFrame with the columns of experimental_data.csv
+    """
+    modes = [mode for mode, errors in blocks for _ in errors]
+    errors = np.concatenate([errors for _, errors in blocks])
+    data = pd.DataFrame({'attempts': np.arange(1, len(errors) + 1), 'error_angle': errors, 'move_faster': False,
+                         'perturbation_mode': modes, 'total_perturbation': 0.0, 'motor_noise': 0.0,
+                         'MASK_RADIUS': 0.0, 'sequence_target': 0.0, 'max_perturbation': 0.0, 'feedback': 'False'})
+    if outcome:
+        data['outcome'] = np.where(np.abs(errors) < 0.1, 'hit', 'miss')
+    return data
+
+
+BASELINE = np.array([0.05, -0.05, 0.02, 0.04, 0.0, 0.03, -0.01, 0.01])
+PERTURBED = np.array([0.5, 0.4, 0.3, 2.0, 0.25, 0.2, 0.15, 0.1, 0.08, 0.05])  # 2.0 radians is an outlier
+WASHOUT = np.array([-0.3, -0.2, -0.15, -0.1, -0.05, -0.02])
+SESSION = [('False', BASELINE), ('sudden', PERTURBED), ('False', WASHOUT)]
+
+
+def test_blocks_and_error_metrics():
+    metrics = adaptation_metrics.block_metrics(new_data(SESSION))
+    assert list(metrics.columns) == list(adaptation_metrics.METRIC_COLUMNS)
+    assert metrics['block'].tolist() == [0, 1, 2]
+    assert metrics['start'].tolist() == [1, 9, 19]
+    assert metrics['end'].tolist() == [8, 18, 24]
+    assert metrics['perturbation_mode'].astype(str).tolist() == ['False', 'sudden', 'False']
+    assert metrics['attempts'].tolist() == [8, 10, 6]
+    assert metrics['outliers'].tolist() == [0, 1, 0]
+
+    valid = PERTURBED[PERTURBED < 1]
+    perturbed = metrics.iloc[1]
+    assert perturbed['early_error'] == pytest.approx(valid[:5].mean())
+    assert perturbed['late_error'] == pytest.approx(valid[-5:].mean())
+    assert perturbed['circular_mean'] == pytest.approx(np.arctan2(np.sin(valid).mean(), np.cos(valid).mean()))
+    assert perturbed['circular_variance'] == pytest.approx(1 - np.hypot(np.sin(valid).mean(), np.cos(valid).mean()))
+    assert perturbed['adaptation_rate'] > 0  # the error decreases
+
+    # aftereffect of the washout block relative to the late baseline error
+    assert metrics['aftereffect'].iloc[2] == pytest.approx(WASHOUT[:5].mean() - BASELINE[-5:].mean())
+    assert metrics['aftereffect'].iloc[:2].isna().all()
+
+
+def test_hit_rate_from_outcome():
+    metrics = adaptation_metrics.block_metrics(new_data(SESSION))
+    np.testing.assert_allclose(metrics['hit_rate'], [1, 2 / 10, 2 / 6])
+
+    data = new_data(SESSION)
+    data.loc[:3, 'outcome'] = None  # recorded before the outcome was saved, not counted
+    assert adaptation_metrics.block_metrics(data)['hit_rate'].iloc[0] == 1
+    assert adaptation_metrics.block_metrics(new_data(SESSION, outcome=False))['hit_rate'].isna().all()
+
+
+def test_concatenated_sessions_are_separated():
+    first = new_data(SESSION).assign(participant='P1')
+    second = new_data([('sudden', PERTURBED), ('False', WASHOUT)]).assign(participant='P2')
+    metrics = adaptation_metrics.block_metrics(pd.concat([first, second]), by=['participant'])
+    assert metrics['participant'].tolist() == ['P1'] * 3 + ['P2'] * 2
+    assert metrics['block'].tolist() == [0, 1, 2, 0, 1]
+    # no baseline in the second session: the aftereffect is relative to 0
+    assert metrics['aftereffect'].iloc[4] == pytest.approx(WASHOUT[:5].mean())
+    pd.testing.assert_frame_equal(metrics.iloc[:3].drop(columns='participant').reset_index(drop=True),
+                                  adaptation_metrics.block_metrics(new_data(SESSION)))
+
+
+def test_summary_has_the_same_blocks():
+    data = new_data(SESSION)
+    metrics = adaptation_metrics.block_metrics(data)
+    summary = Reader_module.session_summary(data)
+    assert summary['start'].tolist() == metrics['start'].tolist()
+    assert summary['end'].tolist() == metrics['end'].tolist()
+    assert summary['outliers'].tolist() == metrics['outliers'].tolist()
@@ -0,0 +1,74 @@
+"""
+The analysis cache: a session is analysed again only if its data or the analysis parameters change, and the result
+files of the session always match the parameters of the last analysis.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import Reader_module
+import analysis_cache
+import batch_analysis
+import headless_simulation
+import session_output
+
+
+@pytest.fixture
+def session_file(tmp_path):
+    """ Function to write a simulated session in the folder layout of the game
+    Returns:
+        file_path: str, path to experimental_data.csv
+    """
+    directory = tmp_path / 'P1' / 'P1_2024_03_18_16_31_58' / 'feedback_script'
+    directory.mkdir(parents=True)
+    data = headless_simulation.run_simulation('feedback_script', seed=3, aim_noise=0.6)['data']
+    session_output.write_session(data, str(directory), {'exp_setup': 'feedback_script'})
+    return str(directory / session_output.CSV_NAME)
+
+
+@pytest.fixture
+def analysed(monkeypatch):
+    """ Function to count the sessions which are read, i.e. not taken from the cache
+    Returns:
+        reads: list of the read files
+    """
+    reads = []
+    read_data = Reader_module.read_data
+
+    def counted_read_data(file_path):
+        reads.append(file_path)
+        return read_data(file_path)
+
+    monkeypatch.setattr(Reader_module, 'read_data', counted_read_data)
+    return reads
+
+
+def test_cache_hit_and_miss(session_file, analysed, tmp_path):
+    cache_directory = str(tmp_path / analysis_cache.CACHE_NAME)
+    first = batch_analysis.analyse_session(session_file, cache_directory=cache_directory)
+    second = batch_analysis.analyse_session(session_file, cache_directory=cache_directory)
+    assert len(analysed) == 1  # hit
+    for name in batch_analysis.TABLE_NAMES:
+        pd.testing.assert_frame_equal(first[name], second[name])
+
+    batch_analysis.analyse_session(session_file, critical_angle=20, cache_directory=cache_directory)
+    assert len(analysed) == 2  # other parameters
+
+    directory = os.path.dirname(session_file)
+    data = session_output.read_experimental_data(session_file).iloc[:100]
+    session_output.write_session(data, directory, {'exp_setup': 'feedback_script'})
+    batch_analysis.analyse_session(session_file, cache_directory=cache_directory)
+    assert len(analysed) == 3  # other data
+
+
+def test_cache_hit_refreshes_the_session_files(session_file, tmp_path):
+    cache_directory = str(tmp_path / analysis_cache.CACHE_NAME)
+    summary_path = os.path.join(os.path.dirname(session_file), 'summary.csv')
+    default = batch_analysis.analyse_session(session_file, cache_directory=cache_directory)['summary']
+    batch_analysis.analyse_session(session_file, critical_angle=20, cache_directory=cache_directory)
+    assert pd.read_csv(summary_path)['outliers'].sum() > default['outliers'].sum()
+
+    batch_analysis.analyse_session(session_file, cache_directory=cache_directory)  # hit
+    assert pd.read_csv(summary_path)['outliers'].sum() == default['outliers'].sum()
@@ -0,0 +1,28 @@
+"""
+The error angles of the sessions of a group are aligned by attempt, without the attempts excluded by the game.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import group_analysis
+
+
+def test_excluded_attempts_are_dropped():
+    # the third row is excluded by the game (2.5 radians), it repeats the attempt counter of the previous row
+    data = pd.DataFrame({'attempts': [0, 1, 2, 2, 3], 'error_angle': [2.0, 0.1, 0.2, 2.5, 0.3]})
+    np.testing.assert_allclose(group_analysis.aligned_curves([data], critical_angle=200), [[0.1, 0.2, 0.3]])
+
+
+def test_sessions_are_aligned_by_attempt():
+    short = pd.DataFrame({'attempts': [1, 2], 'error_angle': [0.1, 3.0]})  # 3.0 radians is an outlier
+    long = pd.DataFrame({'attempts': [1, 2, 3], 'error_angle': [0.4, 0.5, 0.6]})
+    np.testing.assert_allclose(group_analysis.aligned_curves([short, long]),
+                               [[0.1, np.nan, np.nan], [0.4, 0.5, 0.6]])
+
+
+def test_attempts_out_of_order_raise():
+    data = pd.DataFrame({'attempts': [1, 3, 2], 'error_angle': [0.1, 0.2, 0.3]})
+    with pytest.raises(ValueError):
+        group_analysis.aligned_curves([data])
@@ -0,0 +1,85 @@
+"""
+The headless engine driven by the compiled schedules gives the same data as the game loop driven by the scripts, and
+the schedule files in schedules/ give the same data as the scripts they replace.
+"""
+
+import importlib
+
+import pandas as pd
+import pytest
+
+import game_engine
+import headless_simulation
+import schedule
+
+SCRIPTS = ('baseline_script', 'feedback_script', 'motor_noise_script', 'interference_script', 'test_script')
+SEED = 4
+
+
+def run_with_script(script_name, seed=SEED, width=1680, height=1050):
+    """ Function to run a script like the original game loop: the script updates the parameters on every frame
+    Args:
+        script_name: str, name of the experimental setup script
+        seed: int, seed of the random streams and of the synthetic reacher
+        width, height: int, size of the playing field in pixels
+    Returns:
+        data: DataFrame, the recorded data
+    """
+    script = importlib.import_module(script_name)
+    setup_schedule = schedule.compile_script(script, game_engine.default_parameters)  # noise levels of the streams
+    script = importlib.reload(script)
+    session = game_engine.new_session(setup_schedule, width, height, seed)
+    reacher = headless_simulation.SyntheticReacher(session, seed=seed)
+    clock = headless_simulation.SimulatedClock()
+    while session['parameters']['running']:
+        dynamic_variables = session['dynamic_variables']
+        script.update_parameters(dynamic_variables['attempts'], dynamic_variables['game_event'])
+        session['parameters'].update(schedule.script_parameters(script, game_engine.default_parameters))
+        reacher.move()
+        game_engine.step(session, reacher, clock.get_ticks)
+        clock.tick()
+    importlib.reload(script)
+    return pd.DataFrame(session['data'])
+
+
+def run_schedule(exp_setup, seed=SEED):
+    """ Function to run an experimental setup with the headless engine
+    Args:
+        exp_setup: str, script name or path to a schedule file
+        seed: int, seed of the random streams and of the synthetic reacher
+    Returns:
+        data: DataFrame, the recorded data
+    """
+    return pd.DataFrame(headless_simulation.run_simulation(exp_setup, seed=seed)['data'])
+
+
+@pytest.mark.parametrize('script_name', SCRIPTS)
+def test_compiled_schedule_matches_script(script_name):
+    expected = run_with_script(script_name)
+    data = run_schedule(script_name)
+    assert len(data) == schedule.load_setup(script_name, game_engine.default_parameters)['last_attempt']
+    pd.testing.assert_frame_equal(data, expected)
+
+
+@pytest.mark.parametrize('name', ['feedback', 'motor_noise', 'interference', 'test'])
+def test_schedule_file_matches_script(name):
+    pd.testing.assert_frame_equal(run_schedule(f'schedules/{name}_schedule.json'), run_schedule(f'{name}_script'))
+
+
+def test_baseline_schedule_file_names_the_legacy_modes():
+    # baseline_script sets perturbation_mode True, the schedule file names the modes instead
+    compiled = schedule.load_setup('baseline_script', game_engine.default_parameters)
+    loaded = schedule.load_setup('schedules/baseline_schedule.json', game_engine.default_parameters)
+    assert compiled['last_attempt'] == loaded['last_attempt']
+    for attempts in range(compiled['last_attempt'] + 1):
+        script_parameters = schedule.parameters_at(compiled, attempts)
+        file_parameters = schedule.parameters_at(loaded, attempts)
+        if script_parameters['perturbation_mode'] is True:
+            assert file_parameters['perturbation_mode'] in ('sudden', 'gradual')
+            script_parameters['perturbation_mode'] = file_parameters['perturbation_mode']
+        assert script_parameters == file_parameters, attempts
+
+
+def test_simulation_is_reproducible():
+    pd.testing.assert_frame_equal(run_schedule('feedback_script', seed=7), run_schedule('feedback_script', seed=7))
+    assert not run_schedule('feedback_script', seed=7).equals(run_schedule('feedback_script', seed=8))
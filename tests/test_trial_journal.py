@@ -0,0 +1,102 @@
+"""
+An interrupted session resumes from its journal at the last committed attempt with the same data and game state.
+"""
+
+import copy
+
+import game_engine
+import headless_simulation
+import random_streams
+import schedule
+import trial_journal
+
+WIDTH, HEIGHT = 1680, 1050
+SEED = 5
+
+
+def new_session():
+    """ Function to create a session of feedback_script
+    Returns:
+        session: dict, the game session
+    """
+    return game_engine.new_session(schedule.load_setup('feedback_script', game_engine.default_parameters), WIDTH,
+                                   HEIGHT, SEED)
+
+
+class StartMouse:
+    """ Mouse resting at the start position """
+
+    def __init__(self, session):
+        self.pos = session['START_POSITION']
+
+    def get_pos(self):
+        return self.pos
+
+    def set_pos(self, pos):
+        pass
+
+
+def run_until(session, journal, attempts):
+    """ Function to play a session with the synthetic reacher and journal it like the game loop, until the next target
+    is presented after the given number of data rows
+    Args:
+        session: dict, the game session
+        journal: dict, the journal
+        attempts: int, data rows before the interruption
+    Returns:
+        committed: dict, game state after the last committed attempt: the STATE_VARIABLES of the journal and the draws
+        of the random streams
+    """
+    reacher = headless_simulation.SyntheticReacher(session, seed=SEED)
+    clock = headless_simulation.SimulatedClock()
+    dynamic_variables = session['dynamic_variables']
+    committed = None
+    while True:
+        game_engine.update_parameters(session)
+        reacher.move()
+        had_target = dynamic_variables['target'] is not None
+        if game_engine.step(session, reacher, clock.get_ticks):
+            trial_journal.append_attempt(journal, session)
+            committed = copy.deepcopy({'state': {key: dynamic_variables[key] for key in trial_journal.STATE_VARIABLES},
+                                       'draws': session['random']['draws']})
+        clock.tick()
+        if not had_target and dynamic_variables['target'] is not None:
+            trial_journal.append_target(journal, list(dynamic_variables['target']))
+            if len(session['data']['attempts']) >= attempts:
+                return committed
+
+
+def test_resume_restores_the_committed_attempts(tmp_path):
+    session = new_session()
+    journal = trial_journal.open_journal(str(tmp_path), header={'exp_setup': 'feedback_script'}, sync_every=7)
+    committed = run_until(session, journal, 30)  # interrupted with a target on the screen, the journal isn't closed
+
+    resumed = new_session()
+    trial_journal.resume_session(resumed, trial_journal.read_journal(str(tmp_path)))
+    assert resumed['data'] == session['data']
+    assert len(resumed['data']['attempts']) == 30
+    assert {key: resumed['dynamic_variables'][key] for key in trial_journal.STATE_VARIABLES} == committed['state']
+    assert resumed['random']['draws'] == committed['draws']
+    assert resumed['parameters'] == session['parameters']
+
+    # back at the start position, the interrupted attempt is presented again with the same game state
+    game_engine.update_parameters(resumed)
+    game_engine.step(resumed, StartMouse(resumed), lambda: 0)
+    for key in ('target', 'gradual_attempts', 'motor_noise_perturbation', 'perturbation_angle'):
+        assert resumed['dynamic_variables'][key] == session['dynamic_variables'][key], key
+    assert resumed['random']['draws'] == session['random']['draws']
+    assert (random_streams.draw(resumed['random'], 'motor_noise', 2.0)
+            == random_streams.draw(session['random'], 'motor_noise', 2.0))
+
+
+def test_incomplete_last_record_is_ignored(tmp_path):
+    session = new_session()
+    journal = trial_journal.open_journal(str(tmp_path), header={'exp_setup': 'feedback_script'})
+    run_until(session, journal, 5)
+    trial_journal.close_journal(journal)
+    with open(tmp_path / trial_journal.JOURNAL_NAME, 'a') as file:
+        file.write('{"type": "attempt", "row": {"attem')  # crash while writing
+
+    records = trial_journal.read_journal(str(tmp_path))
+    assert records[0]['type'] == 'header'
+    assert sum(record['type'] == 'attempt' for record in records) == len(session['data']['attempts'])
@@ -0,0 +1,30 @@
+"""
+The fit of the two-rate model recovers the parameters of a simulated session.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import two_rate_model
+
+TRUE_PARAMETERS = {'retention_fast': 0.6, 'learning_rate_fast': 0.3, 'retention_slow': 0.99, 'learning_rate_slow': 0.05}
+
+
+def test_parameters_are_recovered():
+    total_perturbation = np.concatenate([np.zeros(50), np.full(150, np.radians(30)), np.zeros(100)])
+    error_angle = two_rate_model.predict(TRUE_PARAMETERS, total_perturbation)['error_angle']
+    error_angle += np.random.default_rng(0).normal(0, np.radians(1), len(error_angle))
+    data = pd.DataFrame({'total_perturbation': total_perturbation, 'error_angle': error_angle})
+
+    fit = two_rate_model.fit_session(data)
+    assert fit['fitted_attempts'] == len(data)
+    for name, value in TRUE_PARAMETERS.items():
+        assert fit[name] == pytest.approx(value, abs=0.05), name
+    assert fit['r_squared'] > 0.9
+
+
+def test_too_few_attempts_raise():
+    data = pd.DataFrame({'total_perturbation': [0.0, 0.5, 0.5], 'error_angle': [0.0, -0.5, -0.3]})
+    with pytest.raises(ValueError):
+        two_rate_model.fit_session(data)
@@ -0,0 +1,99 @@
+"""
+Binary store of the per-attempt trajectories.
+Every attempt's cursor path and raw mouse path are appended to an HDF5 file (trajectories.h5) next to
+experimental_data.csv. The paths of all attempts are concatenated in two resizable datasets and an index dataset
+holds the offsets of each attempt, so a single attempt is read without loading the whole session:
+    cursor: float64 (n, 2), x and y cursor positions, one per frame (the trajectory drawn by draw_trajectory)
+    mouse: int64 (m, 3), timestamp in ns (time.perf_counter_ns), x and y of the raw mouse samples
+    index: one row per attempt (row of experimental_data.csv), see INDEX_DTYPE
+The file is flushed after every attempt.
+"""
+
+import h5py
+import numpy as np
+
+INDEX_DTYPE = np.dtype([
+    ('row', np.int64),  # row of the attempt in experimental_data.csv
+    ('attempts', np.int64),  # attempts value written in experimental_data.csv
+    ('cursor_start', np.int64),  # offsets of the attempt in the cursor dataset
+    ('cursor_stop', np.int64),
+    ('mouse_start', np.int64),  # offsets of the attempt in the mouse dataset
+    ('mouse_stop', np.int64),
+    ('start_time', np.int64),  # time of the target appearance, ns
+    ('end_time', np.int64),  # time of the hit or miss, ns
+])
+
+CHUNK_SIZE = 4096
+
+
+def open_store(file_path):
+    """ Function to open the trajectory store, the datasets are created if the file is new
+    Args:
+        file_path: str, path to the HDF5 file
+    Returns:
+        store: h5py.File object
+    """
+    store = h5py.File(file_path, 'a')
+    if 'index' not in store:
+        store.create_dataset('cursor', shape=(0, 2), maxshape=(None, 2), dtype=np.float64, chunks=(CHUNK_SIZE, 2))
+        store.create_dataset('mouse', shape=(0, 3), maxshape=(None, 3), dtype=np.int64, chunks=(CHUNK_SIZE, 3))
+        store.create_dataset('index', shape=(0,), maxshape=(None,), dtype=INDEX_DTYPE, chunks=(CHUNK_SIZE,))
+    return store
+
+
+def append_rows(dataset, rows):
+    """ Function to append rows at the end of a resizable dataset
+    Args:
+        dataset: h5py.Dataset
+        rows: np.ndarray with the rows to append
+    Returns:
+        start, stop: int, offsets of the appended rows
+    """
+    start = dataset.shape[0]
+    stop = start + len(rows)
+    dataset.resize(stop, axis=0)
+    if len(rows):
+        dataset[start:stop] = rows
+    return start, stop
+
+
+def append_attempt(store, row, attempts, cursor_path, mouse_path, start_time, end_time):
+    """ Function to append the trajectories of one attempt to the store
+    Args:
+        store: h5py.File, the trajectory store
+        row: int, row of the attempt in experimental_data.csv
+        attempts: int, attempts value written in experimental_data.csv
+        cursor_path: list of [x, y] cursor positions
+        mouse_path: np.ndarray (n, 3) of the mouse samples: timestamp in ns, x, y
+        start_time: int, time of the target appearance, ns
+        end_time: int, time of the hit or miss, ns
+    """
+    cursor_path = np.asarray(cursor_path, dtype=np.float64).reshape(-1, 2)
+    mouse_path = np.asarray(mouse_path, dtype=np.int64).reshape(-1, 3)
+    cursor_start, cursor_stop = append_rows(store['cursor'], cursor_path)
+    mouse_start, mouse_stop = append_rows(store['mouse'], mouse_path)
+    index_row = np.array([(row, attempts, cursor_start, cursor_stop, mouse_start, mouse_stop, start_time, end_time)],
+                         dtype=INDEX_DTYPE)
+    append_rows(store['index'], index_row)
+    store.flush()
+
+
+def read_attempt(file_path, row):
+    """ Function to read the trajectories of one attempt
+    Args:
+        file_path: str, path to the HDF5 file
+        row: int, row of the attempt in experimental_data.csv
+    Returns:
+        cursor_path: np.ndarray (n, 2), x and y cursor positions
+        mouse_path: np.ndarray (m, 3), timestamp in ns, x and y of the mouse samples
+    """
+    with h5py.File(file_path, 'r') as store:
+        index = store['index']
+        rows = index['row']
+        position = np.searchsorted(rows, row)
+        if position == len(rows) or rows[position] != row:
+            raise KeyError(f'attempt in row {row} is not in {file_path}')
+        entry = index[position]
+        cursor_path = store['cursor'][entry['cursor_start']:entry['cursor_stop']]
+        mouse_path = store['mouse'][entry['mouse_start']:entry['mouse_stop']]
+    return cursor_path, mouse_path
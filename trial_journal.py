@@ -0,0 +1,189 @@
+"""
+Crash-safe journal of the trials and resume of interrupted sessions.
+The data of the session is kept in memory and saved to experimental_data.csv only at the end of the session.
+To avoid losing a whole session after a crash, every attempt written by write_data() is also appended to
+a journal file (trial_journal.jsonl) next to the csv file, one JSON record per line:
+    {"type": "header", ...}: setup and participant of the session, first line of the journal
+    {"type": "attempt", "row": {...}, "state": {...}, ...}: data row of the attempt (with its outcome) and the game
+        state after it, including the keyboard overrides and the draw counters of the random streams
+    {"type": "target", "target": [x, y]}: target of the attempt in progress
+The attempt and target records have the time.perf_counter_ns() time 'time_ns' of their frame, the clock of the
+trajectory store and of the session recording (see session_recorder.py).
+The records are written to the file immediately and synced to the disk every 'sync_every' attempts, so that
+a killed process loses nothing and a power cut loses at most 'sync_every' attempts.
+A session folder with a journal but without experimental_data.csv is an interrupted session, which can be resumed
+at the last committed attempt with the same schedule state (see resume_session()).
+"""
+
+import glob
+import json
+import os
+
+import schedule
+
+JOURNAL_NAME = 'trial_journal.jsonl'
+SYNC_EVERY = 10  # attempts
+
+# dynamic variables needed to continue the session at the same state
+STATE_VARIABLES = ('attempts', 'score', 'gradual_attempts', 'gradual_step', 'perturbation_angle',
+                   'motor_noise_perturbation', 'error_angle', 'game_event')
+
+
+def to_json(value):
+    """ Function to convert numpy scalars for the JSON encoder
+    Args:
+        value: numpy scalar
+    Returns:
+        value: the corresponding python scalar
+    """
+    return value.item()
+
+
+def open_journal(directory, header=None, sync_every=SYNC_EVERY):
+    """ Function to open the journal of a session for appending
+    Args:
+        directory: str, session folder (file saving path)
+        header: dict, optional, information about the session written as the first record of a new journal
+        sync_every: int, number of attempts after which the journal is synced to the disk
+    Returns:
+        journal: dict with the journal file and the number of attempts not yet synced
+    """
+    file_path = os.path.join(directory, JOURNAL_NAME)
+    new_journal = not os.path.exists(file_path)
+    journal = {'file': open(file_path, 'a'), 'unsynced': 0, 'sync_every': sync_every}
+    if new_journal and header is not None:
+        write_record(journal, {'type': 'header', **header})
+    return journal
+
+
+def write_record(journal, record):
+    """ Function to write a record to the journal, the record is passed to the OS immediately
+    Args:
+        journal: dict, the journal
+        record: dict, the record
+    """
+    journal['file'].write(json.dumps(record, default=to_json) + '\n')
+    journal['file'].flush()
+
+
+def sync_journal(journal):
+    """ Function to sync the journal to the disk
+    Args:
+        journal: dict, the journal
+    """
+    os.fsync(journal['file'].fileno())
+    journal['unsynced'] = 0
+
+
+def append_attempt(journal, session, time_ns=None):
+    """ Function to append the last attempt written by write_data() and the game state to the journal
+    Args:
+        journal: dict, the journal
+        session: dict, the game session
+        time_ns: int, optional, time.perf_counter_ns() of the frame which finished the attempt
+    """
+    dynamic_variables = session['dynamic_variables']
+    record = {
+        'type': 'attempt',
+        'row': {key: values[-1] for key, values in session['data'].items()},
+        'state': {key: dynamic_variables[key] for key in STATE_VARIABLES},
+        'event_parameters': session['event_parameters'],
+        'random_draws': session['random']['draws'],
+        'time_ns': time_ns,
+    }
+    write_record(journal, record)
+    journal['unsynced'] += 1
+    if journal['unsynced'] >= journal['sync_every']:
+        sync_journal(journal)
+
+
+def append_target(journal, target, time_ns=None):
+    """ Function to append the target of the attempt in progress to the journal
+    Args:
+        journal: dict, the journal
+        target: [x, y] coordinates of the target
+        time_ns: int, optional, time.perf_counter_ns() of the frame in which the target appeared
+    """
+    write_record(journal, {'type': 'target', 'target': target, 'time_ns': time_ns})
+
+
+def close_journal(journal):
+    """ Function to sync and close the journal
+    Args:
+        journal: dict, the journal
+    """
+    sync_journal(journal)
+    journal['file'].close()
+
+
+def read_journal(directory):
+    """ Function to read the records of a journal, an incomplete last line (crash during writing) is ignored
+    Args:
+        directory: str, session folder
+    Returns:
+        records: list of dict
+    """
+    records = []
+    with open(os.path.join(directory, JOURNAL_NAME)) as file:
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+def find_interrupted_session(file_saving_root, participant_number, exp_setup_name, test_mode):
+    """ Function to find the last interrupted session of a participant with the given experimental setup
+    Args:
+        file_saving_root: str, root folder of the experiment
+        participant_number: str, participant ID
+        exp_setup_name: str, name of the experimental setup
+        test_mode: bool, True if the session was run in test mode
+    Returns:
+        directory: str, folder of the interrupted session or None if there is none
+    """
+    pattern = f'{file_saving_root}/{participant_number}/{participant_number}_*/{exp_setup_name}'
+    if test_mode:
+        pattern += '/test'
+    interrupted = [directory for directory in glob.glob(pattern)
+                   if os.path.exists(os.path.join(directory, JOURNAL_NAME))
+                   and not os.path.exists(os.path.join(directory, 'experimental_data.csv'))]
+    if not interrupted:
+        return None
+    return max(interrupted, key=lambda directory: os.path.getmtime(os.path.join(directory, JOURNAL_NAME)))
+
+
+def resume_session(session, records):
+    """ Function to restore the data and the state of a session from the journal records
+    The data rows are restored, the game continues at the last committed attempt with the same score, gradual
+    perturbation state, keyboard overrides and random streams, and the target of the interrupted attempt is
+    presented again.
+    Args:
+        session: dict, new game session created with the same schedule and the same seed
+        records: list of dict, records of the journal
+    """
+    data = session['data']
+    dynamic_variables = session['dynamic_variables']
+    state = None
+    target = None
+    for record in records:
+        if record['type'] == 'attempt':
+            for key, values in data.items():
+                values.append(record['row'].get(key))  # None for the columns added after the journal was written
+            state = record
+            target = None
+        elif record['type'] == 'target':
+            target = record['target']
+
+    if state is not None:
+        dynamic_variables.update(state['state'])
+        session['event_parameters'] = state['event_parameters']
+        session['random']['draws'].update(state.get('random_draws', {}))
+
+    # parameters of the schedule at the last committed attempt, overridden by the last keyboard event
+    attempts = dynamic_variables['attempts']
+    session['parameters'].update(schedule.parameters_at(session['schedule'], attempts))
+    session['parameters'].update(session['event_parameters'])
+    session['schedule_attempts'] = attempts
+    session['pending_target'] = target
@@ -0,0 +1,200 @@
+"""
+Two-rate state-space model of visuomotor adaptation (fast and slow learning processes).
+The aim of the participant (hand direction relative to the target, radians) is the sum of a fast and a slow state,
+which learn from the error of every attempt with the signs of population_simulator:
+    error[n] = fast[n] + slow[n] - total_perturbation[n]
+    fast[n + 1] = retention_fast * fast[n] - learning_rate_fast * error[n]
+    slow[n + 1] = retention_slow * slow[n] - learning_rate_slow * error[n]
+with retention_fast < retention_slow and learning_rate_slow < learning_rate_fast.
+The model is linear, so the states are the total perturbation filtered by a second-order IIR filter: the predictions
+of all attempts are computed at once by scipy.signal.lfilter instead of a Python loop over the attempts.
+The parameters are fitted to the error angles of a session by bounded least squares (L-BFGS-B, several starting
+points), outliers are excluded from the fit. The sessions of an experiment root folder are found with the session
+catalog and fitted in parallel in a process pool, the parameters and the goodness of fit of every session are saved
+in {root}/two_rate_fits.csv.
+Usage:
+    python two_rate_model.py {root} [--workers N] [--include-test] [--critical-angle DEG]
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+
+import session_catalog
+import session_output
+from defaults import CRITICAL_ANGLE
+
+PARAMETERS = ('retention_fast', 'learning_rate_fast', 'retention_slow', 'learning_rate_slow')
+FIT_COLUMNS = (*PARAMETERS, 'sse', 'rmse', 'r_squared', 'aic', 'bic', 'fitted_attempts', 'converged')
+FITS_NAME = 'two_rate_fits.csv'
+
+# the fit runs on (retention_slow, retention ratio fast/slow, learning_rate_fast, learning rate ratio slow/fast)
+# in [0, 1], so the order of the rates is kept by simple bounds
+BOUNDS = ((0, 1), (0, 1), (0, 1), (0, 1))
+STARTS = ((0.99, 0.6, 0.2, 0.1), (0.995, 0.9, 0.1, 0.2), (0.95, 0.5, 0.4, 0.05))
+INVALID_SSE = 1e12  # cost of unstable parameters
+
+
+def model_parameters(theta):
+    """ Function to convert the fitted variables to the parameters of the model
+    Args:
+        theta: sequence of float, (retention_slow, retention ratio, learning_rate_fast, learning rate ratio)
+    Returns:
+        parameters: dict with the PARAMETERS
+    """
+    retention_slow, retention_ratio, learning_rate_fast, learning_rate_ratio = theta
+    return {'retention_fast': retention_slow * retention_ratio, 'learning_rate_fast': learning_rate_fast,
+            'retention_slow': retention_slow, 'learning_rate_slow': learning_rate_fast * learning_rate_ratio}
+
+
+def filter_coefficients(parameters):
+    """ Function to get the IIR filter from the total perturbation to the fast and the slow state
+    Args:
+        parameters: dict with the PARAMETERS
+    Returns:
+        fast, slow: np.ndarray, numerator coefficients of the fast and the slow state
+        denominator: np.ndarray, denominator coefficients of both states
+    """
+    a_fast, b_fast = parameters['retention_fast'], parameters['learning_rate_fast']
+    a_slow, b_slow = parameters['retention_slow'], parameters['learning_rate_slow']
+    # state transition matrix [[a_fast - b_fast, -b_fast], [-b_slow, a_slow - b_slow]], input [b_fast, b_slow]
+    trace = a_fast - b_fast + a_slow - b_slow
+    determinant = (a_fast - b_fast) * (a_slow - b_slow) - b_fast * b_slow
+    fast = np.array([0, b_fast, -a_slow * b_fast])
+    slow = np.array([0, b_slow, -a_fast * b_slow])
+    return fast, slow, np.array([1, -trace, determinant])
+
+
+def predict(parameters, total_perturbation):
+    """ Function to predict the error angles of a session
+    Args:
+        parameters: dict with the PARAMETERS
+        total_perturbation: np.ndarray, total perturbation of every attempt in radians
+    Returns:
+        prediction: dict of np.ndarray with the predicted 'error_angle', 'fast' and 'slow' states in radians
+    """
+    fast_coefficients, slow_coefficients, denominator = filter_coefficients(parameters)
+    fast = lfilter(fast_coefficients, denominator, total_perturbation)
+    slow = lfilter(slow_coefficients, denominator, total_perturbation)
+    return {'error_angle': fast + slow - total_perturbation, 'fast': fast, 'slow': slow}
+
+
+def sum_of_squares(theta, total_perturbation, error_angle, valid):
+    """ Function to calculate the cost of the fit: the sum of squared errors of the prediction
+    Args:
+        theta: sequence of float, fitted variables (see model_parameters())
+        total_perturbation: np.ndarray, total perturbation of every attempt in radians
+        error_angle: np.ndarray, measured error angles in radians
+        valid: np.ndarray of bool, attempts included in the fit
+    Returns:
+        sse: float
+    """
+    fast_coefficients, slow_coefficients, denominator = filter_coefficients(model_parameters(theta))
+    # one filter for the sum of the states
+    prediction = lfilter(fast_coefficients + slow_coefficients, denominator, total_perturbation) - total_perturbation
+    sse = np.sum((prediction[valid] - error_angle[valid]) ** 2)
+    return sse if np.isfinite(sse) else INVALID_SSE
+
+
+def fit_session(data, critical_angle=CRITICAL_ANGLE, starts=STARTS):
+    """ Function to fit the two-rate model to the error angles of a session
+    Args:
+        data: The data read from experimental_data.csv
+        critical_angle: The critical angle in degrees of the outliers, which are excluded from the fit
+        starts: sequence of starting points of the fitted variables (see model_parameters()), the best fit is kept
+    Returns:
+        fit: dict with the fitted PARAMETERS and the goodness of fit:
+            sse, rmse: sum of squared errors and root mean squared error in radians
+            r_squared: fraction of the variance of the error angles explained by the model
+            aic, bic: Akaike and Bayesian information criteria, Gaussian residuals
+            fitted_attempts: number of attempts in the fit
+            converged: bool, True if the optimizer converged
+    """
+    total_perturbation = data['total_perturbation'].to_numpy(dtype=float)
+    error_angle = data['error_angle'].to_numpy(dtype=float)
+    valid = np.abs(error_angle) < np.radians(critical_angle)
+    n = int(valid.sum())
+    if n <= len(PARAMETERS):
+        raise ValueError(f'{n} attempts are not enough to fit {len(PARAMETERS)} parameters')
+
+    best = None
+    for start in starts:
+        result = minimize(sum_of_squares, start, args=(total_perturbation, error_angle, valid), method='L-BFGS-B',
+                          bounds=BOUNDS)
+        if best is None or result.fun < best.fun:
+            best = result
+
+    sse = float(best.fun)
+    total = np.sum((error_angle[valid] - error_angle[valid].mean()) ** 2)
+    log_likelihood_term = n * np.log(max(sse, np.finfo(float).tiny) / n)
+    return {**model_parameters(best.x),
+            'sse': sse,
+            'rmse': np.sqrt(sse / n),
+            'r_squared': 1 - sse / total if total > 0 else np.nan,
+            'aic': log_likelihood_term + 2 * len(PARAMETERS),
+            'bic': log_likelihood_term + len(PARAMETERS) * np.log(n),
+            'fitted_attempts': n,
+            'converged': bool(best.success)}
+
+
+def fit_file(file_path, critical_angle=CRITICAL_ANGLE):
+    """ Function to fit the two-rate model to a session file, run in the processes of the pool
+    Args:
+        file_path: str, path to experimental_data.csv or experimental_data.parquet
+        critical_angle: float, critical angle in degrees of the outliers
+    Returns:
+        fit: dict, see fit_session()
+    """
+    return fit_session(session_output.read_experimental_data(file_path), critical_angle)
+
+
+def fit_cohort(file_saving_root, workers=None, include_test=False, critical_angle=CRITICAL_ANGLE):
+    """ Function to fit the two-rate model to all sessions of an experiment root folder in parallel
+    A session which fails is reported and skipped, the other sessions are still fitted.
+    Args:
+        file_saving_root: str, root folder of the experiment
+        workers: int, optional, number of processes, by default the number of CPUs
+        include_test: bool, True to include the sessions run in test mode
+        critical_angle: float, critical angle in degrees of the outliers
+    Returns:
+        fits: DataFrame with the participant, session, script, test_mode and the FIT_COLUMNS of every session,
+        also saved as {root}/two_rate_fits.csv
+    """
+    session_catalog.update_catalog(file_saving_root)
+    sessions = session_catalog.find_sessions(file_saving_root, test_mode=None if include_test else False)
+    print(f'{len(sessions)} sessions found in {file_saving_root}')
+
+    fits = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fit_file, os.path.join(file_saving_root, session['csv_path'] or
+                                                          session['parquet_path']), critical_angle): session
+                   for _, session in sessions.iterrows()}
+        for future in as_completed(futures):
+            session = futures[future]
+            try:
+                fits.append({column: session[column] for column in ('participant', 'session', 'script', 'test_mode')}
+                            | future.result())
+            except Exception as error:
+                print(f'failed: {session["path"]}: {error!r}')
+
+    fits = pd.DataFrame(fits, columns=['participant', 'session', 'script', 'test_mode', *FIT_COLUMNS])
+    fits = fits.sort_values(['participant', 'session', 'script'], ignore_index=True)
+    fits.to_csv(os.path.join(file_saving_root, FITS_NAME), index=False)
+    print(f'{len(fits)} sessions fitted')
+    return fits
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fit the two-rate model to all sessions of an experiment root folder')
+    parser.add_argument('root', help='root folder of the experiment')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: number of CPUs)')
+    parser.add_argument('--include-test', action='store_true', help='include the sessions run in test mode')
+    parser.add_argument('--critical-angle', type=float, default=CRITICAL_ANGLE,
+                        help='critical angle in degrees of the outliers')
+    arguments = parser.parse_args()
+    fit_cohort(arguments.root, arguments.workers, arguments.include_test, arguments.critical_angle)